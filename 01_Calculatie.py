@@ -5,6 +5,7 @@
 # worden netjes getoond i.p.v. een harde crash.
 
 from __future__ import annotations
+import hashlib
 import streamlit as st
 import pandas as pd
 
@@ -22,19 +23,13 @@ from utils.io import (
     SCHEMA_MATERIALS,
     SCHEMA_PROCESSES,
     SCHEMA_BOM,
-    read_csv_safe,
+    cached_read,
+    file_key,
     paths,
 )
 
-# Kostrekenregels
-try:
-    from utils.costing import part_cost
-except Exception:
-    # Fallback voor wanneer costing (nog) niet aanwezig is
-    def part_cost(material_kg, price_eur_per_kg, process_time_h, machine_rate_eur_h, labor_time_h, labor_rate_eur_h):
-        return (material_kg or 0.0) * (price_eur_per_kg or 0.0) + \
-               (process_time_h or 0.0) * (machine_rate_eur_h or 0.0) + \
-               (labor_time_h or 0.0) * (labor_rate_eur_h or 0.0)
+# Kostrekenregels (kolomgewijs, incrementeel per aanname)
+from utils.costing import line_cost_graph
 
 def guard(fn):
     """Zorg dat fouten netjes zichtbaar zijn en de page stopt."""
@@ -51,10 +46,14 @@ def main():
 
     P = paths()
 
-    # Data inladen met schema-validatie
-    materials = read_csv_safe(P["materials"], SCHEMA_MATERIALS)
-    processes = read_csv_safe(P["processes"], SCHEMA_PROCESSES)
-    bom = read_csv_safe(P["bom"], SCHEMA_BOM) if P["bom"].exists() else None
+    # Graaf met gecachte merge/kolommen blijft over reruns heen bestaan
+    g = st.session_state.get("calc_graph")
+    if g is None:
+        g = st.session_state["calc_graph"] = line_cost_graph()
+    g.reset_stats()
+
+    # Data alleen (opnieuw) inladen als het bestand gewijzigd is (file_key = pad+mtime+grootte)
+    processes = cached_read(P["processes"], SCHEMA_PROCESSES) if P["processes"].exists() else None
 
     # UI: hulp / status
     with st.expander("📁 Databestanden"):
@@ -62,48 +61,44 @@ def main():
         st.write(f"**Processes**: `{P['processes']}`")
         st.write(f"**BOM**: `{P['bom']}` (template mag ook)")
 
-    if materials is None:
+    mkey = file_key(P["materials"])
+    if mkey is None:
         st.error("Kon **materials** niet laden. Controleer `data/materials_db.csv`.")
         st.stop()
+    if g.changed("materials", mkey):
+        g.set("materials", cached_read(P["materials"], SCHEMA_MATERIALS, columns=["material_id", "price_eur_per_kg"]), key=mkey)
 
     # BOM upload of template
     up = st.file_uploader("Upload BOM CSV (of gebruik `data/bom_template.csv`)", type=["csv"])
     if up is not None:
-        bom = pd.read_csv(up)
-
-    if bom is None:
-        st.warning("Geen BOM beschikbaar. Upload een CSV of plaats `data/bom_template.csv`.")
-        st.stop()
-
+        bkey = ("upload", hashlib.md5(up.getvalue()).hexdigest())
+        if g.changed("bom", bkey):
+            g.set("bom", pd.read_csv(up), key=bkey)
+    else:
+        bkey = file_key(P["bom"])
+        if bkey is None:
+            st.warning("Geen BOM beschikbaar. Upload een CSV of plaats `data/bom_template.csv`.")
+            st.stop()
+        if g.changed("bom", bkey):
+            g.set("bom", cached_read(P["bom"], SCHEMA_BOM), key=bkey)
+
+    bom = g.get("bom")
     required = ["material_id", "qty", "mass_kg", "process_route"]
     missing = [c for c in required if c not in bom.columns]
     if missing:
         st.error(f"Ontbrekende BOM kolommen: {', '.join(missing)}")
         st.stop()
 
-    # Merge materiaalprijzen
-    view = bom.merge(
-        materials[["material_id", "price_eur_per_kg"]],
-        on="material_id",
-        how="left"
-    )
-
     st.sidebar.header("Aannames")
-    lt_per_qty = st.sidebar.number_input("Arbeidstijd per stuk (uur)", min_value=0.0, value=0.10, step=0.05)
-    mt_per_qty = st.sidebar.number_input("Machinetijd per stuk (uur)", min_value=0.0, value=0.05, step=0.05)
-    labor_rate = st.sidebar.number_input("Arbeidsrate (€/h)", min_value=0.0, value=45.0, step=5.0)
-    machine_rate = st.sidebar.number_input("Machinerate (€/h)", min_value=0.0, value=80.0, step=5.0)
-
-    def calc_row(r: pd.Series) -> float:
-        qty = float(r.get("qty") or 0.0)
-        mk = float(r.get("mass_kg") or 0.0)
-        price = float(r.get("price_eur_per_kg") or 0.0)
-        lt = qty * lt_per_qty
-        mt = qty * mt_per_qty
-        return part_cost(mk, price, mt, machine_rate, lt, labor_rate)
-
-    view["part_cost_eur"] = view.apply(calc_row, axis=1)
-    total = float(view["part_cost_eur"].sum())
+    g.set("labor_h_per_qty", st.sidebar.number_input("Arbeidstijd per stuk (uur)", min_value=0.0, value=0.10, step=0.05))
+    g.set("machine_h_per_qty", st.sidebar.number_input("Machinetijd per stuk (uur)", min_value=0.0, value=0.05, step=0.05))
+    g.set("labor_rate_eur_h", st.sidebar.number_input("Arbeidsrate (€/h)", min_value=0.0, value=45.0, step=5.0))
+    g.set("machine_rate_eur_h", st.sidebar.number_input("Machinerate (€/h)", min_value=0.0, value=80.0, step=5.0))
+
+    # Alleen de kolommen die van een gewijzigde aanname afhangen worden herrekend
+    view = g.get("result")
+    total = float(g.get("total_cost").sum())
+    st.sidebar.caption("Herberekend: " + (", ".join(g.recomputed) or "niets (cache)"))
 
     # NL notatie zonder locale-gedoe
     def eur(x: float) -> str:
@@ -5,8 +5,11 @@ import pandas as pd
 from utils.safe import guard
 from utils.io import (
     SCHEMA_MATERIALS, SCHEMA_PROCESSES, SCHEMA_BOM,
-    load_materials, load_processes, load_bom,
+    load_materials, load_processes, load_bom, paths,
 )
+from utils.prices import price_index
+from utils.costing import price_lines, route_operations
+from utils.bom_tree import explode_bom
 
 def main():
     st.set_page_config(page_title="Quick Cost Check", layout="wide")
@@ -25,34 +28,23 @@ def main():
     with st.expander("🧾 BOM", expanded=False):
         st.dataframe(bom)
 
-    # Merge & berekening
-    df = (
-        bom.merge(mats, on="material_id", how="left")
-           .merge(procs, left_on="process_route", right_on="process_id", how="left")
-    )
-
-    # Guard tegen missende kolommen
-    required_cols = [
-        "mass_kg", "price_eur_per_kg",
-        "runtime_h", "machine_rate_eur_h", "labor_rate_eur_h",
-        "overhead_pct", "margin_pct",
-    ]
-    missing = [c for c in required_cols if c not in df.columns]
+    # Guard tegen missende kolommen (runtime_h is optioneel, dan alleen setup)
+    required_cols = ["material_id", "mass_kg", "process_route"]
+    missing = [c for c in required_cols if c not in bom.columns]
     if missing:
         st.error(f"Ontbrekende kolommen in data: {missing}")
         st.stop()
 
-    df["material_cost"] = df["mass_kg"] * df["price_eur_per_kg"]
-    df["process_cost"] = df["runtime_h"] * (df["machine_rate_eur_h"] + df["labor_rate_eur_h"])
-    df["overhead"] = (df["material_cost"] + df["process_cost"]) * df["overhead_pct"]
-    df["base_cost"] = df["material_cost"] + df["process_cost"] + df["overhead"]
-    df["margin"] = df["base_cost"] * df["margin_pct"]
-    df["total_cost"] = df["base_cost"] + df["margin"]
+    # Koppelen & berekening (routes per bewerking)
+    df = price_lines(bom, mats, procs)
+    unknown = int(df["unknown_ops"].sum())
+    if unknown:
+        st.warning(f"{unknown} bewerking(en) uit process_route staan niet in processes_db en tellen als 0.")
 
     st.subheader("📊 Calculated costs per BOM line")
     st.dataframe(
         df[[
-            "material_id", "qty",
+            "material_id", "qty", "process_route", "n_ops",
             "material_cost", "process_cost",
             "overhead", "margin", "total_cost"
         ]].copy()
@@ -60,4 +52,25 @@ def main():
 
     st.metric("📦 Offer total (EUR)", f"{df['total_cost'].sum():,.2f}")
 
+    with st.expander("⚙️ Bewerkingen per BOM-regel", expanded=False):
+        st.dataframe(route_operations(bom, procs), use_container_width=True)
+
+    # Multi-level roll-up als de BOM een item_no/parent-structuur heeft
+    if {"item_no", "parent"}.issubset(df.columns):
+        with st.expander("🌳 Multi-level roll-up (per ROOT)", expanded=False):
+            tree = explode_bom(df, cost_col="total_cost")
+            st.metric("🏗️ Assembly total (EUR, qty-gewogen)", f"{tree['rolled_cost'].iloc[0]:,.2f}")
+            st.dataframe(tree.iloc[1:].sort_values(["level", "item_no"]), use_container_width=True)
+
+    # Marktprijzen (material_prices.csv) naast de prijs uit materials_db, op een gekozen prijspeil
+    if paths()["material_prices"].exists() and {"grade", "material_id"}.issubset(mats.columns):
+        with st.expander("📈 Marktprijs per materiaal (material_prices.csv)", expanded=False):
+            as_of = st.date_input("Prijspeil", pd.Timestamp.today().date(), key="calc_price_date")
+            idx = price_index()
+            forms = mats["form"] if "form" in mats.columns else pd.Series([None] * len(mats), index=mats.index)
+            market = [idx.as_of(g, as_of, form=f, default=idx.as_of(g, as_of, default=float("nan")))
+                      for g, f in zip(mats["grade"], forms)]
+            cols = [c for c in ["material_id", "grade", "form", "price_eur_per_kg"] if c in mats.columns]
+            st.dataframe(mats[cols].assign(market_eur_per_kg=market), use_container_width=True)
+
 guard(main)
@@ -4,7 +4,7 @@ configure_page(); init_state()
 import streamlit as st
 import pandas as pd
 from pathlib import Path
-from utils.shared import load_csv
+from utils.io import cached_read
 
 st.title("📡 Materiaalprijzen & bronnen")
 
@@ -12,13 +12,13 @@ def load_materials_any():
     # 1) Nieuw schema (aanbevolen)
     p_new = Path("data/materials_db.csv")
     if p_new.exists():
-        df = pd.read_csv(p_new)
+        df = cached_read(p_new)
         if "material_id" in df.columns:
             return df, "materials_db.csv"
     # 2) Oud schema (compat)
     p_old = Path("data/material_prices.csv")
     if p_old.exists():
-        df = pd.read_csv(p_old)
+        df = cached_read(p_old)
         # map minimaal naar nieuw
         # verwacht minstens: material_id, grade, price_eur_per_kg
         for col in ["material_id","grade","en_number","category","form","density_kg_per_m3",
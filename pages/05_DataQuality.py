@@ -23,6 +23,7 @@ from datetime import datetime
 # Optioneel: shared-functies (alleen nodig voor capaciteit / context)
 try:
     from utils.shared import ROUTING_COLS, BOM_COLS, capacity_table, MACHINE_RATES
+    from utils.shared import expand_orders, load_matrix, utilization, utilization_heatmap
 except Exception:
     ROUTING_COLS = ["Step","Proces","Qty_per_parent","Cycle_min","Setup_min","Attend_pct","kWh_pc","QA_min_pc","Scrap_pct","Parallel_machines","Batch_size","Queue_days"]
     BOM_COLS     = ["Part","Qty","UnitPrice","Scrap_pct"]
@@ -256,10 +257,30 @@ cap_proc = {p: st.number_input(f"Capaciteit {p} (h/dag)", 0.0, 24.0, 8.0, key=f"
 if capacity_table is not None:
     cap_df = capacity_table(st.session_state.get("routing_df", routing), Q, hours_day, cap_proc)
     if not cap_df.empty:
+        st.session_state["cap_df"] = cap_df.copy()
         cap_df["Util_%"] = (cap_df["Util_pct"]*100).round(1)
         st.dataframe(cap_df, use_container_width=True)
         hard_over = cap_df[cap_df["Util_pct"]>1.0]
         if not hard_over.empty:
             st.warning(f"**Overbelast**: {', '.join(hard_over['Proces'].astype(str))} (>{100.0:.0f}% benutting). Overweeg extra parallelle machines, batchgroottes of cyclus/insteloptimalisatie.")
+
+    # Meerdere open offertes/orders: proces x week-belasting
+    with st.expander("📅 Belasting open orders (proces x week)"):
+        st.caption("Orders-CSV: order_id, Q, week (+ routing_id). Routings-CSV (lange vorm, met routing_id) is optioneel; "
+                   "zonder routings geldt de huidige routing voor alle orders.")
+        up_orders = st.file_uploader("Orders (CSV)", type=["csv"], key="cap_orders")
+        up_routes = st.file_uploader("Routings (CSV, optioneel)", type=["csv"], key="cap_routings")
+        if up_orders is not None:
+            orders = pd.read_csv(up_orders)
+            routings = pd.read_csv(up_routes) if up_routes is not None else pd.DataFrame(st.session_state.get("routing_df", routing))
+            if routings.empty:
+                st.warning("Geen routing beschikbaar.")
+            else:
+                util = utilization(load_matrix(expand_orders(orders, routings)), hours_day, cap_proc)
+                st.session_state["cap_util"] = util
+                st.plotly_chart(utilization_heatmap(util), use_container_width=True)
+                over = util.gt(1.0)
+                if over.to_numpy().any():
+                    st.warning("Overbelaste weken: " + ", ".join(f"{p} wk {w}" for p, w in util.where(over).stack().index))
 else:
     st.info("Capaciteitstabel niet beschikbaar (fallback). Dit vereist `utils.shared.capacity_table`.")
@@ -16,7 +16,12 @@ ROOT = os.path.abspath(os.path.join(os.path.dirname(__file__), ".."))
 if ROOT not in sys.path: sys.path.insert(0, ROOT)
 
 import streamlit as st, pandas as pd, numpy as np
-from utils.shared import (MATERIALS, MACHINE_RATES, LABOR, cost_once, run_mc)
+from utils.shared import (MATERIALS, MACHINE_RATES, LABOR, cost_once, cost_curve, run_mc, run_mc_adaptive)
+from utils.offer import BREAK_QTYS, parse_qtys
+from utils.sensitivity import CostModel, tornado, sobol_indices
+from utils.sweep import SweepGrid, top_n, surface
+from utils.memo import LRUMemo, frame_key
+from utils.batching import optimize_batches, apply_batches
 
 st.set_page_config(page_title="Scenario Planner", page_icon="🧭", layout="wide")
 st.title("🧭 Scenario Planner")
@@ -42,6 +47,37 @@ st.caption("Definieer scenario’s. Cycle- en scrapfactor schalen de routing (1.
 
 N = st.number_input("Aantal scenario’s", 1, 10, 3)
 rows=[]
+
+# Memo over reruns: alleen scenario's met gewijzigde invoer worden opnieuw doorgerekend
+memo = st.session_state.get("scenario_memo")
+if memo is None:
+    memo = st.session_state["scenario_memo"] = LRUMemo(256)
+base_key = (frame_key(routing), frame_key(bom), tuple(sorted(defaults.items())))
+bom_df = pd.DataFrame(bom)
+
+def scaled_routing(cyc_fac, scrap_fac):
+    r = pd.DataFrame(routing).copy()
+    if "Cycle_min" in r: r["Cycle_min"] = r["Cycle_min"]*cyc_fac
+    if "Scrap_pct" in r: r["Scrap_pct"] = (r["Scrap_pct"]*scrap_fac).clip(0.0, 0.35)
+    return r
+
+def eval_mc(r, Q, price, method, auto, iters, sigma, seed):
+    """Geeft (kolommen voor de tabel, sketch); ruwe samples worden niet bewaard."""
+    mc_args = dict(energy=defaults["energy"], labor=LABOR, mrates=MACHINE_RATES,
+                   storage_days=defaults["storage_days"], storage_cost=defaults["storage_cost"],
+                   km=defaults["km"], eur_km=defaults["eur_km"], rework=defaults["rework"],
+                   rework_min=defaults["rework_min"], seed=seed)
+    if auto:
+        out = run_mc_adaptive(r, bom_df, Q, defaults["netkg"], price, sigma, sigma, sigma/8.0,
+                              method=method, max_iters=int(iters), min_iters=min(4096, int(iters)), **mc_args)
+        ci = out["quantiles"]
+        return ({"P50": ci[50][0], "P80": ci[80][0], "P95": ci[95][0],
+                 "P95_CI": f"{ci[95][1]:.2f}–{ci[95][2]:.2f}",
+                 "Iters": out["iters"], "Stop": out["reason"]}, out["sketch"])
+    sketch = run_mc(r, bom_df, Q, defaults["netkg"], price,
+                    sigma, sigma, sigma/8.0, iters=iters, method=method, sketch=True, **mc_args)
+    p50, p80, p95 = sketch.percentile([50, 80, 95])
+    return {"P50": p50, "P80": p80, "P95": p95, "Iters": int(iters)}, sketch
 for i in range(N):
     with st.expander(f"Scenario {i+1}", expanded=(i==0)):
         col1,col2,col3,col4 = st.columns(4)
@@ -50,35 +86,127 @@ for i in range(N):
         cyc_fac   = col3.number_input("Cycle factor", 0.1, 5.0, 1.0, 0.05, key=f"cyc_{i}")
         scrap_fac = col4.number_input("Scrap factor", 0.1, 5.0, 1.0, 0.05, key=f"scr_{i}")
         # MC optioneel
-        mcc1, mcc2, mcc3 = st.columns(3)
+        mcc1, mcc2, mcc3, mcc4, mcc5 = st.columns(5)
         mc_on  = mcc1.checkbox("Monte-Carlo", False, key=f"mc_{i}")
-        iters  = mcc2.number_input("Iteraties", 100, 20000, 1000, 100, key=f"it_{i}")
-        sigma  = mcc3.number_input("σ% (cycle & mat)", 0.0, 0.5, 0.08, 0.01, key=f"sg_{i}")
+        method = mcc2.selectbox("Sampling", ["sobol", "lhs", "random"], key=f"mm_{i}")
+        auto   = mcc3.checkbox("Auto-stop", True, key=f"auto_{i}",
+                               help="Stop zodra P50/P80/P95 binnen de tolerantie stabiel zijn; Iteraties is dan het maximum.")
+        iters  = mcc4.number_input("Iteraties", 100, 1_000_000, 20000 if auto else 1000, 100, key=f"it_{i}")
+        sigma  = mcc5.number_input("σ% (cycle & mat)", 0.0, 0.5, 0.08, 0.01, key=f"sg_{i}")
 
-        r = pd.DataFrame(routing).copy()
-        if "Cycle_min" in r: r["Cycle_min"] = r["Cycle_min"]*cyc_fac
-        if "Scrap_pct" in r: r["Scrap_pct"] = (r["Scrap_pct"]*scrap_fac).clip(0.0, 0.35)
-        res = cost_once(r, pd.DataFrame(bom), Q, defaults["netkg"], price,
-                        defaults["energy"], LABOR, MACHINE_RATES,
-                        defaults["storage_days"], defaults["storage_cost"],
-                        defaults["km"], defaults["eur_km"], defaults["rework"], defaults["rework_min"])
+        skey = (base_key, Q, price, cyc_fac, scrap_fac)
+        res = memo.get_or_compute(("cost",) + skey, lambda: cost_once(
+            scaled_routing(cyc_fac, scrap_fac), bom_df, Q, defaults["netkg"], price,
+            defaults["energy"], LABOR, MACHINE_RATES,
+            defaults["storage_days"], defaults["storage_cost"],
+            defaults["km"], defaults["eur_km"], defaults["rework"], defaults["rework_min"]))
         row = {"Scenario": i+1, "Q": Q, "€/kg": price,
                "Mat_pc": res["mat_pc"], "Conv": res["conv_total"], "Lean": res["lean_total"],
                "Buy": res["buy_total"], "UnitCost": res["total_pc"]}
         if mc_on:
-            samples = run_mc(r, pd.DataFrame(bom), Q, defaults["netkg"], price,
-                             sigma, sigma, sigma/8.0, iters=iters,
-                             energy=defaults["energy"], labor=LABOR, mrates=MACHINE_RATES,
-                             storage_days=defaults["storage_days"], storage_cost=defaults["storage_cost"],
-                             km=defaults["km"], eur_km=defaults["eur_km"], rework=defaults["rework"], rework_min=defaults["rework_min"])
-            row.update({"P50": float(np.percentile(samples,50)),
-                        "P80": float(np.percentile(samples,80)),
-                        "P95": float(np.percentile(samples,95))})
+            seed = 1000 + i  # vaste seed per scenario: reruns geven dezelfde P-waarden
+            cols, sketch = memo.get_or_compute(
+                ("mc",) + skey + (method, auto, int(iters), sigma, seed),
+                lambda: eval_mc(scaled_routing(cyc_fac, scrap_fac), Q, price, method, auto, iters, sigma, seed))
+            row.update(cols)
+            # alleen de sketch (paar KB) in de sessie, niet de ruwe samples; 09_Dashboard / 12_Rapport lezen hem
+            st.session_state["mc_sketch"] = sketch
+            st.session_state.pop("mc_samples", None)
         rows.append(row)
 
 df = pd.DataFrame(rows)
 st.dataframe(df, use_container_width=True)
+ms = memo.stats()
+st.caption(f"Scenario-cache: {ms['entries']} resultaten, {ms['hits']} hits / {ms['misses']} berekeningen")
 if not df.empty:
     st.bar_chart(df.set_index("Scenario")[["UnitCost"]])
     st.download_button("⬇️ Export (CSV)", df.to_csv(index=False).encode("utf-8"),
                        "scenario_results.csv","text/csv")
+
+# Sweep: heel grid Q x €/kg x cycle x scrap in één keer (i.p.v. max. 10 handmatige scenario's)
+with st.expander("📈 Sweep (grid over Q, €/kg, cycle- en scrapfactor)", expanded=False):
+    def axis(label, lo, hi, n, key, step, is_int=False):
+        a1, a2, a3 = st.columns(3)
+        lo_ = a1.number_input(f"{label} van", value=lo, step=step, key=f"{key}_lo")
+        hi_ = a2.number_input(f"{label} tot", value=hi, step=step, key=f"{key}_hi")
+        n_  = a3.number_input(f"{label} stappen", 1, 1000, n, key=f"{key}_n")
+        vals = np.linspace(lo_, max(lo_, hi_), int(n_))
+        return np.unique(np.round(vals)) if is_int else vals
+    Qs  = axis("Q", 1, max(int(defaults["Q"]) * 4, 10), 50, "sw_q", 1, is_int=True)
+    Ps  = axis("€/kg", round(defaults["price"] * 0.7, 2), round(defaults["price"] * 1.3, 2), 40, "sw_p", 0.01)
+    Cfs = axis("Cycle factor", 0.8, 1.2, 10, "sw_c", 0.05)
+    Sfs = axis("Scrap factor", 0.5, 2.0, 5, "sw_s", 0.05)
+    n_comb = len(Qs) * len(Ps) * len(Cfs) * len(Sfs)
+    st.caption(f"{n_comb:,} combinaties")
+    if n_comb > 200_000:
+        st.warning("Grid te groot (> 200.000); verklein het aantal stappen.")
+    elif st.button("▶️ Sweep uitvoeren", key="sw_run"):
+        grid = SweepGrid(pd.DataFrame(routing), pd.DataFrame(bom), defaults["netkg"], Qs, Ps, Cfs, Sfs,
+                         defaults["energy"], LABOR, MACHINE_RATES, defaults["storage_days"], defaults["storage_cost"],
+                         defaults["km"], defaults["eur_km"], defaults["rework"], defaults["rework_min"])
+        costs = np.empty(grid.size)
+        best, live, prog = None, st.empty(), st.progress(0.0)
+        for idx, cost in grid.iter_chunks():
+            costs[idx] = cost
+            best = top_n(best, idx, cost, 20)
+            live.dataframe(grid.frame(*best), use_container_width=True)  # goedkoopste tot nu toe
+            prog.progress(float(idx[-1] + 1) / grid.size)
+        costs = costs.reshape(grid.shape)
+        surf = surface(costs, grid)
+        import plotly.express as px
+        fig = px.imshow(surf.to_numpy(), x=[f"{p:.2f}" for p in surf.columns], y=[str(int(q)) for q in surf.index],
+                        labels={"x": "€/kg", "y": "Q", "color": "€/stuk (min)"}, aspect="auto", origin="lower")
+        st.plotly_chart(fig, use_container_width=True)
+        st.download_button("⬇️ Top-20 (CSV)", grid.frame(*best).to_csv(index=False).encode("utf-8"),
+                           "sweep_top20.csv", "text/csv")
+
+# Staffelcurve: kostprijs voor een hele reeks aantallen in één berekening
+with st.expander("📉 Staffelcurve (€/stuk per aantal)", expanded=False):
+    qtys = parse_qtys(st.text_input("Staffels (aantallen, komma-gescheiden)", ", ".join(map(str, BREAK_QTYS)), key="qc_qtys"))
+    curve_args = (defaults["netkg"], defaults["price"], defaults["energy"], LABOR, MACHINE_RATES,
+                  defaults["storage_days"], defaults["storage_cost"], defaults["km"], defaults["eur_km"],
+                  defaults["rework"], defaults["rework_min"])
+    breaks = cost_curve(pd.DataFrame(routing), bom_df, qtys, *curve_args)
+    st.dataframe(breaks, use_container_width=True)
+    fine = cost_curve(pd.DataFrame(routing), bom_df, np.unique(np.geomspace(1, max(qtys), 400).round()), *curve_args)
+    import plotly.express as px
+    st.plotly_chart(px.line(fine, x="Q", y="UnitCost", log_x=True, labels={"UnitCost": "€/stuk"}), use_container_width=True)
+    st.download_button("⬇️ Staffels (CSV)", breaks.to_csv(index=False).encode("utf-8"), "price_breaks.csv", "text/csv")
+
+# Batchgrootte per stap: omstellen vs. opslag onderhanden werk
+with st.expander("📦 Batchgrootte-optimalisatie", expanded=False):
+    bc1, bc2, bc3 = st.columns(3)
+    hold = bc1.number_input("Opslag €/stuk/dag", 0.0, 100.0, float(defaults["storage_cost"]) or 0.05, 0.01, key="eb_hold")
+    hday = bc2.number_input("Uren per dag", 1.0, 24.0, 8.0, 0.5, key="eb_hday")
+    bmax = bc3.number_input("Max. batch (0 = geen)", 0, 1_000_000, 0, key="eb_max")
+    plan = memo.get_or_compute(("batch", base_key, hold, hday, int(bmax)), lambda: optimize_batches(
+        pd.DataFrame(routing), defaults["Q"], hold, LABOR, MACHINE_RATES, hday, int(bmax) or None))
+    st.caption(f"{plan.attrs.get('candidates', 0):,} kandidaten doorgerekend; "
+               f"besparing € {plan['Saving_pc'].sum():,.2f}/stuk (omstellen + opslag)")
+    st.dataframe(plan, use_container_width=True)
+    if st.button("✅ Batchgroottes overnemen in routing", key="eb_apply"):
+        st.session_state["routing_df"] = apply_batches(routing, plan)
+        st.success("Batch_size bijgewerkt in de sessie-routing.")
+
+# Gevoeligheid van de basis-invoer: welke parameters drijven de kostprijs?
+with st.expander("🌪️ Gevoeligheid (tornado & Sobol-indices)", expanded=False):
+    sc1, sc2, sc3 = st.columns(3)
+    rel    = sc1.number_input("Bandbreedte ±", 0.01, 0.5, 0.10, 0.01, key="sens_rel")
+    n_sob  = sc2.number_input("Sobol-basissamples", 256, 65536, 4096, 256, key="sens_n")
+    do_sob = sc3.checkbox("Sobol-indices berekenen", False, key="sens_sobol",
+                          help="n x (parameters + 2) evaluaties; staat uit zodat de pagina niet bij elke load rekent.")
+    model = CostModel(pd.DataFrame(routing), pd.DataFrame(bom), defaults["Q"], defaults["netkg"], defaults["price"],
+                      defaults["energy"], LABOR, MACHINE_RATES, defaults["storage_days"], defaults["storage_cost"],
+                      defaults["km"], defaults["eur_km"], defaults["rework"], defaults["rework_min"])
+    tor = memo.get_or_compute(("tornado", base_key, rel), lambda: tornado(model, rel))
+    st.caption(f"{model.n_params} parameters; basis € {tor['base_cost'].iloc[0]:,.2f}/stuk")
+    top = tor.head(15)
+    st.bar_chart(top.set_index("parameter")[["swing"]])
+    st.dataframe(top[["parameter", "group", "base", "low", "high", "swing"]], use_container_width=True)
+    if do_sob:
+        sob = memo.get_or_compute(("sobol", base_key, rel, int(n_sob)),
+                                  lambda: sobol_indices(model, rel, int(n_sob), seed=0))
+        st.caption(f"Sobol: {sob.attrs['evaluations']:,} evaluaties")
+        st.dataframe(sob[["parameter", "group", "S1", "ST"]].head(15), use_container_width=True)
+        st.download_button("⬇️ Gevoeligheid (CSV)", tor.merge(sob[["parameter", "S1", "ST"]], on="parameter", how="left")
+                           .to_csv(index=False).encode("utf-8"), "sensitivity.csv", "text/csv")
@@ -37,7 +37,7 @@ price   = st.session_state.get("price",3.5)
 energy  = st.session_state.get("energy",0.20)
 price_src = st.session_state.get("price_src","manual")
 res = st.session_state.get("res", {"mat_pc":0,"conv_total":0,"lean_total":0,"buy_total":0,"total_pc":0})
-mc = st.session_state.get("mc_samples")
+mc = st.session_state.get("mc_sketch", st.session_state.get("mc_samples"))
 
 facts = build_powerbi_facts(
     routing_df=pd.DataFrame(routing), bom_df=pd.DataFrame(bom),
@@ -78,3 +78,11 @@ st.markdown("### Top BOM kosten")
 if not fb_v.empty:
     top = fb_v.sort_values("Cost_Run", ascending=False).head(10)
     st.dataframe(top[["Part","Qty_Run","Cost_Run"]], use_container_width=True)
+
+if "MC_P50" in fr_v.columns and not fr_v.empty:
+    st.markdown("### Monte-Carlo (uit sketch)")
+    m1, m2, m3, m4 = st.columns(4)
+    m1.metric("P50", f"€ {fr_v['MC_P50'].iloc[-1]:.2f}")
+    m2.metric("P80", f"€ {fr_v['MC_P80'].iloc[-1]:.2f}")
+    m3.metric("P95", f"€ {fr_v['MC_P95'].iloc[-1]:.2f}")
+    m4.metric("Iteraties", f"{int(fr_v['MC_n'].iloc[-1]):,}")
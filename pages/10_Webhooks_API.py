@@ -26,6 +26,8 @@ st.caption("""
 Deze pagina geeft je een **eenvoudige webhook-inbox** via GitHub (map met JSON/CSV payloads), en **API-achtige exports** 
 van je huidige sessie (JSON/CSV) die je elders kunt consumeren. Geen extra server nodig.
 """)
+st.info("Realtime kosten nodig zonder GitHub-polling? Start lokaal `python tools/cost_service.py` "
+        "en POST een BOM naar `/cost` (latency-statistiek op `/stats`).")
 
 # ---------------------------
 # Basis: GitHub-inbox helper
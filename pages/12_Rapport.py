@@ -20,7 +20,7 @@ from reportlab.lib.pagesizes import A4
 from reportlab.pdfgen import canvas
 from reportlab.platypus import Table, TableStyle
 from reportlab.lib import colors
-from utils.shared import PROFIT, CONT, capacity_table
+from utils.shared import PROFIT, CONT, capacity_table, as_sketch, utilization_heatmap
 
 st.set_page_config(page_title="Rapport", page_icon="📄", layout="wide")
 st.title("Klant-rapport (PDF)")
@@ -33,7 +33,15 @@ if miss:
 
 project=st.session_state["project"]; Q=st.session_state["Q"]; mat=st.session_state["mat"]
 price=st.session_state["price"]; src=st.session_state["price_src"]; res=st.session_state["res"]
-cap_df=st.session_state.get("cap_df"); mc_samples=st.session_state.get("mc_samples")
+cap_df=st.session_state.get("cap_df"); cap_util=st.session_state.get("cap_util")
+mc_sketch=as_sketch(st.session_state.get("mc_sketch", st.session_state.get("mc_samples")))
+
+def mc_histogram(title=None):
+    counts, edges = mc_sketch.histogram(40)
+    h = pd.DataFrame({"UnitCost": (edges[:-1] + edges[1:]) / 2, "Aantal": counts})
+    fig = px.bar(h, x="UnitCost", y="Aantal", title=title)
+    fig.update_traces(width=float(edges[1] - edges[0]))
+    return fig
 
 # Optionele projectie
 proj_on = st.checkbox("Toon prijsprojectie (12 mnd)", False)
@@ -51,10 +59,12 @@ st.plotly_chart(go.Figure(go.Pie(labels=["Materiaal","Conversie","Lean","Inkoop"
 if cap_df is not None and not cap_df.empty:
     fig=px.bar(cap_df,x="Proces",y="Util_pct",text=(cap_df["Util_pct"]*100).round(1)); fig.update_layout(yaxis_tickformat=".0%")
     st.plotly_chart(fig,use_container_width=True)
+if cap_util is not None and not cap_util.empty:
+    st.plotly_chart(utilization_heatmap(cap_util),use_container_width=True)
 if proj_df is not None:
     st.plotly_chart(px.line(proj_df,x="Month",y="€/kg"),use_container_width=True)
-if mc_samples is not None and len(mc_samples)>0:
-    st.plotly_chart(px.histogram(pd.DataFrame({"UnitCost":mc_samples}), x="UnitCost", nbins=40), use_container_width=True)
+if mc_sketch is not None:
+    st.plotly_chart(mc_histogram(), use_container_width=True)
 
 # PDF export met kaleido
 def fig_to_png_bytes(fig)->bytes:
@@ -69,8 +79,8 @@ def build_figs():
         cap=px.bar(cap_df,x="Proces",y="Util_pct",text=(cap_df["Util_pct"]*100).round(1)); cap.update_layout(title="Capaciteit",yaxis_tickformat=".0%"); figs["cap"]=cap
     if proj_df is not None:
         figs["proj"]=px.line(proj_df,x="Month",y="€/kg",title="Materiaalprijs projectie (12 mnd)")
-    if mc_samples is not None and len(mc_samples)>0:
-        figs["mc"]=px.histogram(pd.DataFrame({"UnitCost":mc_samples}), x="UnitCost", nbins=40, title="Monte-Carlo – kostprijs/stuk")
+    if mc_sketch is not None:
+        figs["mc"]=mc_histogram("Monte-Carlo – kostprijs/stuk")
     return figs
 
 if st.button("⬇️ Genereer PDF"):
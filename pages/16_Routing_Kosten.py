@@ -3,7 +3,8 @@ configure_page(); init_state()
 
 import streamlit as st
 import pandas as pd
-import math
+from utils.io import load_processes
+from utils.formula import FormulaError, compile_formula, process_formulas
 
 st.title("🧮 Routing & bewerkingstijd")
 
@@ -21,14 +22,33 @@ def cost_setup_minutes(setup_min, mr, lr):  return (setup_min/60.0) * (mr + lr)
 def cost_runtime_minutes(rt_min, mr, lr):   return (rt_min/60.0) * (mr + lr)
 def cost_with_overheads(base, oh, m):       return base * (1 + oh) * (1 + m)
 
-def cnc_mill_time(toolpath_mm, feed_mm_min, passes=1, retract_penalty_min=0.15, k_complexity=1.0):
-    return (toolpath_mm / max(feed_mm_min, 1)) * k_complexity + passes * retract_penalty_min
+# Bewerkingstijden komen uit run_time_formula in processes_db.csv (eenmalig gecompileerd);
+# zonder die file (of zonder formule voor een proces) gelden de ingebouwde formules.
+DEFAULT_FORMULAS = {
+    "LASER_SHEET": "time_min = (cut_len_mm / max(cut_speed_mm_min, 1)) + pierces * pierce_time_min",
+    "BEND": "time_min = bends * (0.5 + part_rotate_penalty_min)",
+    "CNC_MILL_3AX": "time_min = (toolpath_mm / max(feed_mm_min, 1)) * k_complexity + (passes * retract_penalty_min)",
+    "WELD_TIG": "time_min = weld_len_mm / max(dep_rate_mm_min, 1) * k_precision",
+}
+FORMULAS = {pid: compile_formula(src) for pid, src in DEFAULT_FORMULAS.items()}
+try:
+    FORMULAS.update(process_formulas(load_processes()))
+except FileNotFoundError:
+    st.warning("processes_db.csv niet gevonden; ingebouwde bewerkingstijdformules gebruikt.")
+except FormulaError as e:
+    st.error(f"Kon de procesformules niet laden: {e}")
+    st.stop()
 
-def laser_time(cut_len_mm, cut_speed_mm_min, pierces, pierce_time_min=0.2):
-    return (cut_len_mm / max(cut_speed_mm_min, 1)) + pierces * pierce_time_min
-
-def bend_time(bends, rotate_penalty_min=0.1): return bends * (0.5 + rotate_penalty_min)
-def weld_time(weld_len_mm, dep_rate_mm_min, k_precision=1.0): return (weld_len_mm / max(dep_rate_mm_min,1)) * k_precision
+def run_minutes(process_id, **params):
+    f = FORMULAS.get(process_id)
+    if f is None:
+        st.warning(f"Geen run_time_formula voor {process_id} in processes_db.csv")
+        return 0.0
+    t = float(f(params)["time_min"])
+    if t != t:  # NaN: ontbrekende/ongeldige invoer, niet stil als 0 min meerekenen
+        st.warning(f"{process_id}: bewerkingstijd niet te berekenen uit {params}; telt als 0 min")
+        return 0.0
+    return t
 
 tab1, tab2 = st.tabs(["Laser + Buigen + Frezen", "Lassen + Frezen"])
 
@@ -57,9 +77,13 @@ with tab1:
     feed = st.number_input("Frezen voeding (mm/min)", 600.0, step=10.0)
 
     route = [
-        {"op":"LASER","setup_min":10,"runtime_min": laser_time(l, v, pierces)},
-        {"op":"BEND","setup_min":8,"runtime_min": bend_time(bends)},
-        {"op":"CNC_MILL","setup_min":12,"runtime_min": cnc_mill_time(toolpath, feed, passes=2, k_complexity=1.1)},
+        {"op":"LASER_SHEET","setup_min":10,"runtime_min": run_minutes(
+            "LASER_SHEET", cut_len_mm=l, cut_speed_mm_min=v, pierces=pierces, pierce_time_min=0.2)},
+        {"op":"BEND","setup_min":8,"runtime_min": run_minutes(
+            "BEND", bends=bends, part_rotate_penalty_min=0.1)},
+        {"op":"CNC_MILL_3AX","setup_min":12,"runtime_min": run_minutes(
+            "CNC_MILL_3AX", toolpath_mm=toolpath, feed_mm_min=feed, passes=2, retract_penalty_min=0.15,
+            k_complexity=1.1)},
     ]
     show_route(route)
 
@@ -70,7 +94,10 @@ with tab2:
     fd = st.number_input("Voeding (mm/min)", 500.0, step=10.0)
 
     route = [
-        {"op":"WELD_TIG","setup_min":15,"runtime_min": weld_time(wl, dep, k_precision=1.2)},
-        {"op":"CNC_MILL","setup_min":10,"runtime_min": cnc_mill_time(tp, fd, passes=1)},
+        {"op":"WELD_TIG","setup_min":15,"runtime_min": run_minutes(
+            "WELD_TIG", weld_len_mm=wl, dep_rate_mm_min=dep, k_precision=1.2)},
+        {"op":"CNC_MILL_3AX","setup_min":10,"runtime_min": run_minutes(
+            "CNC_MILL_3AX", toolpath_mm=tp, feed_mm_min=fd, passes=1, retract_penalty_min=0.15,
+            k_complexity=1.0)},
     ]
     show_route(route)
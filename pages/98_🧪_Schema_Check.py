@@ -89,4 +89,37 @@ if st.button("🔧 Fix bom_df"):
     })
     st.dataframe(fixed, use_container_width=True)
 
+st.markdown("---")
+st.subheader("Geheugen per sessie (data/)")
+try:
+    from utils.io import SCHEMA_MATERIALS, SCHEMA_PROCESSES, SCHEMA_BOM, paths, memory_report
+    P = paths()
+    reps = [memory_report(P[k], schema) for k, schema in
+            [("materials", SCHEMA_MATERIALS), ("processes", SCHEMA_PROCESSES), ("bom", SCHEMA_BOM)]
+            if P[k].exists()]
+    if reps:
+        mem = pd.DataFrame(reps)
+        mem["before_kb"] = (mem["before_bytes"] / 1024).round(1)
+        mem["after_kb"] = (mem["after_bytes"] / 1024).round(1)
+        st.dataframe(mem[["file", "rows", "before_kb", "after_kb", "saved_pct"]], use_container_width=True)
+        st.caption("before = pandas-defaults (object/float64/int64); after = compacte schema's uit utils.io.")
+    else:
+        st.info("Geen CSV's in data/ gevonden (draai make_templates.py).")
+except Exception as e:
+    st.warning(f"Geheugenrapport niet beschikbaar: {type(e).__name__}: {e}")
+
+st.markdown("---")
+st.subheader("Procesformules (run_time_formula)")
+try:
+    from utils.io import load_processes
+    from utils.formula import FormulaError, process_formulas
+    try:
+        forms = process_formulas(load_processes())
+        st.dataframe(pd.DataFrame([{"process_id": k, "outputs": ", ".join(f.outputs), "inputs": ", ".join(f.inputs)}
+                                   for k, f in forms.items()]), use_container_width=True)
+    except FormulaError as e:
+        st.error(str(e))
+except Exception as e:
+    st.warning(f"Formulecontrole niet beschikbaar: {type(e).__name__}: {e}")
+
 st.caption("Tip: draai deze check na het laden van presets of import via Excel/CSV om schema-drift te voorkomen.")
@@ -23,13 +23,13 @@ PLASTIC_POM,POM-C,,plastic,plate,1420,,,,,0.03,0.02,Acetal
 PLASTIC_PEEK,PEEK,,plastic,plate,1320,,,,,0.05,0.03,High-performance
 """
 (processes := """process_id,name,machine_group,machine_rate_eur_h,labor_rate_eur_h,setup_min,batch_min_qty,run_time_formula,scrap_pct,overhead_pct,margin_pct,notes
-CNC_MILL_3AX,3-axis milling,CNC_mill,95,45,30,1,"time_min = (toolpath_mm / feed_mm_min) + (passes * retract_penalty_min)",0.02,0.25,0.10,General 3-axis
-CNC_MILL_5AX,5-axis milling,CNC_mill,135,50,40,1,"time_min = (toolpath_mm / feed_mm_min) * k_complexity",0.02,0.25,0.12,Simultaneous 5-axis
+CNC_MILL_3AX,3-axis milling,CNC_mill,95,45,30,1,"time_min = (toolpath_mm / max(feed_mm_min, 1)) * k_complexity + (passes * retract_penalty_min)",0.02,0.25,0.10,General 3-axis
+CNC_MILL_5AX,5-axis milling,CNC_mill,135,50,40,1,"time_min = (toolpath_mm / max(feed_mm_min, 1)) * k_complexity",0.02,0.25,0.12,Simultaneous 5-axis
 CNC_TURN,CNC turning,CNC_lathe,85,45,20,1,"time_min = (cut_len_mm / feed_mm_rev) / rpm * 60",0.02,0.25,0.10,Bar work
-LASER_SHEET,Laser cutting,sheet_cut,75,35,10,1,"time_min = (cut_len_mm / cut_speed_mm_min) + pierces * pierce_time_min",0.01,0.20,0.10,Fiber laser
+LASER_SHEET,Laser cutting,sheet_cut,75,35,10,1,"time_min = (cut_len_mm / max(cut_speed_mm_min, 1)) + pierces * pierce_time_min",0.01,0.20,0.10,Fiber laser
 BEND,CNC bending,press_brake,70,35,15,1,"time_min = bends * (0.5 + part_rotate_penalty_min)",0.01,0.20,0.10,Press brake
-WELD_MAG,MAG welding,welding,60,40,15,1,"time_min = weld_len_mm / dep_rate_mm_min",0.03,0.25,0.12,Steel MAG
-WELD_TIG,TIG welding,welding,65,45,20,1,"time_min = weld_len_mm / dep_rate_mm_min * k_precision",0.03,0.25,0.12,Stainless TIG
+WELD_MAG,MAG welding,welding,60,40,15,1,"time_min = weld_len_mm / max(dep_rate_mm_min, 1)",0.03,0.25,0.12,Steel MAG
+WELD_TIG,TIG welding,welding,65,45,20,1,"time_min = weld_len_mm / max(dep_rate_mm_min, 1) * k_precision",0.03,0.25,0.12,Stainless TIG
 GRIND,Surface grinding,grinding,80,40,20,1,"time_min = area_mm2 / mrr_mm3_min / depth_mm",0.02,0.25,0.12,Finish grinding
 SAW,Band sawing,cutting,55,30,5,1,"time_min = cut_len_mm / saw_speed_mm_min",0.02,0.20,0.08,Bar/plate cut
 HEAT_TREAT,Heat treatment,heat_treat,0,0,0,1,"time_min = 0; cost = lot_flat_eur + mass_kg * kg_rate_eur",0.00,0.15,0.10,External service
@@ -4,9 +4,28 @@ import pathlib, py_compile, sys
 
 ROOT = pathlib.Path(__file__).resolve().parents[1]
 PAGES = ROOT / "pages"
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
 
-def main() -> int:
+def check_formulas() -> list:
+    """run_time_formula: aantal argumenten bij het laden gecontroleerd, n-aire min/max goed gerekend."""
+    import numpy as np
+    from utils.formula import FormulaError, compile_formula
     errors = []
+    got = compile_formula("t = max(a, b, c); u = min(a, b, c)")({"a": [1, 9], "b": [2, 0], "c": [5, 3]})
+    if not (np.array_equal(got["t"], [5, 9]) and np.array_equal(got["u"], [1, 0])):
+        errors.append(("formula n-ary min/max", got))
+    for src in ["t = max(a)", "t = min()", "t = sqrt(a, 2)", "t = abs()"]:
+        try:
+            compile_formula(src)
+            errors.append((f"formula {src!r}", "niet geweigerd bij het laden"))
+        except FormulaError:
+            pass
+    print(f"[{'ERR' if errors else 'ok'}]  utils.formula")
+    return errors
+
+def main() -> int:
+    errors = check_formulas()
     for p in sorted(PAGES.glob("*.py")):
         try:
             py_compile.compile(str(p), doraise=True)
@@ -0,0 +1,109 @@
+# tools/batch_quote.py
+# Headless batch-offertes: kost een map met bom_current.json-bestanden en/of BOM-CSV's
+# (bom_template.csv-vorm) over een process-pool, zonder Streamlit.
+#
+#   python tools/batch_quote.py rfq_inbox/ --out quotes/ --jobs 8
+#
+# Per BOM komt er <naam>_result.csv in --out, plus summary.csv met één regel per bestand.
+from __future__ import annotations
+import argparse, json, os, pathlib, sys, time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any, Dict, List, Optional
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import pandas as pd
+from utils.io import SCHEMA_MATERIALS, SCHEMA_PROCESSES, SCHEMA_BOM, read_csv_safe
+from utils.costing import price_lines
+from utils.offer import cost_items
+
+# Referentiedata per worker-proces (eenmalig geladen in _init_worker)
+_REF: Dict[str, Optional[pd.DataFrame]] = {}
+
+def _read_optional(path: pathlib.Path, schema: Optional[Dict[str, Any]] = None) -> Optional[pd.DataFrame]:
+    return read_csv_safe(path, schema) if path.exists() else None
+
+def _init_worker(data_dir: str) -> None:
+    d = pathlib.Path(data_dir)
+    _REF.update({
+        "materials": _read_optional(d / "materials_db.csv", SCHEMA_MATERIALS),
+        "processes": _read_optional(d / "processes_db.csv", SCHEMA_PROCESSES),
+        "prices": _read_optional(d / "material_prices.csv"),
+        "rates": _read_optional(d / "labor_rates.csv"),
+    })
+
+def _need(name: str, fname: str) -> pd.DataFrame:
+    df = _REF.get(name)
+    if df is None:
+        raise FileNotFoundError(f"{fname} ontbreekt in de data-map")
+    return df
+
+def cost_json(path: pathlib.Path) -> pd.DataFrame:
+    bom = json.loads(path.read_text(encoding="utf-8") or "{}")
+    rows = cost_items(bom.get("bom", []), _need("prices", "material_prices.csv"), _need("rates", "labor_rates.csv"),
+                      materials=_REF.get("materials"))
+    df = pd.DataFrame(rows, columns=["item_code", "qty", "grade", "family", "mass_kg_per_pc", "eur_per_kg",
+                                     "material_eur_pc", "proc_eur_pc", "total_eur_pc"])
+    df["line_total_eur"] = (df["total_eur_pc"] * df["qty"]).round(2)
+    return df
+
+def cost_csv(path: pathlib.Path) -> pd.DataFrame:
+    bom = read_csv_safe(path, SCHEMA_BOM)
+    df = price_lines(bom, _need("materials", "materials_db.csv"), _need("processes", "processes_db.csv"))
+    df["line_total_eur"] = df["total_cost"]
+    return df
+
+def quote_file(path_str: str, out_dir: str) -> Dict[str, Any]:
+    """Eén BOM kosten en wegschrijven; fouten komen in de summary i.p.v. de batch te breken."""
+    path = pathlib.Path(path_str)
+    t0 = time.perf_counter()
+    row: Dict[str, Any] = {"file": path.name, "kind": path.suffix.lower().lstrip("."),
+                           "lines": 0, "total_eur": 0.0, "result": "", "error": ""}
+    try:
+        df = cost_json(path) if path.suffix.lower() == ".json" else cost_csv(path)
+        out = pathlib.Path(out_dir) / f"{path.stem}_result.csv"
+        df.to_csv(out, index=False)
+        row.update(lines=len(df), total_eur=round(float(df["line_total_eur"].sum()), 2), result=out.name)
+    except Exception as e:
+        row["error"] = f"{type(e).__name__}: {e}"
+    row["seconds"] = round(time.perf_counter() - t0, 4)
+    return row
+
+def find_boms(src: pathlib.Path) -> List[pathlib.Path]:
+    return sorted(p for p in src.iterdir() if p.is_file() and p.suffix.lower() in (".json", ".csv"))
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Kost een map met BOM's (JSON/CSV) parallel, zonder UI.")
+    ap.add_argument("src", help="map met bom_current.json-achtige bestanden en/of BOM-CSV's")
+    ap.add_argument("--out", default="quotes", help="uitvoermap (default: quotes)")
+    ap.add_argument("--data", default="data", help="map met materials_db/processes_db/material_prices/labor_rates")
+    ap.add_argument("--jobs", type=int, default=os.cpu_count() or 1, help="aantal worker-processen")
+    args = ap.parse_args(argv)
+
+    src, out = pathlib.Path(args.src), pathlib.Path(args.out)
+    files = find_boms(src)
+    if not files:
+        print(f"Geen .json/.csv BOM's gevonden in {src}")
+        return 1
+    out.mkdir(parents=True, exist_ok=True)
+
+    t0 = time.perf_counter()
+    jobs = max(1, min(args.jobs, len(files)))
+    chunk = max(1, len(files) // (jobs * 4))
+    with ProcessPoolExecutor(max_workers=jobs, initializer=_init_worker, initargs=(args.data,)) as ex:
+        rows = list(ex.map(quote_file, [str(p) for p in files], [str(out)] * len(files), chunksize=chunk))
+    wall = time.perf_counter() - t0
+
+    summary = pd.DataFrame(rows)
+    summary.to_csv(out / "summary.csv", index=False)
+    failed = summary[summary["error"] != ""]
+    print(f"{len(files)} BOM's in {wall:.2f} s met {jobs} worker(s) ({len(files) / wall:.1f} BOM/s); "
+          f"totaal € {summary['total_eur'].sum():,.2f}; {len(failed)} fout(en) -> {out / 'summary.csv'}")
+    for _, r in failed.iterrows():
+        print(f"[ERR] {r['file']}: {r['error']}")
+    return 1 if len(failed) else 0
+
+if __name__ == "__main__":
+    sys.exit(main())
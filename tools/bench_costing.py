@@ -0,0 +1,59 @@
+# tools/bench_costing.py
+# Doorvoer van de kolomgewijze kostprijs-engine (utils.costing) bij 10k, 100k en 1M BOM-regels,
+# met de oude per-regel DataFrame.apply als referentie (alleen op kleine aantallen).
+from __future__ import annotations
+import argparse, pathlib, sys, time
+import numpy as np
+import pandas as pd
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from utils.costing import cost_bom, part_cost
+
+def make_bom(n: int, seed: int = 0) -> pd.DataFrame:
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({
+        "material_id": rng.choice(["SS_316L", "STEEL_S235", "AL_6082"], n),
+        "qty": rng.integers(1, 50, n),
+        "mass_kg": rng.uniform(0.1, 25.0, n),
+        "price_eur_per_kg": rng.uniform(0.9, 6.5, n),
+        "runtime_h": rng.uniform(0.05, 2.0, n),
+        "machine_rate_eur_h": rng.uniform(55, 135, n),
+        "labor_rate_eur_h": rng.uniform(30, 50, n),
+        "overhead_pct": 0.25,
+        "margin_pct": 0.10,
+    })
+
+def _best(fn, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        t0 = time.perf_counter(); fn(); best = min(best, time.perf_counter() - t0)
+    return best
+
+def bench_apply(bom: pd.DataFrame) -> float:
+    def calc_row(r):
+        qty = float(r.get("qty") or 0.0)
+        return part_cost(float(r["mass_kg"]), float(r["price_eur_per_kg"]),
+                         qty * 0.05, 80.0, qty * 0.10, 45.0)
+    return _best(lambda: bom.apply(calc_row, axis=1), 1)
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark utils.costing")
+    ap.add_argument("--sizes", default="10000,100000,1000000")
+    ap.add_argument("--repeat", type=int, default=3)
+    ap.add_argument("--apply-max", type=int, default=10000, help="per-regel referentie tot dit aantal regels")
+    args = ap.parse_args()
+
+    print(f"{'lines':>10} {'engine s':>10} {'lines/s':>14} {'apply s':>10} {'speedup':>9}")
+    for n in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        bom = make_bom(n)
+        t = _best(lambda: cost_bom(bom), args.repeat)
+        ta = bench_apply(bom) if n <= args.apply_max else None
+        extra = f"{ta:>10.3f} {ta / t:>8.0f}x" if ta is not None else f"{'-':>10} {'-':>9}"
+        print(f"{n:>10,} {t:>10.4f} {n / t:>14,.0f} {extra}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
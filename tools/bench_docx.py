@@ -0,0 +1,92 @@
+# tools/bench_docx.py
+# Tijd en piekgeheugen (tracemalloc) van de DOCX-offerte bij 100, 1k en 10k regels:
+# gestreamde tabellen (utils.docx_stream) tegenover de oude opbouw cel voor cel via python-docx.
+from __future__ import annotations
+import argparse, io, pathlib, sys, time, tracemalloc, zipfile
+import numpy as np
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+from utils.docx_stream import build_offer_docx
+
+INFO = {"client_name": "Acme BV", "client_contact": "J. Janssen", "client_email": "sales@acme.nl",
+        "project_code": "RFQ-BENCH", "assembly": {"name": "Frame", "qty": 1}, "total_excl": 0.0,
+        "total_incl": 0.0, "vat_pct": 21, "lead_weeks": 4}
+
+def make_rows(n: int, seed: int = 0) -> list:
+    rng = np.random.default_rng(seed)
+    procs = ["laser", "bend", "tig", "cnc_mill"]
+    rows = []
+    for i in range(n):
+        det = [{"proc": p, "rate_eur_min": float(rng.uniform(0.8, 1.6)), "minutes": float(rng.uniform(0.5, 12)),
+                "cost_eur": float(rng.uniform(1, 20))} for p in procs[:int(rng.integers(0, 4))]]
+        mat = float(rng.uniform(1, 80)); proc = sum(d["cost_eur"] for d in det)
+        rows.append({"item_code": f"P-{i:05d}", "grade": "1.4404 (316L)", "mass_kg_per_pc": float(rng.uniform(0.1, 25)),
+                     "eur_per_kg": float(rng.uniform(0.9, 6.5)), "material_eur_pc": mat, "proc_eur_pc": proc,
+                     "total_eur_pc": mat + proc, "proc_detail": det})
+    return rows
+
+def legacy_docx(rows: list) -> bytes:
+    """Oude opbouw uit pages/18_Offerte_DOCX.py (alleen de tabellen; de rest is gelijk)."""
+    from docx import Document
+    doc = Document()
+    table = doc.add_table(rows=1, cols=7); table.style = "Light List Accent 1"
+    for c, h in zip(table.rows[0].cells, ["Item", "Grade", "Mass (kg/pc)", "€/kg", "Material €/pc", "Proc €/pc", "Total €/pc"]):
+        c.text = h
+    for r in rows:
+        row = table.add_row().cells
+        row[0].text = str(r["item_code"]); row[1].text = str(r["grade"])
+        row[2].text = f'{r["mass_kg_per_pc"]:.4f}'; row[3].text = f'{r["eur_per_kg"]:.4f}'
+        row[4].text = f'{r["material_eur_pc"]:.2f}'; row[5].text = f'{r["proc_eur_pc"]:.2f}'
+        row[6].text = f'{r["total_eur_pc"]:.2f}'
+    for r in rows:
+        doc.add_heading(r["item_code"], level=3)
+        if not r["proc_detail"]:
+            doc.add_paragraph("No process cost lines."); continue
+        t = doc.add_table(rows=1, cols=4); t.style = "Light Grid"
+        for c, h in zip(t.rows[0].cells, ["Process", "Rate (€/min)", "Minutes", "Cost €/pc"]):
+            c.text = h
+        for d in r["proc_detail"]:
+            rw = t.add_row().cells
+            rw[0].text = str(d["proc"]); rw[1].text = f'{d["rate_eur_min"]:.2f}'
+            rw[2].text = f'{d["minutes"]:.2f}'; rw[3].text = f'{d["cost_eur"]:.2f}'
+    buf = io.BytesIO(); doc.save(buf)
+    return buf.getvalue()
+
+def _measure(fn):
+    """
+    (seconden, piek-MB, resultaat): tijd zonder tracemalloc, piek in een tweede run.
+    tracemalloc ziet alleen Python-allocaties, niet de C-buffers van lxml (python-docx telt dus te laag).
+    """
+    t0 = time.perf_counter()
+    out = fn()
+    t = time.perf_counter() - t0
+    tracemalloc.start()
+    fn()
+    peak = tracemalloc.get_traced_memory()[1] / 2**20
+    tracemalloc.stop()
+    return t, peak, out
+
+def main() -> int:
+    ap = argparse.ArgumentParser(description="Benchmark DOCX-offerte (gestreamd vs python-docx)")
+    ap.add_argument("--sizes", default="100,1000,10000")
+    ap.add_argument("--legacy-max", type=int, default=1000, help="python-docx referentie tot dit aantal regels (10k: minuten)")
+    args = ap.parse_args()
+
+    build_offer_docx(make_rows(1), INFO)  # opwarmen: imports en standaardsjabloon
+    print(f"{'lines':>8} {'stream s':>9} {'stream MB':>10} {'docx KB':>8} {'legacy s':>9} {'legacy MB':>10} {'speedup':>8}")
+    for n in [int(x) for x in args.sizes.split(",") if x.strip()]:
+        rows = make_rows(n)
+        t, mb, out = _measure(lambda: build_offer_docx(rows, INFO).getvalue())
+        zipfile.ZipFile(io.BytesIO(out)).testzip()
+        extra = f"{'-':>9} {'-':>10} {'-':>8}"
+        if n <= args.legacy_max:
+            tl, mbl, _ = _measure(lambda: legacy_docx(rows))
+            extra = f"{tl:>9.2f} {mbl:>10.1f} {tl / t:>7.0f}x"
+        print(f"{n:>8,} {t:>9.3f} {mb:>10.1f} {len(out) / 1024:>8.0f} {extra}")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
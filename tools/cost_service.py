@@ -0,0 +1,208 @@
+# tools/cost_service.py
+# Lokale HTTP-kostprijsservice (alleen stdlib + pandas), als vervanger voor de GitHub-inbox
+# van 10_Webhooks_API. Gelijktijdige requests die binnen een paar ms binnenkomen worden
+# gebundeld tot één gevectoriseerde price_lines-evaluatie (micro-batching).
+#
+#   python tools/cost_service.py --port 8765 --data data --window-ms 5
+#
+#   POST /cost   {"lines": [{"material_id": "SS_316L", "qty": 1, "mass_kg": 2.1,
+#                            "process_route": "CNC_MILL_3AX", "runtime_h": 0.4}, ...]}
+#   GET  /stats  aantallen, batchgrootte en p50/p99-latency (ms)
+#   GET  /health
+from __future__ import annotations
+import argparse, json, pathlib, queue, sys, threading, time
+from collections import deque
+from concurrent.futures import Future
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional, Tuple
+
+ROOT = pathlib.Path(__file__).resolve().parents[1]
+if str(ROOT) not in sys.path:
+    sys.path.insert(0, str(ROOT))
+
+import numpy as np
+import pandas as pd
+from utils.io import SCHEMA_MATERIALS, SCHEMA_PROCESSES, read_csv_safe
+from utils.costing import COST_COLUMNS, price_lines
+
+LINE_COLUMNS = ["material_id", "qty", "mass_kg", "process_route", "runtime_h"]
+TEXT_COLUMNS = ["material_id", "process_route"]
+NUM_COLUMNS = ["qty", "mass_kg", "runtime_h"]
+
+class MicroBatcher:
+    """
+    Verzamelt BOM-frames van gelijktijdige requests gedurende `window_ms` (of tot `max_lines`)
+    en kost ze in één keer. submit() geeft een Future met het eigen deel van het resultaat.
+    """
+
+    def __init__(self, materials: pd.DataFrame, processes: pd.DataFrame,
+                 window_ms: float = 5.0, max_lines: int = 200_000) -> None:
+        self.materials, self.processes = materials, processes
+        self.window = window_ms / 1000.0
+        self.max_lines = max_lines
+        self._q: "queue.Queue[Tuple[pd.DataFrame, Future]]" = queue.Queue()
+        self._lock = threading.Lock()
+        self._latency_ms: deque = deque(maxlen=10_000)
+        self.requests = 0
+        self.batches = 0
+        threading.Thread(target=self._loop, name="micro-batcher", daemon=True).start()
+
+    def submit(self, lines: pd.DataFrame) -> Future:
+        fut: Future = Future()
+        self._q.put((lines, fut))
+        return fut
+
+    def _collect(self) -> List[Tuple[pd.DataFrame, Future]]:
+        batch = [self._q.get()]
+        n = len(batch[0][0])
+        deadline = time.perf_counter() + self.window
+        while n < self.max_lines:
+            left = deadline - time.perf_counter()
+            if left <= 0:
+                break
+            try:
+                item = self._q.get(timeout=left)
+            except queue.Empty:
+                break
+            batch.append(item); n += len(item[0])
+        return batch
+
+    def _loop(self) -> None:
+        while True:
+            batch = self._collect()
+            try:
+                frames = [df.assign(_req=i) for i, (df, _) in enumerate(batch)]
+                res = price_lines(pd.concat(frames, ignore_index=True), self.materials, self.processes)
+                parts = dict(tuple(res.groupby("_req", sort=False)))
+                for i, (df, fut) in enumerate(batch):
+                    part = parts.get(i, res.iloc[0:0])
+                    fut.set_result((part.drop(columns="_req"), len(batch)))
+            except Exception:
+                # één foute request mag de rest van het venster niet laten falen: los herhalen
+                for df, fut in batch:
+                    if fut.done():
+                        continue
+                    try:
+                        fut.set_result((price_lines(df, self.materials, self.processes), 1))
+                    except Exception as e:
+                        fut.set_exception(e)
+            with self._lock:
+                self.batches += 1
+
+    def record(self, ms: float) -> None:
+        with self._lock:
+            self.requests += 1
+            self._latency_ms.append(ms)
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lat = np.asarray(self._latency_ms, dtype="float64")
+            req, bat = self.requests, self.batches
+        out: Dict[str, Any] = {"requests": req, "batches": bat,
+                               "avg_requests_per_batch": round(req / bat, 2) if bat else 0.0}
+        if lat.size:
+            p50, p99 = np.percentile(lat, [50, 99])
+            out.update(p50_ms=round(float(p50), 3), p99_ms=round(float(p99), 3), window=int(lat.size))
+        return out
+
+def parse_lines(payload: Dict[str, Any]) -> pd.DataFrame:
+    lines = payload.get("lines", payload.get("bom"))
+    if not isinstance(lines, list) or not lines:
+        raise ValueError("verwacht {'lines': [ ... ]} met minstens één BOM-regel")
+    df = pd.DataFrame(lines)
+    missing = [c for c in ("material_id", "process_route") if c not in df.columns]
+    if missing:
+        raise ValueError(f"ontbrekende velden: {missing}")
+    for c in LINE_COLUMNS:
+        if c not in df.columns:
+            df[c] = np.nan
+    # per request valideren vóór het in een batch komt (zie MicroBatcher._loop)
+    for c in TEXT_COLUMNS:
+        bad = df.index[df[c].map(lambda v: isinstance(v, (list, dict)))]
+        if len(bad):
+            raise ValueError(f"{c} moet een enkele waarde zijn (regels {list(bad[:10])})")
+        df[c] = df[c].where(df[c].notna(), None).map(lambda v: v if v is None else str(v))
+    for c in NUM_COLUMNS:
+        num = pd.to_numeric(df[c].map(lambda v: np.nan if v is None or v == "" else v), errors="coerce")
+        bad = df.index[num.isna() & df[c].notna() & (df[c] != "")]
+        if len(bad):
+            raise ValueError(f"{c} moet numeriek zijn (regels {list(bad[:10])})")
+        df[c] = num.astype("float64")
+    return df
+
+class CostServer(ThreadingHTTPServer):
+    daemon_threads = True
+    request_queue_size = 256  # bursts van gelijktijdige clients niet weigeren
+
+def make_handler(batcher: MicroBatcher, timeout_s: float = 30.0):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+
+        def _send(self, code: int, body: Dict[str, Any]) -> None:
+            raw = json.dumps(body, default=float).encode("utf-8")
+            self.send_response(code)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def do_GET(self) -> None:
+            if self.path == "/stats":
+                self._send(200, batcher.stats())
+            elif self.path == "/health":
+                self._send(200, {"ok": True})
+            else:
+                self._send(404, {"error": "onbekend pad"})
+
+        def do_POST(self) -> None:
+            t0 = time.perf_counter()
+            if self.path != "/cost":
+                self._send(404, {"error": "onbekend pad"}); return
+            try:
+                n = int(self.headers.get("Content-Length") or 0)
+                df = parse_lines(json.loads(self.rfile.read(n) or b"{}"))
+            except Exception as e:
+                self._send(400, {"error": f"{type(e).__name__}: {e}"}); return
+            try:
+                res, batch_size = batcher.submit(df).result(timeout=timeout_s)
+            except Exception as e:
+                self._send(500, {"error": f"{type(e).__name__}: {e}"}); return
+            out = res[["material_id", "qty", "process_route"] + COST_COLUMNS]
+            body = {
+                "lines": json.loads(out.to_json(orient="records")),
+                "total_eur": round(float(res["total_cost"].sum()), 2),
+                "batched_with": batch_size,
+            }
+            batcher.record((time.perf_counter() - t0) * 1000.0)
+            self._send(200, body)
+
+        def log_message(self, fmt: str, *args: Any) -> None:  # stil; gebruik /stats
+            pass
+
+    return Handler
+
+def main(argv: Optional[List[str]] = None) -> int:
+    ap = argparse.ArgumentParser(description="Lokale kostprijs-API met micro-batching.")
+    ap.add_argument("--host", default="127.0.0.1")
+    ap.add_argument("--port", type=int, default=8765)
+    ap.add_argument("--data", default="data", help="map met materials_db.csv en processes_db.csv")
+    ap.add_argument("--window-ms", type=float, default=5.0, help="bundelvenster in milliseconden")
+    args = ap.parse_args(argv)
+
+    d = pathlib.Path(args.data)
+    materials = read_csv_safe(d / "materials_db.csv", SCHEMA_MATERIALS)
+    processes = read_csv_safe(d / "processes_db.csv", SCHEMA_PROCESSES)
+    batcher = MicroBatcher(materials, processes, window_ms=args.window_ms)
+    srv = CostServer((args.host, args.port), make_handler(batcher))
+    print(f"Cost service op http://{args.host}:{args.port}  (POST /cost, GET /stats)")
+    try:
+        srv.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        srv.server_close()
+        print(json.dumps(batcher.stats()))
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
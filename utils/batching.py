@@ -0,0 +1,86 @@
+# utils/batching.py
+# Economische batchgrootte per routingstap: omstelkosten per stuk (ceil(Q*qty/B) setups)
+# tegenover opslag van onderhanden werk (stuks wachten tot hun batch klaar is + Queue_days).
+# Alle kandidaat-batchgroottes van alle stappen worden in één (stappen x kandidaten)-matrix gerekend.
+from __future__ import annotations
+from typing import Mapping, Optional
+import numpy as np
+import pandas as pd
+
+from .routing import LABOR, _col, routing_arrays
+from .validators import ROUTING_SCHEMA
+
+def candidates(units: int, max_batch: Optional[int] = None) -> np.ndarray:
+    """
+    Alle zinvolle batchgroottes voor `units` stuks: voor elk aantal batches n is ceil(units/n)
+    de kleinste batch (minste opslag). Dat zijn hooguit ~2*sqrt(units) waarden.
+    """
+    units = max(int(units), 1)
+    n = np.arange(1, int(np.ceil(np.sqrt(units))) + 1)
+    B = np.unique(np.concatenate([-(-units // n), n]))
+    B = B[B <= units]
+    if max_batch:
+        B = np.unique(np.minimum(B, max(int(max_batch), 1)))
+    return B
+
+def step_batch_costs(B: np.ndarray, units: np.ndarray, Q: float, setup_eur: np.ndarray, cycle_min: np.ndarray,
+                     setup_min: np.ndarray, queue_days: np.ndarray, storage_cost: float,
+                     day_min: float) -> dict:
+    """
+    Kosten per stuk (eindproduct) per stap voor batchgrootte B (mag (stappen, kandidaten) zijn):
+    setup = setup_eur x ceil(units/B) / Q, opslag = storage_cost x (batchdoorlooptijd + Queue_days).
+    """
+    u, se, cyc, smin, qd = (np.asarray(a, dtype="float64")[:, None] for a in
+                            (units, setup_eur, cycle_min, setup_min, queue_days))
+    setup = se * np.ceil(u / B) / Q
+    hold = storage_cost * ((smin + B * cyc) / day_min + qd)
+    return {"setup": setup, "hold": hold, "total": setup + hold}
+
+def optimize_batches(routing: pd.DataFrame, Q: float, storage_cost: float, labor: float = LABOR,
+                     mrates: Optional[Mapping[str, float]] = None, hours_day: float = 8.0,
+                     max_batch: Optional[int] = None) -> pd.DataFrame:
+    """
+    Kostenminimaliserende Batch_size per stap, naast de huidige. storage_cost = €/stuk/dag
+    (zelfde invoer als de lean-kosten). Omstellen telt machine + arbeid, gedeeld door (1 - scrap)
+    zoals in step_costs.
+    """
+    r = pd.DataFrame(routing)
+    d = ROUTING_SCHEMA.defaults or {}
+    Q = max(float(Q or 1), 1.0)
+    st = routing_arrays(r, Q, labor, mrates)
+    units = np.maximum(np.ceil(Q * st["qty"]), 1.0)
+    setup_min = _col(r, "Setup_min", d["Setup_min"])
+    setup_eur = setup_min / 60.0 * (st["mrate"] + st["labor"]) / (1.0 - st["scrap"])
+    queue = np.maximum(_col(r, "Queue_days", d["Queue_days"]), 0.0)
+    now = np.clip(_col(r, "Batch_size", d["Batch_size"]), 1.0, units)
+    args = (units, Q, setup_eur, st["cycle_min"], setup_min, queue, float(storage_cost), 60.0 * float(hours_day))
+
+    cands = [candidates(u, max_batch) for u in units]
+    width = max((len(c) for c in cands), default=0)
+    B = np.full((len(cands), max(width, 1)), np.nan)
+    for i, c in enumerate(cands):
+        B[i, :len(c)] = c
+    cost = step_batch_costs(B, *args)
+    total = np.where(np.isnan(B), np.inf, cost["total"])
+    best = total.argmin(axis=1) if len(B) else np.zeros(0, dtype=int)
+    pick = lambda a: np.take_along_axis(a, best[:, None], axis=1)[:, 0]
+    B_opt = pick(B)
+    cur = step_batch_costs(now[:, None], *args)
+
+    out = pd.DataFrame({
+        "Step": r["Step"].to_numpy() if "Step" in r.columns else np.arange(1, len(r) + 1),
+        "Proces": r["Proces"].astype(str).to_numpy() if "Proces" in r.columns else "",
+        "Units": units.astype(np.int64),
+        "Batch_now": now.astype(np.int64), "Cost_now_pc": cur["total"][:, 0],
+        "Batch_opt": B_opt.astype(np.int64), "Batches_opt": np.ceil(units / B_opt).astype(np.int64),
+        "Setup_pc": pick(cost["setup"]), "Hold_pc": pick(cost["hold"]), "Cost_opt_pc": pick(cost["total"]),
+    })
+    out["Saving_pc"] = out["Cost_now_pc"] - out["Cost_opt_pc"]
+    out.attrs["candidates"] = int(sum(len(c) for c in cands))
+    return out
+
+def apply_batches(routing: pd.DataFrame, plan: pd.DataFrame) -> pd.DataFrame:
+    """Routing met Batch_size uit het optimalisatieplan (zelfde rijvolgorde)."""
+    r = pd.DataFrame(routing).copy()
+    r["Batch_size"] = plan["Batch_opt"].to_numpy()
+    return r
@@ -0,0 +1,110 @@
+# utils/bom_tree.py
+# Multi-level BOM-explosie op basis van de kolommen item_no/parent (zie bom_template.csv).
+# De structuur mag een DAG zijn: een subassembly die onder meerdere parents hangt,
+# wordt één keer gekost en daarna per parent met de juiste hoeveelheid meegeteld.
+from __future__ import annotations
+from typing import Tuple
+import numpy as np
+import pandas as pd
+
+ROOT_ID = "ROOT"
+
+def _csr(keys: np.ndarray, n: int) -> Tuple[np.ndarray, np.ndarray]:
+    """Index (eenmalig) van node -> edges: edges van node i staan in order[indptr[i]:indptr[i+1]]."""
+    order = np.argsort(keys, kind="stable")
+    indptr = np.zeros(n + 1, dtype=np.int64)
+    np.cumsum(np.bincount(keys, minlength=n), out=indptr[1:])
+    return order, indptr
+
+def _edges_of(nodes: np.ndarray, order: np.ndarray, indptr: np.ndarray) -> np.ndarray:
+    # alle edge-indices van een set nodes, zonder Python-loop
+    starts = indptr[nodes]
+    counts = indptr[nodes + 1] - starts
+    total = int(counts.sum())
+    if total == 0:
+        return np.empty(0, dtype=np.int64)
+    offsets = np.repeat(starts - np.concatenate(([0], np.cumsum(counts)[:-1])), counts)
+    return order[np.arange(total) + offsets]
+
+def explode_bom(bom: pd.DataFrame, cost_col: str = "total_cost", qty_col: str = "qty",
+                root: str = ROOT_ID) -> pd.DataFrame:
+    """
+    Explodeert een BOM met item_no/parent tot één regel per unieke node.
+
+    - own_cost:     eigen kosten per stuk (eerste regel van het item in `cost_col`, 0 als die ontbreekt)
+    - rolled_cost:  kosten per stuk inclusief alle onderliggende niveaus (memoized per node)
+    - total_qty:    benodigd aantal per 1 ROOT (som over alle paden)
+    - extended_cost = total_qty * own_cost; de som hiervan is rolled_cost van ROOT
+    - level:        langste pad vanaf ROOT (ROOT = 0)
+
+    De ROOT-regel staat bovenaan; rolled_cost daarvan is het totaal van de assembly.
+    Raises ValueError bij ontbrekende kolommen of een cyclus.
+    """
+    missing = [c for c in ("item_no", "parent") if c not in bom.columns]
+    if missing:
+        raise ValueError(f"BOM mist kolommen voor explosie: {missing}")
+
+    child = bom["item_no"].astype("string").str.strip().fillna("").to_numpy(dtype=object)
+    parent = bom["parent"].astype("string").str.strip().fillna("").to_numpy(dtype=object)
+    parent[parent == ""] = root
+    qty = (pd.to_numeric(bom[qty_col], errors="coerce").fillna(1.0).to_numpy(dtype="float64")
+           if qty_col in bom.columns else np.ones(len(bom)))
+    cost = (pd.to_numeric(bom[cost_col], errors="coerce").fillna(0.0).to_numpy(dtype="float64")
+            if cost_col in bom.columns else np.zeros(len(bom)))
+
+    codes, ids = pd.factorize(np.concatenate(([root], child, parent)))
+    n, e = len(ids), len(bom)
+    child_c, parent_c = codes[1:e + 1], codes[e + 1:]
+
+    own = np.zeros(n)
+    _, first = np.unique(child_c, return_index=True)
+    own[child_c[first]] = cost[first]
+
+    # Bottom-up: een node is klaar zodra al zijn kinderen klaar zijn
+    by_child = _csr(child_c, n)
+    pending = np.bincount(parent_c, minlength=n)
+    acc = np.zeros(n)
+    rolled = np.zeros(n)
+    frontier = np.flatnonzero(pending == 0)
+    done = 0
+    while frontier.size:
+        rolled[frontier] = own[frontier] + acc[frontier]
+        done += frontier.size
+        ed = _edges_of(frontier, *by_child)
+        if ed.size == 0:
+            break
+        p = parent_c[ed]
+        acc += np.bincount(p, weights=qty[ed] * rolled[child_c[ed]], minlength=n)
+        pending -= np.bincount(p, minlength=n)
+        cand = np.unique(p)
+        frontier = cand[pending[cand] == 0]
+    if done < n:
+        raise ValueError("Cyclus in BOM-structuur (item_no/parent)")
+
+    # Top-down: hoeveelheden per ROOT en niveau
+    by_parent = _csr(parent_c, n)
+    waiting = np.bincount(child_c, minlength=n)
+    total_qty = np.zeros(n); total_qty[0] = 1.0
+    level = np.zeros(n, dtype=np.int64)
+    frontier = np.flatnonzero(waiting == 0)
+    while frontier.size:
+        ed = _edges_of(frontier, *by_parent)
+        if ed.size == 0:
+            break
+        c, p = child_c[ed], parent_c[ed]
+        total_qty += np.bincount(c, weights=total_qty[p] * qty[ed], minlength=n)
+        np.maximum.at(level, c, level[p] + 1)
+        waiting -= np.bincount(c, minlength=n)
+        cand = np.unique(c)
+        frontier = cand[waiting[cand] == 0]
+
+    out = pd.DataFrame({
+        "item_no": ids.astype(str),
+        "level": level,
+        "n_parents": np.bincount(child_c, minlength=n),
+        "own_cost": own,
+        "rolled_cost": rolled,
+        "total_qty": total_qty,
+    })
+    out["extended_cost"] = out["total_qty"] * out["own_cost"]
+    return out
@@ -0,0 +1,111 @@
+# utils/capacity.py
+# Capaciteitsbelasting over veel offertes/orders tegelijk: elke (order, routingstap) wordt
+# een rij met uren, proces-code en week; np.bincount telt alles op tot een proces x week-matrix.
+# capacity_table() is de enkel-order-variant die 05_DataQuality / 12_Rapport gebruiken.
+from __future__ import annotations
+from typing import Any, Dict, Mapping, Optional
+import numpy as np
+import pandas as pd
+
+from .routing import _col
+from .validators import ROUTING_SCHEMA
+
+DAYS_PER_WEEK = 5
+
+def _num(df: pd.DataFrame, col: str) -> np.ndarray:
+    return _col(df, col, float((ROUTING_SCHEMA.defaults or {}).get(col, 0.0)))
+
+def expand_orders(orders: pd.DataFrame, routings: pd.DataFrame, key: str = "routing_id") -> pd.DataFrame:
+    """
+    orders (order_id, routing_id, Q, week) x routings (routing_id + routingkolommen, lange vorm)
+    -> één rij per (order, stap), zonder merge: CSR-offsets per routing + np.repeat.
+    Zonder key-kolom in routings geldt die ene routing voor alle orders.
+    """
+    if key not in routings.columns:
+        routings, orders = routings.assign(**{key: 0}), orders.assign(**{key: 0})
+    r = routings.sort_values([key, "Step"] if "Step" in routings.columns else [key], kind="stable")
+    r_codes, r_ids = pd.factorize(r[key])
+    counts = np.bincount(r_codes, minlength=len(r_ids))
+    starts = np.cumsum(counts) - counts
+    o_codes = pd.Index(r_ids).get_indexer(orders[key])
+    n = np.where(o_codes >= 0, counts[np.maximum(o_codes, 0)], 0)
+    order_row = np.repeat(np.arange(len(orders)), n)
+    within = np.arange(len(order_row)) - np.repeat(np.cumsum(n) - n, n)
+    step_row = starts[o_codes[order_row]] + within
+    out = r.iloc[step_row].reset_index(drop=True)
+    o = orders.iloc[order_row].reset_index(drop=True)
+    for c in orders.columns:
+        if c != key:
+            out[c] = o[c].to_numpy()
+    out["seq"] = within
+    return out
+
+def load_matrix(order_steps: pd.DataFrame, order_col: str = "order_id", week_col: str = "week",
+                qty_col: str = "Q") -> Dict[str, Any]:
+    """
+    Uren per proces per week. Per stap: ceil(Q*Qty_per_parent/Batch_size) omstellingen + cyclustijd.
+    Queue_days schuift volgende stappen van dezelfde order op (cumulatief, in werkdagen).
+    Geeft {"load": (processen x weken) uren, "processes", "weeks", "machines"}.
+    """
+    s = order_steps
+    Q = _num(s, qty_col) if qty_col in s.columns else np.ones(len(s))
+    qty = _num(s, "Qty_per_parent")
+    batches = np.ceil(Q * qty / np.maximum(_num(s, "Batch_size"), 1.0))
+    hours = (_num(s, "Setup_min") * batches + _num(s, "Cycle_min") * Q * qty) / 60.0
+
+    week0 = _num(s, week_col) if week_col in s.columns else np.zeros(len(s))
+    queue = np.maximum(_num(s, "Queue_days"), 0.0)
+    if order_col in s.columns and len(s):
+        # wachttijd van eerdere stappen binnen de order: groeps-cumsum zonder loop
+        oc = pd.factorize(s[order_col])[0]
+        order = np.argsort(oc, kind="stable")
+        q_sorted = queue[order]
+        cs = np.cumsum(q_sorted)
+        first = np.r_[True, oc[order][1:] != oc[order][:-1]]
+        base = np.maximum.accumulate(np.where(first, cs - q_sorted, 0.0))
+        shift = np.empty(len(s)); shift[order] = cs - q_sorted - base
+    else:
+        shift = np.zeros(len(s))
+    week = np.floor(week0 + shift / DAYS_PER_WEEK).astype(np.int64)
+
+    p_codes, procs = pd.factorize(s["Proces"].astype(str) if "Proces" in s.columns else pd.Series([""] * len(s)))
+    w_min = int(week.min()) if len(week) else 0
+    weeks = np.arange(w_min, (int(week.max()) if len(week) else 0) + 1)
+    flat = p_codes * len(weeks) + (week - w_min)
+    load = np.bincount(flat, weights=hours, minlength=len(procs) * len(weeks)).reshape(len(procs), len(weeks))
+    machines = np.zeros(len(procs))
+    np.maximum.at(machines, p_codes, np.maximum(_num(s, "Parallel_machines"), 1.0))
+    return {"load": load, "processes": list(map(str, procs)), "weeks": weeks, "machines": machines}
+
+def available_hours(lm: Mapping[str, Any], hours_day: float = 8.0,
+                    cap_proc: Optional[Mapping[str, float]] = None, days: int = DAYS_PER_WEEK) -> np.ndarray:
+    """Beschikbare uren per proces per week: h/dag (cap_proc, anders hours_day) x machines x werkdagen."""
+    cap_h = np.array([float((cap_proc or {}).get(p, hours_day)) for p in lm["processes"]], dtype="float64")
+    return cap_h * lm["machines"] * days
+
+def utilization(lm: Mapping[str, Any], hours_day: float = 8.0,
+                cap_proc: Optional[Mapping[str, float]] = None, days: int = DAYS_PER_WEEK) -> pd.DataFrame:
+    """Benutting (1.0 = vol) per proces x week."""
+    avail = available_hours(lm, hours_day, cap_proc, days)
+    util = np.divide(lm["load"], avail[:, None], out=np.full(lm["load"].shape, np.inf), where=avail[:, None] > 0)
+    return pd.DataFrame(util, index=pd.Index(lm["processes"], name="Proces"),
+                        columns=pd.Index(lm["weeks"], name="Week"))
+
+def capacity_table(routing: Any, Q: float, hours_day: float = 8.0,
+                   cap_proc: Optional[Mapping[str, float]] = None, days: int = DAYS_PER_WEEK) -> pd.DataFrame:
+    """Eén routing, één Q: uren, beschikbare uren (één week) en Util_pct per proces."""
+    r = pd.DataFrame(routing)
+    if r.empty or "Proces" not in r.columns:
+        return pd.DataFrame(columns=["Proces", "Load_h", "Machines", "Cap_h", "Util_pct"])
+    lm = load_matrix(r.assign(Q=max(float(Q or 1), 1.0), week=0))
+    avail = available_hours(lm, hours_day, cap_proc, days)
+    load = lm["load"].sum(axis=1)
+    return pd.DataFrame({"Proces": lm["processes"], "Load_h": load, "Machines": lm["machines"], "Cap_h": avail,
+                         "Util_pct": np.divide(load, avail, out=np.full(len(load), np.inf), where=avail > 0)})
+
+def utilization_heatmap(util: pd.DataFrame, title: str = "Benutting per proces x week"):
+    """Plotly-heatmap (rood > 100%); plotly is alleen nodig als je hem aanroept."""
+    import plotly.express as px
+    return px.imshow(util.replace(np.inf, np.nan).to_numpy() * 100.0, x=[str(w) for w in util.columns],
+                     y=list(util.index), color_continuous_scale="RdYlGn_r", zmin=0, zmax=150, aspect="auto",
+                     labels={"x": "Week", "y": "Proces", "color": "Benutting %"}, title=title)
@@ -0,0 +1,79 @@
+# utils/costgraph.py
+# Kleine afhankelijkheidsgraaf voor incrementeel herrekenen: elke input markeert alleen
+# de afgeleide nodes die ervan afhangen als "dirty"; de rest komt uit de cache.
+# Bedoeld om per sessie in st.session_state te bewaren zodat reruns goedkoop blijven.
+from __future__ import annotations
+from typing import Any, Callable, Dict, List, Sequence, Set
+
+_MISSING = object()
+_SCALARS = (int, float, complex, str, bytes, bool, type(None), tuple, frozenset)
+
+class CostGraph:
+    """
+    Inputs zet je met set(); afgeleide nodes declareer je met node(name, fn, deps).
+    get(name) rekent een node alleen opnieuw uit als één van zijn (indirecte) inputs wijzigde.
+    """
+
+    def __init__(self) -> None:
+        self._fns: Dict[str, Callable[..., Any]] = {}
+        self._deps: Dict[str, List[str]] = {}
+        self._down: Dict[str, Set[str]] = {}
+        self._values: Dict[str, Any] = {}
+        self._keys: Dict[str, Any] = {}
+        self._dirty: Set[str] = set()
+        self.recomputed: List[str] = []  # nodes die sinds reset_stats() zijn herberekend
+
+    # --- opbouw ---
+    def node(self, name: str, fn: Callable[..., Any], deps: Sequence[str]) -> "CostGraph":
+        self._fns[name] = fn
+        self._deps[name] = list(deps)
+        for d in deps:
+            self._down.setdefault(d, set()).add(name)
+        self._dirty.add(name)
+        return self
+
+    # --- inputs ---
+    def changed(self, name: str, key: Any) -> bool:
+        """True als `key` afwijkt van de key waarmee input `name` het laatst gezet is."""
+        old = self._keys.get(name, _MISSING)
+        if old is _MISSING:
+            return True
+        if isinstance(key, _SCALARS) and isinstance(old, _SCALARS):
+            return bool(old != key)
+        return old is not key
+
+    def set(self, name: str, value: Any, key: Any = _MISSING) -> bool:
+        """
+        Zet een input. Zonder key vergelijken we scalars op waarde en overige objecten
+        (DataFrames, arrays) op identiteit. Geeft True terug als er iets gewijzigd is.
+        """
+        if key is _MISSING:
+            key = value
+        if name in self._values and not self.changed(name, key):
+            return False
+        self._values[name] = value
+        self._keys[name] = key
+        self._invalidate(name)
+        return True
+
+    def _invalidate(self, name: str) -> None:
+        stack = list(self._down.get(name, ()))
+        while stack:
+            n = stack.pop()
+            if n not in self._dirty:
+                self._dirty.add(n)
+                stack.extend(self._down.get(n, ()))
+
+    # --- evaluatie ---
+    def get(self, name: str) -> Any:
+        if name in self._fns and name in self._dirty:
+            args = [self.get(d) for d in self._deps[name]]
+            self._values[name] = self._fns[name](*args)
+            self._dirty.discard(name)
+            self.recomputed.append(name)
+        if name not in self._values:
+            raise KeyError(f"Input '{name}' is nog niet gezet")
+        return self._values[name]
+
+    def reset_stats(self) -> None:
+        self.recomputed = []
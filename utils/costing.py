@@ -0,0 +1,230 @@
+# utils/costing.py
+# Kolomgewijze kostprijs-engine: rekent een complete BOM in één keer door
+# op NumPy-arrays i.p.v. per regel via DataFrame.apply.
+from __future__ import annotations
+from typing import Dict, Any, Optional
+import numpy as np
+import pandas as pd
+
+from .costgraph import CostGraph
+from .io import material_index, process_index
+
+# Volgorde van de uitvoerkolommen van cost_bom()
+COST_COLUMNS = [
+    "material_cost", "machine_cost", "labor_cost", "process_cost",
+    "overhead", "base_cost", "margin", "total_cost",
+]
+
+ArrayLike = Any  # scalar, np.ndarray of pd.Series
+
+def _num(x: ArrayLike) -> np.ndarray | float:
+    """Naar float64 met NaN/None -> 0.0 (scalars blijven scalar)."""
+    if isinstance(x, pd.Series):
+        x = pd.to_numeric(x, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    arr = np.asarray(x, dtype="float64")
+    arr = np.nan_to_num(arr, nan=0.0, posinf=0.0, neginf=0.0)
+    return float(arr) if arr.ndim == 0 else arr
+
+def part_cost(material_kg, price_eur_per_kg, process_time_h, machine_rate_eur_h, labor_time_h, labor_rate_eur_h):
+    """Kostprijs = materiaal + machine + arbeid. Werkt op scalars én op hele kolommen."""
+    return (_num(material_kg) * _num(price_eur_per_kg)
+            + _num(process_time_h) * _num(machine_rate_eur_h)
+            + _num(labor_time_h) * _num(labor_rate_eur_h))
+
+def cost_arrays(
+    mass_kg: ArrayLike,
+    price_eur_per_kg: ArrayLike,
+    machine_h: ArrayLike,
+    machine_rate_eur_h: ArrayLike,
+    labor_h: ArrayLike,
+    labor_rate_eur_h: ArrayLike,
+    overhead_pct: ArrayLike = 0.0,
+    margin_pct: ArrayLike = 0.0,
+) -> Dict[str, np.ndarray]:
+    """
+    Rekent materiaal, machine, arbeid, overhead en marge in één pass over arrays.
+    Alle argumenten mogen scalar of array zijn (broadcasting); ontbrekende waarden tellen als 0.
+    """
+    material = _num(mass_kg) * _num(price_eur_per_kg)
+    machine = _num(machine_h) * _num(machine_rate_eur_h)
+    labor = _num(labor_h) * _num(labor_rate_eur_h)
+    process = machine + labor
+    overhead = (material + process) * _num(overhead_pct)
+    base = material + process + overhead
+    margin = base * _num(margin_pct)
+    total = base + margin
+    shape = np.broadcast(material, process, overhead, margin).shape
+    out = {
+        "material_cost": material, "machine_cost": machine, "labor_cost": labor,
+        "process_cost": process, "overhead": overhead, "base_cost": base,
+        "margin": margin, "total_cost": total,
+    }
+    return {k: _full(v, shape) for k, v in out.items()}
+
+def _full(v: ArrayLike, shape: tuple) -> np.ndarray:
+    # scalars/kortere arrays uitrollen naar de volle (schrijfbare) vorm
+    v = np.asarray(v, dtype="float64")
+    return v if v.shape == shape else np.array(np.broadcast_to(v, shape))
+
+def _pick(df: pd.DataFrame, value: Optional[ArrayLike], col: str, default: float = 0.0) -> ArrayLike:
+    # None -> kolom uit df (of default als die ontbreekt); anders de meegegeven waarde
+    if value is not None:
+        return value
+    if col in df.columns:
+        return df[col]
+    return default
+
+def cost_bom(
+    df: pd.DataFrame,
+    machine_h: Optional[ArrayLike] = None,
+    labor_h: Optional[ArrayLike] = None,
+    machine_rate_eur_h: Optional[ArrayLike] = None,
+    labor_rate_eur_h: Optional[ArrayLike] = None,
+    overhead_pct: Optional[ArrayLike] = None,
+    margin_pct: Optional[ArrayLike] = None,
+) -> pd.DataFrame:
+    """
+    Kostprijs per BOM-regel voor een (gemergde) BOM. Argumenten die None zijn komen
+    uit de gelijknamige kolom (uren uit `runtime_h`); geef een scalar of array mee om te overschrijven.
+    Geeft een kopie van df terug met de kolommen uit COST_COLUMNS erbij.
+    """
+    res = cost_arrays(
+        _pick(df, None, "mass_kg"),
+        _pick(df, None, "price_eur_per_kg"),
+        _pick(df, machine_h, "runtime_h"),
+        _pick(df, machine_rate_eur_h, "machine_rate_eur_h"),
+        _pick(df, labor_h, "runtime_h"),
+        _pick(df, labor_rate_eur_h, "labor_rate_eur_h"),
+        _pick(df, overhead_pct, "overhead_pct"),
+        _pick(df, margin_pct, "margin_pct"),
+    )
+    out = df.copy()
+    for col in COST_COLUMNS:
+        out[col] = _full(res[col], (len(df),))
+    return out
+
+MATERIAL_FIELDS = ["price_eur_per_kg"]
+PROCESS_FIELDS = ["machine_rate_eur_h", "labor_rate_eur_h", "overhead_pct", "margin_pct"]
+
+def attach_prices(bom: pd.DataFrame, materials: pd.DataFrame) -> pd.DataFrame:
+    """Kopie van de BOM met price_eur_per_kg via de gecompileerde materiaal-index (geen merge)."""
+    idx = material_index(materials)
+    codes = idx.codes(bom["material_id"])
+    return bom.assign(**{c: idx.take(c, codes) for c in MATERIAL_FIELDS})
+
+ROUTE_SEP = ";"
+
+def explode_routes(routes: ArrayLike, sep: str = ROUTE_SEP) -> Dict[str, Any]:
+    """
+    Splitst routes als "LASER_SHEET;BEND;CNC_MILL_3AX" in één rij per bewerking.
+    Alleen de unieke routes worden in Python gesplitst; het uitrollen naar regels gaat met
+    np.repeat (CSR-offsets), dus lineair in het aantal bewerkingen.
+    Geeft: line (regelnummer), seq (stapnummer), step (index in `steps`), steps (unieke stap-namen
+    per route achter elkaar) en n_ops (aantal stappen per regel).
+    """
+    codes, uniques = pd.factorize(pd.Series(routes, copy=False))
+    split = [[t.strip() for t in str(r).split(sep) if t.strip()] for r in uniques]
+    n_u = np.fromiter((len(x) for x in split), dtype=np.int64, count=len(split))
+    start_u = np.cumsum(n_u) - n_u
+    n_ops = np.zeros(len(codes), dtype=np.int64)
+    ok = codes >= 0
+    n_ops[ok] = n_u[codes[ok]]
+    line = np.repeat(np.arange(len(codes), dtype=np.int64), n_ops)
+    seq = np.arange(len(line), dtype=np.int64) - np.repeat(np.cumsum(n_ops) - n_ops, n_ops)
+    step = start_u[codes[line]] + seq
+    return {"line": line, "seq": seq, "step": step, "n_ops": n_ops,
+            "steps": [t for x in split for t in x]}
+
+def route_operations(bom: pd.DataFrame, processes: pd.DataFrame, sep: str = ROUTE_SEP) -> pd.DataFrame:
+    """
+    Eén rij per (BOM-regel, bewerking) met de processes_db-waarden erbij, in kosten per stuk
+    (zoals materiaal: mass_kg x prijs). runtime_h van de regel wordt gelijk over de stappen verdeeld;
+    setup_min is per batch (setup_h) en wordt over de regel-qty verdeeld (setup_h_pc, qty minimaal 1).
+    """
+    ex = explode_routes(bom["process_route"], sep)
+    pidx = process_index(processes)
+    step_rows = pidx.codes(pd.Series(ex["steps"], dtype="object"))
+    rows = step_rows[ex["step"]]
+    name_codes, names = pd.factorize(pd.Series(ex["steps"], dtype="object"))
+    line = ex["line"]
+    n = np.maximum(ex["n_ops"], 1)
+    ones = np.ones(len(bom))
+    run_h = (_num(_pick(bom, None, "runtime_h")) * ones / n)[line]
+    qty = np.maximum(_num(_pick(bom, None, "qty", 1.0)) * ones, 1.0)[line]
+    setup_h = _num(pidx.take("setup_min", rows)) / 60.0
+    mrate = _num(pidx.take("machine_rate_eur_h", rows))
+    lrate = _num(pidx.take("labor_rate_eur_h", rows))
+    return pd.DataFrame({
+        "line": line,
+        "seq": ex["seq"] + 1,
+        "process_id": pd.Categorical.from_codes(name_codes[ex["step"]], categories=names),
+        "known": rows >= 0,
+        "run_h": run_h,
+        "setup_h": setup_h,
+        "setup_h_pc": setup_h / qty,
+        "machine_run_cost": run_h * mrate,
+        "labor_run_cost": run_h * lrate,
+        "machine_setup_cost": setup_h / qty * mrate,
+        "labor_setup_cost": setup_h / qty * lrate,
+        "scrap_pct": _num(pidx.take("scrap_pct", rows)),
+        "overhead_pct": _num(pidx.take("overhead_pct", rows)),
+        "margin_pct": _num(pidx.take("margin_pct", rows)),
+    })
+
+def price_lines(bom: pd.DataFrame, materials: pd.DataFrame, processes: pd.DataFrame) -> pd.DataFrame:
+    """
+    BOM (bom_template.csv-vorm) koppelen aan materials_db/processes_db en per regel kosten (per stuk).
+    Meerstaps-routes worden per bewerking gekost (route_operations) en per regel opgeteld:
+    - machine/arbeid = som over de stappen; de looptijd wordt gedeeld door de route-opbrengst
+      (uitval = product van de stap-opbrengsten, werkt ook door op materiaal), de per qty verdeelde
+      omsteltijd niet: één setup per batch, ongeacht uitval;
+    - overhead/marge = gemiddelde over de stappen, gewogen naar de bewerkingskosten van de stap
+      (een dure freesstap telt zwaarder dan een korte ontbraamstap); zonder kosten ongewogen.
+    """
+    df = attach_prices(bom, materials)
+    ops = route_operations(bom, processes)
+    n, line = len(bom), ops["line"].to_numpy()
+    n_ops = np.bincount(line, minlength=n)
+    per = lambda w: np.bincount(line, weights=np.asarray(w, dtype="float64"), minlength=n)
+    log_yield = per(np.log1p(-np.clip(ops["scrap_pct"].to_numpy(), 0.0, 0.99)))
+    scrap_factor = np.exp(-log_yield)  # 1 / product(1 - scrap) over de route
+    op_cost = ops[["machine_run_cost", "labor_run_cost", "machine_setup_cost", "labor_setup_cost"]].sum(axis=1).to_numpy()
+    w = per(op_cost)
+    weighted = lambda c: np.where(w > 0, np.divide(per(op_cost * ops[c].to_numpy()), w, out=np.zeros(n), where=w > 0),
+                                  np.divide(per(ops[c].to_numpy()), n_ops, out=np.zeros(n), where=n_ops > 0))
+
+    df["n_ops"] = n_ops
+    df["unknown_ops"] = n_ops - per(ops["known"].to_numpy(dtype="float64")).astype(np.int64)
+    df["setup_h"] = per(ops["setup_h"])
+    df["setup_h_pc"] = per(ops["setup_h_pc"])
+    df["scrap_factor"] = scrap_factor
+    machine = per(ops["machine_run_cost"]) * scrap_factor + per(ops["machine_setup_cost"])
+    labor = per(ops["labor_run_cost"]) * scrap_factor + per(ops["labor_setup_cost"])
+    # tarieven verschillen per stap: machine/arbeid gaan als bedrag (uren = 1) de engine in
+    res = cost_arrays(
+        _num(_pick(df, None, "mass_kg")) * scrap_factor, _pick(df, None, "price_eur_per_kg"),
+        1.0, machine, 1.0, labor, weighted("overhead_pct"), weighted("margin_pct"),
+    )
+    for col in COST_COLUMNS:
+        df[col] = _full(res[col], (n,))
+    return df
+
+# --- Incrementeel herrekenen (Calculatie-aannames) ---
+def line_cost_graph() -> CostGraph:
+    """
+    Afhankelijkheidsgraaf voor de kostprijs per BOM-regel met tijden per stuk als aanname.
+    Inputs: bom, materials, labor_h_per_qty, machine_h_per_qty, labor_rate_eur_h, machine_rate_eur_h.
+    Een gewijzigde arbeidsrate herrekent alleen labor_cost en wat daarvan afhangt;
+    merge en materiaalkosten komen dan uit de cache.
+    """
+    g = CostGraph()
+    g.node("view", attach_prices, ["bom", "materials"])
+    g.node("qty", lambda v: _num(_pick(v, None, "qty")), ["view"])
+    g.node("material_cost", lambda v: _num(_pick(v, None, "mass_kg")) * _num(_pick(v, None, "price_eur_per_kg")), ["view"])
+    g.node("labor_h", lambda q, t: q * _num(t), ["qty", "labor_h_per_qty"])
+    g.node("machine_h", lambda q, t: q * _num(t), ["qty", "machine_h_per_qty"])
+    g.node("labor_cost", lambda h, r: h * _num(r), ["labor_h", "labor_rate_eur_h"])
+    g.node("machine_cost", lambda h, r: h * _num(r), ["machine_h", "machine_rate_eur_h"])
+    g.node("total_cost", lambda m, a, b: m + a + b, ["material_cost", "machine_cost", "labor_cost"])
+    g.node("result", lambda v, t: v.assign(part_cost_eur=_full(t, (len(v),))), ["view", "total_cost"])
+    return g
@@ -0,0 +1,166 @@
+# utils/docx_stream.py
+# DOCX-offerte voor grote BOM's: python-docx bouwt alleen het kleine "sjabloon" (kop, logo, teksten,
+# voettekst) met markeer-alinea's; de grote tabellen worden als WordprocessingML-tekst direct in
+# word/document.xml van het zip-pakket gestreamd, i.p.v. cel voor cel via het objectmodel.
+from __future__ import annotations
+import io, re, zipfile
+from datetime import date
+from typing import Any, BinaryIO, Callable, Dict, Iterable, Iterator, List, Mapping, Optional, Sequence
+from xml.sax.saxutils import escape
+import pandas as pd
+
+DOC_XML = "word/document.xml"
+MARK = "[[STREAM:{}]]"
+TEXT_WIDTH = 8640   # twips: A4/Letter-tekstbreedte van het standaardsjabloon (zoals python-docx)
+CHUNK_ROWS = 500    # tabelrijen per write naar het zip-bestand
+_BAD = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")  # niet toegestaan in XML 1.0
+
+def _t(v: Any) -> str:
+    return escape(_BAD.sub("", str(v)))
+
+def paragraph_xml(text: str, style: Optional[str] = None, bold: bool = False) -> str:
+    ppr = f'<w:pPr><w:pStyle w:val="{style}"/></w:pPr>' if style else ""
+    rpr = "<w:rPr><w:b/></w:rPr>" if bold else ""
+    return f'<w:p>{ppr}<w:r>{rpr}<w:t xml:space="preserve">{_t(text)}</w:t></w:r></w:p>'
+
+def table_xml(header: Sequence[str], rows: Iterable[Sequence[Any]], style: str,
+              chunk: int = CHUNK_ROWS) -> Iterator[str]:
+    """
+    Tabel als XML-stukken (zelfde opbouw als python-docx: auto-breedte, gelijke kolommen).
+    rows mag een generator zijn; per `chunk` rijen één string.
+    """
+    w = TEXT_WIDTH // max(len(header), 1)
+    cell = f'<w:tc><w:tcPr><w:tcW w:type="dxa" w:w="{w}"/></w:tcPr><w:p><w:r><w:t xml:space="preserve">'
+    end = "</w:t></w:r></w:p></w:tc>"
+    row = lambda vals: "<w:tr>" + "".join(cell + _t(v) + end for v in vals) + "</w:tr>"
+    grid = "".join(f'<w:gridCol w:w="{w}"/>' for _ in header)
+    yield (f'<w:tbl><w:tblPr><w:tblStyle w:val="{style}"/><w:tblW w:type="auto" w:w="0"/>'
+           f'<w:tblLook w:firstColumn="1" w:firstRow="1" w:lastColumn="0" w:lastRow="0" '
+           f'w:noHBand="0" w:noVBand="1" w:val="04A0"/></w:tblPr><w:tblGrid>{grid}</w:tblGrid>' + row(header))
+    buf: List[str] = []
+    for r in rows:
+        buf.append(row(r))
+        if len(buf) >= chunk:
+            yield "".join(buf); buf = []
+    yield "".join(buf) + "</w:tbl>"
+
+def _split(xml: str, names: Sequence[str]) -> List[Any]:
+    """document.xml opgeknipt rond de markeer-alinea's: [tekst, naam, tekst, naam, ..., tekst]."""
+    hits = []
+    for name in names:
+        i = xml.find(_t(MARK.format(name)))
+        if i < 0:
+            raise ValueError(f"Markering {name!r} niet gevonden in {DOC_XML}")
+        a = max(xml.rfind("<w:p>", 0, i), xml.rfind("<w:p ", 0, i))
+        hits.append((a, xml.index("</w:p>", i) + len("</w:p>"), name))
+    out: List[Any] = []
+    pos = 0
+    for a, b, name in sorted(hits):
+        out += [xml[pos:a], name]
+        pos = b
+    return out + [xml[pos:]]
+
+def stream_docx(base: bytes, blocks: Mapping[str, Callable[[], Iterable[str]]],
+                out: Optional[BinaryIO] = None) -> BinaryIO:
+    """
+    Vul een DOCX-pakket (bytes) met gestreamde XML: elke markeer-alinea MARK.format(naam) wordt
+    vervangen door de stukken uit blocks[naam](). Overige zip-onderdelen worden ongewijzigd gekopieerd.
+    """
+    out = io.BytesIO() if out is None else out
+    with zipfile.ZipFile(io.BytesIO(base)) as zin, \
+            zipfile.ZipFile(out, "w", zipfile.ZIP_DEFLATED) as zout:
+        for info in zin.infolist():
+            if info.filename != DOC_XML:
+                zout.writestr(info, zin.read(info.filename))
+                continue
+            parts = _split(zin.read(DOC_XML).decode("utf-8"), list(blocks))
+            with zout.open(DOC_XML, "w", force_zip64=True) as fh:
+                for p in parts:
+                    if p in blocks:
+                        for s in blocks[p]():
+                            fh.write(s.encode("utf-8"))
+                    else:
+                        fh.write(p.encode("utf-8"))
+    out.seek(0)
+    return out
+
+# ---- Offerte (pages/18_Offerte_DOCX.py)
+COST_HEADER = ["Item", "Grade", "Mass (kg/pc)", "€/kg", "Material €/pc", "Proc €/pc", "Total €/pc"]
+PROC_HEADER = ["Process", "Rate (€/min)", "Minutes", "Cost €/pc"]
+BREAK_HEADER = ["Quantity", "€/pc", "Total", "Discount"]
+
+def _cost_rows(rows: Sequence[Mapping[str, Any]]) -> Iterator[List[str]]:
+    for r in rows:
+        yield [r["item_code"], r["grade"], f'{r["mass_kg_per_pc"]:.4f}', f'{r["eur_per_kg"]:.4f}',
+               f'{r["material_eur_pc"]:.2f}', f'{r["proc_eur_pc"]:.2f}', f'{r["total_eur_pc"]:.2f}']
+
+def _proc_detail(rows: Sequence[Mapping[str, Any]], style: str, h3: str) -> Iterator[str]:
+    for r in rows:
+        yield paragraph_xml(r["item_code"], h3)
+        if not r["proc_detail"]:
+            yield paragraph_xml("No process cost lines.")
+            continue
+        yield from table_xml(PROC_HEADER, ([d["proc"], f'{d["rate_eur_min"]:.2f}', f'{d["minutes"]:.2f}',
+                                            f'{d["cost_eur"]:.2f}'] for d in r["proc_detail"]), style)
+
+def build_offer_docx(rows: Sequence[Mapping[str, Any]], info: Mapping[str, Any],
+                     breaks: Optional[pd.DataFrame] = None, logo: Optional[bytes] = None,
+                     out: Optional[BinaryIO] = None) -> BinaryIO:
+    """
+    Offerte-DOCX met dezelfde inhoud als voorheen. rows = cost_items(...); info = client_name,
+    client_contact, client_email, project_code, assembly, total_excl, total_incl, vat_pct, lead_weeks.
+    """
+    from docx import Document
+    from docx.shared import Inches
+    from docx.enum.text import WD_ALIGN_PARAGRAPH
+
+    doc = Document()
+    header = doc.sections[0].header.paragraphs[0]
+    if logo:
+        header.add_run().add_picture(io.BytesIO(logo), width=Inches(1.2))
+        header.alignment = WD_ALIGN_PARAGRAPH.LEFT
+        header.add_run("  ")
+    else:
+        header.add_run("")
+
+    asm = info.get("assembly") or {}
+    doc.add_heading(f"Offer {info['project_code']} — {info['client_name']}", level=1).alignment = WD_ALIGN_PARAGRAPH.LEFT
+    meta = doc.add_paragraph()
+    meta.add_run(f"Date: {date.today().isoformat()}    ").bold = True
+    meta.add_run(f"Contact: {info['client_contact']} | {info['client_email']}")
+    doc.add_heading("Scope", level=2)
+    doc.add_paragraph(f"Assembly: {asm.get('name','')} — quantity {asm.get('qty',1)}.")
+
+    doc.add_heading("Cost breakdown (per piece, EUR)", level=2)
+    doc.add_paragraph(MARK.format("cost_table"))
+    doc.add_paragraph().add_run(f"Assembly total (qty × Total €/pc): € {info['total_excl']:,.2f} excl. btw").bold = True
+    doc.add_paragraph(f"VAT {info['vat_pct']}% → Total incl. VAT: € {info['total_incl']:,.2f}")
+
+    if breaks is not None:
+        doc.add_heading("Price breaks (per assembly, EUR)", level=2)
+        doc.add_paragraph(MARK.format("price_breaks"))
+    doc.add_heading("Process detail", level=2)
+    doc.add_paragraph(MARK.format("proc_detail"))
+
+    doc.add_heading("Assumptions", level=2)
+    for line in [f"Lead time: {int(info['lead_weeks'])} weeks after order.", "Incoterms: EXW.",
+                 "Weld quality: EN ISO 5817 level C.", "Scrap: 3%.", "Prices excl. VAT."]:
+        doc.add_paragraph(line)
+    footer = doc.sections[0].footer.paragraphs[0]
+    footer.alignment = WD_ALIGN_PARAGRAPH.CENTER
+    footer.add_run("— Page 1 —")
+
+    list_style = doc.styles["Light List Accent 1"].style_id
+    grid_style = doc.styles["Light Grid"].style_id
+    h3 = doc.styles["Heading 3"].style_id
+    base = io.BytesIO(); doc.save(base)
+
+    blocks: Dict[str, Callable[[], Iterable[str]]] = {
+        "cost_table": lambda: table_xml(COST_HEADER, _cost_rows(rows), list_style),
+        "proc_detail": lambda: _proc_detail(rows, grid_style, h3),
+    }
+    if breaks is not None:
+        blocks["price_breaks"] = lambda: table_xml(BREAK_HEADER, ([b.qty, f"{b.price_pc:,.2f}", f"{b.total:,.2f}",
+                                                                   f"{b.discount_pct:.1f}%"]
+                                                                  for b in breaks.itertuples(index=False)), list_style)
+    return stream_docx(base.getvalue(), blocks, out)
@@ -0,0 +1,161 @@
+# utils/formula.py
+# Veilige evaluator voor run_time_formula uit processes_db.csv, bijv.
+#   "time_min = (toolpath_mm / feed_mm_min) + (passes * retract_penalty_min)"
+#   "time_min = 0; cost = lot_flat_eur + mass_kg * kg_rate_eur"
+# Elke formule wordt één keer geparsed, tegen een whitelist van AST-nodes gecontroleerd,
+# gecompileerd en gecached; evalueren gaat kolomgewijs op NumPy-arrays.
+from __future__ import annotations
+import ast
+from functools import lru_cache, reduce
+from typing import Any, Dict, List, Mapping, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+class FormulaError(ValueError):
+    """Formule is ongeldig of mist invoer."""
+
+_BINOPS = (ast.Add, ast.Sub, ast.Mult, ast.Div, ast.FloorDiv, ast.Mod, ast.Pow)
+_UNARY = (ast.UAdd, ast.USub)
+_FUNCS: Dict[str, Any] = {
+    "min": lambda *a: reduce(np.minimum, a), "max": lambda *a: reduce(np.maximum, a),
+    "abs": np.abs, "sqrt": np.sqrt, "ceil": np.ceil, "floor": np.floor, "log": np.log, "exp": np.exp,
+}
+_NARY = {"min", "max"}  # twee of meer argumenten; de overige functies precies één
+_CONSTS: Dict[str, float] = {"pi": float(np.pi)}
+
+def _check(node: ast.AST, src: str) -> None:
+    """Alleen rekenkunde, getallen, namen en whitelisted functies; al het andere wordt geweigerd."""
+    for n in ast.walk(node):
+        if isinstance(n, (ast.Expression, ast.Load) + _BINOPS + _UNARY):
+            continue
+        if isinstance(n, ast.BinOp) and isinstance(n.op, _BINOPS):
+            continue
+        if isinstance(n, ast.UnaryOp) and isinstance(n.op, _UNARY):
+            continue
+        if isinstance(n, ast.Constant) and isinstance(n.value, (int, float)) and not isinstance(n.value, bool):
+            continue
+        if isinstance(n, ast.Name):
+            if n.id.startswith("_"):
+                raise FormulaError(f"naam '{n.id}' niet toegestaan in: {src}")
+            continue
+        if isinstance(n, ast.Call):
+            if not (isinstance(n.func, ast.Name) and n.func.id in _FUNCS) or n.keywords:
+                raise FormulaError(f"functieaanroep niet toegestaan in: {src}")
+            k = len(n.args)
+            if (k < 2) if n.func.id in _NARY else (k != 1):
+                want = "minstens 2" if n.func.id in _NARY else "precies 1"
+                raise FormulaError(f"{n.func.id}() verwacht {want} argument(en), kreeg {k} in: {src}")
+            continue
+        raise FormulaError(f"{type(n).__name__} niet toegestaan in: {src}")
+
+class CompiledFormula:
+    """
+    Gecompileerde formule met één of meer toewijzingen (gescheiden door ';').
+    `inputs` zijn de vrije variabelen, `outputs` de toegewezen namen in volgorde.
+    Aanroepen met een mapping/DataFrame van kolommen geeft {output: np.ndarray}.
+    """
+
+    def __init__(self, source: str):
+        self.source = source
+        self._steps: List[Tuple[str, Any]] = []
+        known: set = set()
+        inputs: List[str] = []
+        for part in [p.strip() for p in str(source).split(";") if p.strip()]:
+            target, sep, expr = part.partition("=")
+            target = target.strip()
+            if not sep or not target.isidentifier() or target.startswith("_"):
+                raise FormulaError(f"verwacht 'naam = expressie', kreeg: {part}")
+            try:
+                tree = ast.parse(expr.strip(), mode="eval")
+            except SyntaxError as e:
+                raise FormulaError(f"syntaxfout in '{part}': {e.msg}") from None
+            _check(tree, part)
+            for n in ast.walk(tree):  # floats i.p.v. Python-ints: geen onbegrensde int-machten
+                if isinstance(n, ast.Constant):
+                    n.value = float(n.value)
+            for n in ast.walk(tree):
+                if isinstance(n, ast.Name) and n.id not in known and n.id not in _FUNCS \
+                        and n.id not in _CONSTS and n.id not in inputs:
+                    inputs.append(n.id)
+            self._steps.append((target, compile(tree, f"<formula:{target}>", "eval")))
+            known.add(target)
+        if not self._steps:
+            raise FormulaError("lege formule")
+        self.inputs: List[str] = inputs
+        self.outputs: List[str] = [t for t, _ in self._steps]
+
+    def __repr__(self) -> str:
+        return f"CompiledFormula({self.source!r})"
+
+    def missing(self, columns: Sequence[str]) -> List[str]:
+        have = set(columns)
+        return [c for c in self.inputs if c not in have]
+
+    def __call__(self, data: Mapping[str, Any], defaults: Optional[Mapping[str, Any]] = None) -> Dict[str, np.ndarray]:
+        env: Dict[str, Any] = {**_FUNCS, **_CONSTS}
+        for name in self.inputs:
+            if name in data:
+                v = data[name]
+            elif defaults is not None and name in defaults:
+                v = defaults[name]
+            else:
+                raise FormulaError(f"invoer '{name}' ontbreekt voor: {self.source}")
+            if isinstance(v, pd.Series):
+                v = pd.to_numeric(v, errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+            env[name] = np.asarray(v, dtype="float64")
+        out: Dict[str, np.ndarray] = {}
+        with np.errstate(all="ignore"):
+            for target, code in self._steps:
+                try:
+                    val = np.asarray(eval(code, {"__builtins__": {}}, env), dtype="float64")
+                except ArithmeticError:  # alleen bij pure constanten, bijv. "1 / 0"
+                    val = np.asarray(np.nan)
+                val = np.where(np.isfinite(val), val, np.nan)  # deling door 0 e.d. -> NaN
+                env[target] = out[target] = val
+        return out
+
+@lru_cache(maxsize=256)
+def compile_formula(source: str) -> CompiledFormula:
+    """Parse + controle + compile, gecached per formuletekst."""
+    return CompiledFormula(source)
+
+def process_formulas(processes: pd.DataFrame, col: str = "run_time_formula") -> Dict[str, CompiledFormula]:
+    """
+    Compileert alle formules van processes_db in één keer (bij het laden).
+    Eén of meer ongeldige formules -> FormulaError met alle fouten, zodat niets half geladen wordt.
+    """
+    if col not in processes.columns:
+        return {}
+    out: Dict[str, CompiledFormula] = {}
+    errors: List[str] = []
+    for pid, src in zip(processes["process_id"].astype(str).str.strip(), processes[col]):
+        if pd.isna(src) or not str(src).strip():
+            continue
+        try:
+            out[pid] = compile_formula(str(src).strip())
+        except FormulaError as e:
+            errors.append(f"{pid}: {e}")
+    if errors:
+        raise FormulaError("ongeldige run_time_formula:\n" + "\n".join(errors))
+    return out
+
+def evaluate_by_process(process_ids: Any, params: pd.DataFrame, formulas: Mapping[str, CompiledFormula],
+                        output: str = "time_min", defaults: Optional[Mapping[str, Any]] = None) -> np.ndarray:
+    """
+    Evalueert per rij de formule van zijn proces: één gevectoriseerde aanroep per uniek proces.
+    Rijen zonder formule, zonder `output` of met ontbrekende invoerkolommen geven NaN.
+    """
+    codes, uniques = pd.factorize(pd.Series(process_ids, copy=False))
+    res = np.full(len(codes), np.nan)
+    order = np.argsort(codes, kind="stable")
+    bounds = np.concatenate([[0], np.cumsum(np.bincount(codes[codes >= 0], minlength=len(uniques)))])
+    order = order[len(codes) - bounds[-1]:]  # -1 (NaN) staat vooraan na argsort
+    have = list(params.columns) + list(defaults or {})
+    for i, pid in enumerate(uniques):
+        f = formulas.get(str(pid).strip())
+        if f is None or output not in f.outputs or f.missing(have):
+            continue
+        rows = order[bounds[i]:bounds[i + 1]]
+        sub = {c: params[c].to_numpy()[rows] for c in f.inputs if c in params.columns}
+        res[rows] = np.broadcast_to(f(sub, defaults)[output], rows.shape)
+    return res
@@ -1,13 +1,21 @@
 # utils/io.py
 from __future__ import annotations
 from pathlib import Path
-from typing import Dict, Any, Optional
+from typing import Dict, Any, List, Optional, Tuple
+import hashlib, threading
+import numpy as np
 import pandas as pd
 
+from . import store
+
 # --- Schéma’s (houd dit simpel; breid uit naar wens) ---
+# Compact per sessie: herhalende ID's/routes in de BOM als category, fysieke grootheden als
+# float32, aantallen als nullable Int32. Geld en percentages blijven float64 (afronding op centen);
+# unieke sleutels van stamtabellen blijven string (category levert daar niets op).
 SCHEMA_MATERIALS: Dict[str, Any] = {
     "material_id": "string",
     "description": "string",
+    "en_number": "string",  # 1.0570 blijft 1.0570 (als float wordt het 1.057)
     "price_eur_per_kg": "float64",
 }
 SCHEMA_PROCESSES: Dict[str, Any] = {
@@ -18,11 +26,11 @@ SCHEMA_PROCESSES: Dict[str, Any] = {
     "margin_pct": "float64",
 }
 SCHEMA_BOM: Dict[str, Any] = {
-    "material_id": "string",
-    "qty": "Int64",
-    "mass_kg": "float64",
-    "process_route": "string",
-    "runtime_h": "float64",
+    "material_id": "category",
+    "qty": "Int32",
+    "mass_kg": "float32",
+    "process_route": "category",
+    "runtime_h": "float32",
 }
 
 # --- Paden ---
@@ -34,6 +42,8 @@ def paths() -> Dict[str, Path]:
         "materials": d / "materials_db.csv",
         "processes": d / "processes_db.csv",
         "bom": d / "bom_template.csv",
+        "material_prices": d / "material_prices.csv",
+        "labor_rates": d / "labor_rates.csv",
     }
 
 # --- Helpers ---
@@ -41,26 +51,235 @@ def _dtype_map(schema: Dict[str, Any]) -> Dict[str, Any]:
     # pandas dtypes als mapping: strings laten we door, floats/Int64 ook
     return {k: v for k, v in schema.items()}
 
-def read_csv_safe(path: Path, schema: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
+def _is_nullable_int(typ: Any) -> bool:
+    return isinstance(typ, str) and (typ.startswith("Int") or typ.startswith("UInt"))
+
+# Verhoog bij een wijziging in _parse_csv: bestaande Arrow-kopieën krijgen dan een nieuwe key
+PARSE_VERSION = 2
+
+def _store_key(schema: Optional[Dict[str, Any]]) -> str:
+    return f"{store.schema_key(schema)}v{PARSE_VERSION}"
+
+def _parse_csv(path: Path, schema: Optional[Dict[str, Any]] = None) -> pd.DataFrame:
     if schema is None:
         return pd.read_csv(path)
     dtypes = _dtype_map(schema)
-    df = pd.read_csv(path, dtype={k: v for k, v in dtypes.items() if v != "Int64"})
-    # pandas 'Int64' (nullable) apart toepassen
+    # category/float32 direct bij het parsen; nullable Int* apart (lege cellen)
+    df = pd.read_csv(path, dtype={k: v for k, v in dtypes.items() if not _is_nullable_int(v)})
     for col, typ in dtypes.items():
-        if typ == "Int64" and col in df.columns:
-            df[col] = df[col].astype("Int64")
+        if _is_nullable_int(typ) and col in df.columns:
+            df[col] = df[col].astype(typ)
+    # Overige integer-kolommen (bijv. item_no, setup_min) naar int32 als het past; niet kleiner,
+    # anders lopen berekeningen als setup_min * n stil over (int8/int16)
+    i32 = np.iinfo(np.int32)
+    for col in df.columns:
+        if col not in dtypes and df[col].dtype.kind == "i" and df[col].dtype.itemsize > 4 and len(df[col]):
+            if i32.min <= df[col].min() and df[col].max() <= i32.max:
+                df[col] = df[col].astype(np.int32)
     return df
 
-# Convenience loaders
+def in_data_dir(path: Path) -> bool:
+    """Ligt het bestand onder paths()["data"]? Alleen daar komt een Arrow-kopie."""
+    return Path(path).resolve().is_relative_to(paths()["data"].resolve())
+
+def read_csv_safe(path: Path, schema: Optional[Dict[str, Any]] = None,
+                  columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    CSV met schema inlezen. Referentietabellen onder data/ lopen via de Arrow-kopie uit utils.store
+    (memory-mapped, alleen `columns` indien opgegeven); andere paden (bv. RFQ-mappen van
+    batch_quote) en uploads/buffers worden direct geparsed, zonder .arrow/-map ernaast.
+    """
+    if not isinstance(path, (str, Path)) or not in_data_dir(path):
+        df = _parse_csv(path, schema)
+        return df[[c for c in columns if c in df.columns]] if columns is not None else df
+    return store.read_columns(Path(path), lambda: _parse_csv(path, schema), _store_key(schema), columns)
+
+def frame_memory(df: pd.DataFrame) -> int:
+    """Geheugengebruik in bytes, inclusief de inhoud van string/object-kolommen."""
+    return int(df.memory_usage(index=True, deep=True).sum())
+
+def memory_report(path: Path, schema: Dict[str, Any]) -> Dict[str, Any]:
+    """Geheugen van een CSV met pandas-defaults (object/float64/int64) vs. met het compacte schema."""
+    before = frame_memory(pd.read_csv(path))
+    df = read_csv_safe(path, schema)
+    after = frame_memory(df)
+    return {
+        "file": str(path), "rows": len(df),
+        "before_bytes": before, "after_bytes": after,
+        "saved_pct": round(100.0 * (1 - after / before), 1) if before else 0.0,
+    }
+
+# --- Cache per (pad, mtime, grootte, schema, kolommen), gedeeld door alle pages/sessies ---
+_CACHE: Dict[Tuple[Any, ...], pd.DataFrame] = {}
+_CACHE_LOCK = threading.Lock()
+_CACHE_MAX = 64
+_WATCHER: Optional["DataWatcher"] = None
+
+def file_key(path: Path) -> Optional[Tuple[str, int, int]]:
+    """(pad, mtime_ns, grootte) of None als het bestand niet bestaat."""
+    try:
+        st_ = Path(path).stat()
+    except OSError:
+        return None
+    return (str(Path(path).resolve()), st_.st_mtime_ns, st_.st_size)
+
+def invalidate(path: Optional[Path] = None) -> int:
+    """Haalt cache-entries van één bestand (of alles) weg; geeft het aantal verwijderde entries."""
+    with _CACHE_LOCK:
+        if path is None:
+            n = len(_CACHE); _CACHE.clear(); return n
+        target = str(Path(path).resolve())
+        drop = [k for k in _CACHE if k[0][0] == target]
+        for k in drop:
+            del _CACHE[k]
+        return len(drop)
+
+def cached_read(path: Path, schema: Optional[Dict[str, Any]] = None,
+                columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    read_csv_safe met cache. Een gewijzigd bestand (mtime/grootte) geeft een nieuwe key, dus nooit
+    verouderde prijzen; de DataWatcher ruimt oude entries op. Je krijgt een eigen kopie terug
+    (pages muteren frames met .loc), maar betaalt de parse-kosten maar één keer per bestandsversie.
+    """
+    fk = file_key(path)
+    if fk is None:
+        return read_csv_safe(path, schema, columns)  # zelfde foutmelding als voorheen
+    start_watcher(Path(path).parent)
+    key = (fk, store.schema_key(schema), tuple(columns) if columns is not None else None)
+    with _CACHE_LOCK:
+        df = _CACHE.get(key)
+    if df is None:
+        df = read_csv_safe(path, schema, columns)
+        with _CACHE_LOCK:
+            for k in [k for k in _CACHE if k[0][0] == fk[0] and k[0] != fk]:
+                del _CACHE[k]  # oudere versie van hetzelfde bestand
+            if len(_CACHE) >= _CACHE_MAX:
+                _CACHE.pop(next(iter(_CACHE)))
+            _CACHE[key] = df
+    return df.copy()
+
+class DataWatcher(threading.Thread):
+    """Lichte poller op een datamap: gewijzigde of verwijderde bestanden gaan uit de cache."""
+
+    def __init__(self, root: Path, interval: float = 2.0):
+        super().__init__(name=f"data-watcher:{root}", daemon=True)
+        self.root = Path(root)
+        self.interval = interval
+        self._stop_evt = threading.Event()
+
+    def _snapshot(self) -> Dict[str, Tuple[int, int]]:
+        snap: Dict[str, Tuple[int, int]] = {}
+        try:
+            for p in self.root.iterdir():
+                if p.is_file():
+                    st_ = p.stat()
+                    snap[str(p.resolve())] = (st_.st_mtime_ns, st_.st_size)
+        except OSError:
+            pass
+        return snap
+
+    def run(self) -> None:
+        prev = self._snapshot()
+        while not self._stop_evt.wait(self.interval):
+            cur = self._snapshot()
+            for path in set(prev) | set(cur):
+                if prev.get(path) != cur.get(path):
+                    invalidate(Path(path))
+            prev = cur
+
+    def stop(self) -> None:
+        self._stop_evt.set()
+
+def start_watcher(root: Optional[Path] = None, interval: float = 2.0) -> "DataWatcher":
+    """Start (eenmalig per proces) de watcher op data/."""
+    global _WATCHER
+    with _CACHE_LOCK:
+        if _WATCHER is None or not _WATCHER.is_alive():
+            _WATCHER = DataWatcher(root or paths()["data"], interval)
+            _WATCHER.start()
+        return _WATCHER
+
+# Convenience loaders (gecached op bestandsversie)
 def load_materials() -> pd.DataFrame:
     p = paths()["materials"]
-    return read_csv_safe(p, SCHEMA_MATERIALS)
+    return cached_read(p, SCHEMA_MATERIALS)
 
 def load_processes() -> pd.DataFrame:
     p = paths()["processes"]
-    return read_csv_safe(p, SCHEMA_PROCESSES)
+    return cached_read(p, SCHEMA_PROCESSES)
 
 def load_bom() -> pd.DataFrame:
     p = paths()["bom"]
-    return read_csv_safe(p, SCHEMA_BOM)
+    return cached_read(p, SCHEMA_BOM)
+
+def load_material_prices(columns: Optional[List[str]] = None) -> pd.DataFrame:
+    return cached_read(paths()["material_prices"], columns=columns)
+
+def load_labor_rates(columns: Optional[List[str]] = None) -> pd.DataFrame:
+    return cached_read(paths()["labor_rates"], columns=columns)
+
+# --- Gecompileerde opzoekindexen (integer-codes i.p.v. DataFrame-merges) ---
+class LookupIndex:
+    """
+    Referentietabel eenmalig gecompileerd tot key -> rij-index -> numerieke kolomarrays.
+    BOM-regels prijzen we daarna met array-gathers (take) i.p.v. een merge over stringkolommen.
+    Bij dubbele keys wint de eerste rij (zelfde keuze als een merge + drop_duplicates).
+    """
+
+    def __init__(self, df: pd.DataFrame, key: str):
+        # eerst strippen, dan ontdubbelen: 'A' en 'A ' zijn dezelfde key
+        d = df.assign(**{key: df[key].astype("string").str.strip()}).drop_duplicates(subset=[key], keep="first")
+        self.key = key
+        self.index = pd.Index(d[key], dtype="string")
+        self.columns: Dict[str, np.ndarray] = {}
+        for c in d.columns:
+            if c != key:
+                num = pd.to_numeric(d[c], errors="coerce")
+                if num.notna().any() or d[c].isna().all():
+                    self.columns[c] = num.to_numpy(dtype="float64", na_value=np.nan)
+
+    def __len__(self) -> int:
+        return len(self.index)
+
+    def codes(self, values: Any) -> np.ndarray:
+        """Rij-index per waarde (-1 als onbekend). Herhalende keys worden één keer opgezocht."""
+        codes, uniques = pd.factorize(pd.Series(values, copy=False))
+        rows = self.index.get_indexer(pd.Index(uniques).astype("string").str.strip())
+        out = np.full(len(codes), -1, dtype=np.int64)
+        ok = codes >= 0
+        out[ok] = rows[codes[ok]]
+        return out
+
+    def take(self, col: str, codes: np.ndarray) -> np.ndarray:
+        """Kolomwaarden voor rij-codes; -1 (onbekend) of ontbrekende kolom wordt NaN."""
+        arr = self.columns.get(col)
+        if arr is None or len(arr) == 0:
+            return np.full(len(codes), np.nan)
+        out = arr[np.where(codes >= 0, codes, 0)]
+        out[codes < 0] = np.nan
+        return out
+
+_INDEX_CACHE: Dict[Tuple[str, str], LookupIndex] = {}
+_INDEX_CACHE_MAX = 32
+
+def content_hash(df: pd.DataFrame) -> str:
+    """Stabiele hash over kolomnamen en inhoud (onafhankelijk van de index)."""
+    h = hashlib.sha1("|".join(map(str, df.columns)).encode("utf-8"))
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+def lookup_index(df: pd.DataFrame, key: str) -> LookupIndex:
+    """Gecachte LookupIndex per (inhoud, key); dezelfde tabel wordt maar één keer gecompileerd."""
+    ck = (content_hash(df), key)
+    idx = _INDEX_CACHE.get(ck)
+    if idx is None:
+        if len(_INDEX_CACHE) >= _INDEX_CACHE_MAX:
+            _INDEX_CACHE.pop(next(iter(_INDEX_CACHE)))
+        idx = _INDEX_CACHE[ck] = LookupIndex(df, key)
+    return idx
+
+def material_index(materials: Optional[pd.DataFrame] = None) -> LookupIndex:
+    return lookup_index(load_materials() if materials is None else materials, "material_id")
+
+def process_index(processes: Optional[pd.DataFrame] = None) -> LookupIndex:
+    return lookup_index(load_processes() if processes is None else processes, "process_id")
@@ -0,0 +1,179 @@
+# utils/leadtime.py
+# Doorlooptijd (levertijd) uit de routing: discrete-event-simulatie van batches door de stappen,
+# met Parallel_machines per stap, Batch_size per stap en Queue_days als wachttijd vóór een stap.
+# Tijd in werkdagen (bewerking: minuten / (60 x uren per dag)); weken = werkdagen / 5.
+from __future__ import annotations
+import heapq
+from typing import Dict, List, Mapping, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from .io import content_hash
+from .routing import _col
+from .validators import ROUTING_SCHEMA
+
+DAYS_PER_WEEK = 5
+REPS = 2000
+MAX_BATCHES = 5000  # per stap; grotere aantallen worden samengevoegd (zelfde totale tijd)
+
+def _steps(routing: pd.DataFrame, Q: float) -> List[Dict[str, float]]:
+    """Routing gesorteerd op Step, met eenheden/batches per stap."""
+    r = pd.DataFrame(routing)
+    if "Step" in r.columns:
+        r = r.sort_values("Step", kind="stable")
+    d = ROUTING_SCHEMA.defaults or {}
+    Q = max(float(Q or 1), 1.0)
+    units = np.ceil(Q * _col(r, "Qty_per_parent", d["Qty_per_parent"]))
+    batch = np.maximum(_col(r, "Batch_size", d["Batch_size"]), 1.0)
+    batch = np.maximum(batch, np.ceil(units / MAX_BATCHES))
+    out = []
+    for u, b, cyc, setup, k, qd in zip(units, batch, _col(r, "Cycle_min", d["Cycle_min"]),
+                                       _col(r, "Setup_min", d["Setup_min"]),
+                                       _col(r, "Parallel_machines", d["Parallel_machines"]),
+                                       _col(r, "Queue_days", d["Queue_days"])):
+        u = max(int(u), 1)
+        out.append({"units": u, "batch": int(b), "n": -(-u // int(b)), "cycle_min": max(float(cyc), 0.0),
+                    "setup_min": max(float(setup), 0.0), "machines": max(int(k), 1), "queue_days": max(float(qd), 0.0)})
+    return out
+
+def _batch_units(s: Mapping[str, float]) -> np.ndarray:
+    sizes = np.full(s["n"], s["batch"], dtype=np.int64)
+    sizes[-1] = s["units"] - s["batch"] * (s["n"] - 1)
+    return sizes
+
+def _feeders(prev: Mapping[str, float], cur: Mapping[str, float]):
+    """
+    Welke batches van de vorige stap batch j nodig heeft (zelfde fractie van de order):
+    eerste (lo) en laatste (hi) index, met integer-rekenwerk.
+    """
+    j = np.arange(cur["n"], dtype=np.int64)
+    N, B, Np, Bp = cur["units"], cur["batch"], prev["units"], prev["batch"]
+    start, end = j * B, np.minimum((j + 1) * B, N)
+    lo = (start * Np) // (N * Bp)
+    hi = (end * Np + N * Bp - 1) // (N * Bp) - 1
+    return np.minimum(lo, prev["n"] - 1), np.clip(hi, lo, prev["n"] - 1)
+
+def _factors(rng: np.random.Generator, shape, cv: float, kind: str) -> np.ndarray:
+    """Variatie rond 1.0: lognormaal (bewerking) of gamma (wachttijd), met variatiecoëfficiënt cv."""
+    if cv <= 0:
+        return np.ones(shape)
+    if kind == "gamma":
+        shape_k = 1.0 / cv ** 2
+        return rng.gamma(shape_k, 1.0 / shape_k, shape)
+    s2 = np.log1p(cv ** 2)
+    return rng.lognormal(-0.5 * s2, np.sqrt(s2), shape)
+
+def simulate_events(routing: pd.DataFrame, Q: float, hours_day: float = 8.0,
+                    cv_cycle: float = 0.0, cv_queue: float = 0.0, seed: Optional[int] = None) -> pd.DataFrame:
+    """
+    Eén replicatie als event-log (batch x stap: klaar, start, eind, machine) via een heapq-eventlijst.
+    FCFS per stap: batches worden in volgorde van aankomst op de eerstvrije machine gezet.
+    """
+    rng = np.random.default_rng(seed)
+    steps = _steps(routing, Q)
+    day_min = 60.0 * float(hours_day)
+    log: List[Dict[str, float]] = []
+    done = None
+    for i, s in enumerate(steps):
+        dur = (s["setup_min"] + s["cycle_min"] * _batch_units(s) * _factors(rng, s["n"], cv_cycle, "lognormal")) / day_min
+        wait = s["queue_days"] * _factors(rng, s["n"], cv_queue, "gamma")
+        if done is None:
+            ready = wait.copy()
+        else:
+            lo, hi = _feeders(steps[i - 1], s)
+            ready = np.array([done[a:b + 1].max() for a, b in zip(lo, hi)]) + wait
+        events = [(t, j) for j, t in enumerate(ready)]
+        heapq.heapify(events)
+        machines = [(0.0, m) for m in range(s["machines"])]
+        done = np.empty(s["n"])
+        while events:
+            t, j = heapq.heappop(events)
+            free, m = heapq.heappop(machines)
+            start = max(t, free)
+            done[j] = start + dur[j]
+            heapq.heappush(machines, (done[j], m))
+            log.append({"step": i, "batch": j, "ready": t, "start": start, "end": done[j], "machine": m})
+    return pd.DataFrame(log)
+
+def simulate(routing: pd.DataFrame, Q: float, reps: int = REPS, hours_day: float = 8.0,
+             cv_cycle: float = 0.10, cv_queue: float = 0.50, seed: Optional[int] = None) -> np.ndarray:
+    """
+    Doorlooptijd (werkdagen) per replicatie. Zelfde FCFS-model als simulate_events, maar alle
+    replicaties lopen tegelijk: de machine-heap is een (reps x machines)-array (argmin = pop).
+    Bij één machine is het helemaal gesloten: eind_j = S_j + max_{i<=j}(aankomst_i - S_{i-1}).
+    """
+    rng = np.random.default_rng(seed)
+    steps = _steps(routing, Q)
+    day_min = 60.0 * float(hours_day)
+    reps = max(int(reps), 1)
+    r_idx = np.arange(reps)
+    done: Optional[np.ndarray] = None
+    for i, s in enumerate(steps):
+        n, k = s["n"], s["machines"]
+        dur = (s["setup_min"] + s["cycle_min"] * _batch_units(s) * _factors(rng, (reps, n), cv_cycle, "lognormal")) / day_min
+        wait = s["queue_days"] * _factors(rng, (reps, n), cv_queue, "gamma")
+        if done is None:
+            ready = wait
+        else:
+            lo, hi = _feeders(steps[i - 1], s)
+            ready = np.maximum(np.maximum.reduceat(done, lo, axis=1), done[:, hi]) + wait
+        order = np.argsort(ready, axis=1, kind="stable")
+        arr = np.take_along_axis(ready, order, axis=1)
+        d = np.take_along_axis(dur, order, axis=1)
+        if k >= n:
+            end = arr + d
+        elif k == 1:
+            S = np.cumsum(d, axis=1)
+            end = S + np.maximum.accumulate(arr - (S - d), axis=1)
+        else:
+            free = np.zeros((reps, k))
+            end = np.empty_like(arr)
+            for j in range(n):
+                m = free.argmin(axis=1)
+                e = np.maximum(arr[:, j], free[r_idx, m]) + d[:, j]
+                free[r_idx, m] = e
+                end[:, j] = e
+        done = np.empty_like(end)
+        np.put_along_axis(done, order, end, axis=1)
+    return done.max(axis=1) if done is not None else np.zeros(reps)
+
+def summarize(days: np.ndarray, quantiles: Sequence[float] = (50, 80, 95)) -> Dict[str, float]:
+    """Levertijd in weken: gemiddelde en percentielen (P80 is de gebruikelijke offertewaarde)."""
+    weeks = np.asarray(days, dtype="float64") / DAYS_PER_WEEK
+    out = {"mean_weeks": float(weeks.mean()) if len(weeks) else 0.0, "reps": int(len(weeks))}
+    if len(weeks):
+        out.update({f"P{int(q)}_weeks": float(v) for q, v in zip(quantiles, np.percentile(weeks, quantiles))})
+    return out
+
+def quote_lead_times(quotes: Mapping[str, Mapping], reps: int = REPS, hours_day: float = 8.0,
+                     cv_cycle: float = 0.10, cv_queue: float = 0.50, seed: Optional[int] = None) -> pd.DataFrame:
+    """Levertijdverdeling per offerte: quotes = {naam: {"routing": df, "Q": aantal}}."""
+    rows = []
+    for i, (name, q) in enumerate(quotes.items()):
+        days = simulate(q["routing"], q.get("Q", 1), reps, hours_day, cv_cycle, cv_queue,
+                        None if seed is None else seed + i)
+        rows.append({"Quote": name, "Q": q.get("Q", 1), **summarize(days)})
+    return pd.DataFrame(rows)
+
+_LEAD_CACHE: Dict[tuple, Dict[str, float]] = {}
+_LEAD_CACHE_MAX = 32
+
+def offer_lead_weeks(routing: Optional[pd.DataFrame], Q: float, pct: float = 80, reps: int = REPS,
+                     hours_day: float = 8.0, seed: int = 0) -> Dict[str, float]:
+    """
+    Levertijd voor de offerte: P{pct} naar boven afgerond op hele weken (1..52), plus de samenvatting.
+    Gecached per (routing-inhoud, Q, instellingen): pagina-reruns simuleren niet opnieuw.
+    """
+    r = pd.DataFrame(routing) if routing is not None else pd.DataFrame()
+    if r.empty:
+        return {}
+    ck = (content_hash(r), float(Q or 1), float(pct), int(reps), float(hours_day), seed)
+    out = _LEAD_CACHE.get(ck)
+    if out is None:
+        days = simulate(r, Q, reps, hours_day, seed=seed)
+        out = summarize(days, (50, pct, 95))
+        out["weeks"] = int(min(52, max(1, np.ceil(np.percentile(days, pct) / DAYS_PER_WEEK))))
+        if len(_LEAD_CACHE) >= _LEAD_CACHE_MAX:
+            _LEAD_CACHE.pop(next(iter(_LEAD_CACHE)))
+        _LEAD_CACHE[ck] = out
+    return dict(out)
@@ -0,0 +1,134 @@
+# utils/mass.py
+# Massa per BOM-item in bulk: volume uit de maatkolommen per vorm (plaat, staf, buis, blok) en
+# dichtheid uit materials_db (density_kg_per_m3), met de familie-schatting als fallback.
+# Items met ontbrekende maten worden gemarkeerd i.p.v. stil als 0 kg meegerekend.
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+DENSITY_KG_PER_MM3 = {"stainless": 7.9e-6, "duplex": 7.8e-6, "aluminum": 2.7e-6, "carbon_steel": 7.85e-6}
+DIM_COLS = ["thickness_mm", "length_mm", "width_mm", "diameter_mm", "height_mm", "wall_mm"]
+
+# Vormnaam -> vormgroep; onbekende vormen rekenen als plaat (t x L x W), zoals voorheen
+FORMS: Dict[str, str] = {
+    "sheet": "plate", "plate": "plate", "plaat": "plate",
+    "bar": "bar", "staf": "bar", "round": "bar", "rod": "bar",
+    "tube": "tube", "pipe": "tube", "buis": "tube",
+    "block": "block", "blok": "block", "billet": "block",
+}
+REQUIRED: Dict[str, Tuple[str, ...]] = {
+    "plate": ("thickness_mm", "length_mm", "width_mm"),
+    "bar": ("diameter_mm", "length_mm"),
+    "tube": ("diameter_mm", "wall_mm", "length_mm"),
+    "block": ("length_mm", "width_mm", "height_mm"),
+}
+_EN = r"\b(\d\.\d{4})\b"  # EN-werkstofnummer, bv. 1.4404
+
+def infer_family_from_grade(grade: str) -> str:
+    g = (grade or "").lower()
+    if "1.44" in g or "2205" in g or "s31803" in g or "s32205" in g: return "duplex"
+    if any(k in g for k in ["304", "316", "1.43", "1.45"]): return "stainless"
+    if any(k in g for k in ["6082", "6061", "5754", "1050", "alu", "aluminium"]): return "aluminum"
+    return "carbon_steel"
+
+def _num(df: pd.DataFrame, col: str) -> np.ndarray:
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+
+def _str(df: pd.DataFrame, col: str) -> pd.Series:
+    s = df[col] if col in df.columns else pd.Series("", index=df.index)
+    return s.fillna("").astype(str).str.strip()
+
+def _key(df: pd.DataFrame, col: str) -> pd.Series:
+    """Als _str, maar een numeriek ingelezen en_number weer met 4 decimalen (1.057 -> '1.0570')."""
+    if col == "en_number" and pd.api.types.is_numeric_dtype(df[col]):
+        return df[col].map(lambda v: f"{v:.4f}" if v == v else "")
+    return _str(df, col)
+
+def _codes(df: pd.DataFrame, cols: Sequence[str]) -> Tuple[np.ndarray, pd.DataFrame]:
+    """Unieke combinaties van tekstkolommen: (code per rij, tabel met de unieke waarden, gestript)."""
+    if len(df) == 0:
+        return np.zeros(0, dtype=np.int64), pd.DataFrame({c: pd.Series(dtype=str) for c in cols})
+    sub = pd.DataFrame({c: (df[c] if c in df.columns else pd.Series("", index=df.index)) for c in cols})
+    sub = sub.astype(object).where(sub.notna(), "")
+    codes = sub.groupby(list(cols), sort=False).ngroup().to_numpy()
+    uniq = sub.drop_duplicates().reset_index(drop=True)
+    return codes, pd.DataFrame({c: _str(uniq, c) for c in cols})
+
+def volumes(parts: pd.DataFrame) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Volume (mm³) per rij, vormgroep en ontbrekende maten per rij ("" = compleet).
+    Buis: wanddikte uit wall_mm, anders thickness_mm; blok: hoogte uit height_mm, anders thickness_mm.
+    Staf zonder diameter of lengte valt terug op t x L x W (vormgroep wordt dan "plate").
+    """
+    d = {c: _num(parts, c) for c in DIM_COLS}
+    d["wall_mm"] = np.where(np.isnan(d["wall_mm"]), d["thickness_mm"], d["wall_mm"])
+    d["height_mm"] = np.where(np.isnan(d["height_mm"]), d["thickness_mm"], d["height_mm"])
+    codes, forms = _codes(parts, ["form"])
+    group = forms["form"].str.lower().map(FORMS).fillna("plate").to_numpy(dtype=object)[codes]
+    # staf zonder diameter/lengte maar met t x L x W: als plaat rekenen (zoals de oude mass_kg)
+    as_plate = (group == "bar") & ~((d["diameter_mm"] > 0) & (d["length_mm"] > 0)) \
+        & np.logical_and.reduce([d[c] > 0 for c in REQUIRED["plate"]])
+    group[as_plate] = "plate"
+    pos = {c: np.nan_to_num(v, nan=0.0).clip(min=0.0) for c, v in d.items()}
+    t, L, W, D, H, wall = (pos[c] for c in DIM_COLS[:4] + ["height_mm", "wall_mm"])
+    inner = np.clip(D - 2.0 * wall, 0.0, None)
+    vol = np.select(
+        [group == "bar", group == "tube", group == "block"],
+        [np.pi / 4.0 * D ** 2 * L, np.pi / 4.0 * (D ** 2 - inner ** 2) * L, L * W * H],
+        default=t * L * W,
+    )
+    missing = np.full(len(parts), "", dtype=object)
+    for g, cols in REQUIRED.items():
+        bad = np.column_stack([(group == g) & ~(d[c] > 0) for c in cols])
+        rows = np.flatnonzero(bad.any(axis=1))
+        missing[rows] = [", ".join(c for c, b in zip(cols, r) if b) for r in bad[rows]]
+    return vol, group, missing
+
+def densities(parts: pd.DataFrame, materials: Optional[pd.DataFrame] = None) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Dichtheid (kg/mm³) en bron per rij. Volgorde: material_id, grade (exact), EN-nummer in de grade
+    (bv. '1.4404 (316L)'), grade tussen haakjes; anders de familie-schatting.
+    Gerekend per unieke (material_id, grade, familie), daarna teruggezet per rij.
+    """
+    codes, u = _codes(parts, ["material_id", "material_grade", "material_family"])
+    rho = np.full(len(u), np.nan)
+    src = np.full(len(u), "family", dtype=object)
+    if materials is not None and len(materials) and "density_kg_per_m3" in materials.columns:
+        m = materials.assign(_rho=pd.to_numeric(materials["density_kg_per_m3"], errors="coerce") * 1e-9)
+        m = m[m["_rho"] > 0]
+        grade = u["material_grade"]
+        probes = [
+            ("material_id", u["material_id"], "material_id"),
+            ("grade", grade, "grade"),
+            ("en_number", grade.str.extract(_EN, expand=False).fillna(""), "en_number"),
+            ("grade", grade.str.extract(r"\(([^)]*)\)", expand=False).fillna("").str.strip(), "grade"),
+        ]
+        for col, keys, label in probes:
+            if col not in m.columns:
+                continue
+            lut = m.assign(_k=_key(m, col).str.casefold()).drop_duplicates("_k").set_index("_k")["_rho"]
+            lut = lut[lut.index != ""]
+            hit = keys.str.casefold().map(lut).to_numpy(dtype="float64")
+            take = np.isnan(rho) & ~np.isnan(hit)
+            rho[take] = hit[take]
+            src[take] = label
+    fam = u["material_family"].str.lower()
+    fam = fam.where(fam != "", u["material_grade"].map(infer_family_from_grade))
+    guess = fam.map(DENSITY_KG_PER_MM3).fillna(7.85e-6).to_numpy(dtype="float64")
+    return np.where(np.isnan(rho), guess, rho)[codes], src[codes]
+
+def mass_table(items: Any, materials: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+    """
+    Alle items in één keer: volume_mm3, density_kg_m3, density_source, mass_kg, geometry_ok, missing_dims.
+    items mag een lijst dicts (bom_current.json) of een DataFrame zijn; de rijvolgorde blijft gelijk.
+    """
+    parts = items if isinstance(items, pd.DataFrame) else pd.DataFrame(list(items))
+    vol, group, missing = volumes(parts)
+    rho, src = densities(parts, materials)
+    return pd.DataFrame({
+        "form_group": group, "volume_mm3": vol, "density_kg_m3": rho * 1e9, "density_source": src,
+        "mass_kg": vol * rho, "geometry_ok": missing == "", "missing_dims": missing,
+    }, index=parts.index)
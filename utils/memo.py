@@ -0,0 +1,53 @@
+# utils/memo.py
+# Begrensde LRU-memo voor scenario-uitkomsten, bedoeld om in st.session_state over reruns
+# heen te leven. Keys zijn inhoudshashes van frames plus de scenarioparameters, dus een
+# ongewijzigd scenario wordt niet opnieuw doorgerekend (ook niet na MC uit/aan).
+from __future__ import annotations
+import hashlib
+from collections import OrderedDict
+from typing import Any, Callable, Hashable
+import pandas as pd
+
+from .io import content_hash
+
+def frame_key(df: Any) -> str:
+    """Inhoudshash van een DataFrame (of iets dat er één wordt, zoals een lijst records)."""
+    d = df if isinstance(df, pd.DataFrame) else pd.DataFrame(df)
+    try:
+        return content_hash(d)
+    except TypeError:  # onhashbare cellen (lijsten/dicts): via JSON
+        return hashlib.sha1(d.to_json(orient="split", default_handler=str).encode("utf-8")).hexdigest()
+
+class LRUMemo:
+    """get_or_compute(key, fn): cache-hit verplaatst naar achteren, bij overloop gaat de oudste eruit."""
+
+    def __init__(self, maxsize: int = 256):
+        self.maxsize = int(maxsize)
+        self._data: "OrderedDict[Hashable, Any]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    def __contains__(self, key: Hashable) -> bool:
+        return key in self._data
+
+    def get_or_compute(self, key: Hashable, fn: Callable[[], Any]) -> Any:
+        if key in self._data:
+            self.hits += 1
+            self._data.move_to_end(key)
+            return self._data[key]
+        self.misses += 1
+        value = fn()
+        self._data[key] = value
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+        return value
+
+    def clear(self) -> None:
+        self._data.clear()
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        return {"entries": len(self._data), "hits": self.hits, "misses": self.misses}
@@ -0,0 +1,222 @@
+# utils/montecarlo.py
+# Monte-Carlo op de routing-kostprijs: alle verstoringen als (iteraties x stappen)-matrices,
+# in vaste chunks (begrensd geheugen) over threads verdeeld. Elke chunk heeft een eigen
+# SeedSequence-stroom, dus dezelfde seed geeft dezelfde samples, los van het aantal workers.
+from __future__ import annotations
+import os, time, warnings
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterable, Iterator, Mapping, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .sketch import QuantileSketch
+from .routing import LABOR, MAX_SCRAP, buy_cost_pc, lean_cost_pc, routing_arrays, unit_cost
+
+CHUNK = 65_536  # iteraties per chunk (~CHUNK x stappen x 8 bytes per matrix)
+METHODS = ("random", "sobol", "lhs")
+QUANTILES = (50, 80, 95)
+
+try:  # optioneel: Sobol + exacte normale inverse; zonder scipy valt sobol terug op lhs
+    from scipy.stats import qmc as _qmc
+    from scipy.special import ndtri as _ndtri
+except Exception:
+    _qmc = _ndtri = None
+
+# Acklam-benadering van de inverse standaardnormale verdeling (rel. fout ~1e-9)
+_A = (-3.969683028665376e+01, 2.209460984245205e+02, -2.759285104469687e+02,
+      1.383577518672690e+02, -3.066479806614716e+01, 2.506628277459239e+00)
+_B = (-5.447609879822406e+01, 1.615858368580409e+02, -1.556989798598866e+02,
+      6.680131188771972e+01, -1.328068155288572e+01)
+_C = (-7.784894002430293e-03, -3.223964580411365e-01, -2.400758277161838e+00,
+      -2.549732539343734e+00, 4.374664141464968e+00, 2.938163982698783e+00)
+_D = (7.784695709041462e-03, 3.224671290700398e-01, 2.445134137142996e+00, 3.754408661907416e+00)
+
+def norm_ppf(u: np.ndarray) -> np.ndarray:
+    """Inverse CDF van N(0,1) voor u in (0,1)."""
+    if _ndtri is not None:
+        return _ndtri(u)
+    u = np.clip(np.asarray(u, dtype="float64"), 1e-12, 1 - 1e-12)
+    out = np.empty_like(u)
+    lo, hi = u < 0.02425, u > 1 - 0.02425
+    mid = ~(lo | hi)
+    q = u[mid] - 0.5; r = q * q
+    out[mid] = ((((((_A[0] * r + _A[1]) * r + _A[2]) * r + _A[3]) * r + _A[4]) * r + _A[5]) * q
+                / (((((_B[0] * r + _B[1]) * r + _B[2]) * r + _B[3]) * r + _B[4]) * r + 1))
+    for mask, sign, v in ((lo, 1.0, u[lo]), (hi, -1.0, 1 - u[hi])):
+        q = np.sqrt(-2 * np.log(v))
+        out[mask] = sign * ((((((_C[0] * q + _C[1]) * q + _C[2]) * q + _C[3]) * q + _C[4]) * q + _C[5])
+                            / ((((_D[0] * q + _D[1]) * q + _D[2]) * q + _D[3]) * q + 1))
+    return out
+
+def _uniforms(method: str, n: int, d: int, start: int, rng: np.random.Generator, scramble_seed: int) -> np.ndarray:
+    if method == "sobol" and _qmc is not None:
+        eng = _qmc.Sobol(d, scramble=True, seed=scramble_seed)
+        if start:
+            eng.fast_forward(start)
+        with warnings.catch_warnings():  # blokken hoeven geen macht van 2 te zijn
+            warnings.simplefilter("ignore")
+            return np.clip(eng.random(n), 1e-12, 1 - 1e-12)
+    # Latin hypercube: per dimensie één punt per stratum, strata willekeurig gepermuteerd
+    u = (rng.permuted(np.tile(np.arange(n), (d, 1)), axis=1).T + rng.random((n, d))) / n
+    return np.clip(u, 1e-12, 1 - 1e-12)
+
+def _normals(method: str, n: int, k: int, rng: np.random.Generator, start: int, scramble_seed: int):
+    if method == "random":
+        return rng.standard_normal((n, k)), rng.standard_normal((n, k)), rng.standard_normal(n)
+    z = norm_ppf(_uniforms(method, n, 2 * k + 1, start, rng, scramble_seed))
+    return z[:, :k], z[:, k:2 * k], z[:, 2 * k]
+
+def _chunk_costs(steps: Dict[str, np.ndarray], netkg: float, price: float, energy: float,
+                 sd_cycle: float, sd_price: float, sd_scrap: float, n: int,
+                 ss: np.random.SeedSequence, method: str = "random", start: int = 0) -> np.ndarray:
+    rng = np.random.default_rng(ss)
+    k = len(steps["cycle_min"])
+    zc, zs, zp = _normals(method, n, k, rng, start, int(ss.entropy % (2 ** 32)))
+    cyc = steps["cycle_min"] * np.maximum(1.0 + sd_cycle * zc, 0.0)
+    scr = np.clip(steps["scrap"] + sd_scrap * zs, 0.0, MAX_SCRAP)
+    prc = price * np.maximum(1.0 + sd_price * zp, 0.0)
+    core = unit_cost(steps, netkg, prc, energy, cycle_min=cyc, scrap=scr)
+    return core["mat_pc"] + core["conv_total"]
+
+def _chunk_seed(root: np.random.SeedSequence, i: int) -> np.random.SeedSequence:
+    # gelijk aan root.spawn(...)[i], maar zonder alle voorgaande kinderen te maken
+    return np.random.SeedSequence(root.entropy, spawn_key=root.spawn_key + (i,))
+
+def _imap_window(ex: Optional[ThreadPoolExecutor], fn: Callable, args: Iterable, window: int) -> Iterator[Any]:
+    """Als ex.map (zelfde volgorde), maar met hooguit `window` chunks tegelijk onderweg."""
+    if ex is None:
+        yield from (fn(a) for a in args)
+        return
+    pending: deque = deque()
+    for a in args:
+        pending.append(ex.submit(fn, a))
+        if len(pending) >= window:
+            yield pending.popleft().result()
+    while pending:
+        yield pending.popleft().result()
+
+def simulate(steps: Dict[str, np.ndarray], netkg: float, price: float, energy: float,
+             sd_cycle: float, sd_price: float, sd_scrap: float, iters: int,
+             seed: Any = None, chunk: int = CHUNK, workers: Optional[int] = None,
+             method: str = "random", first_chunk: int = 0,
+             sink: Optional[QuantileSketch] = None, offset: float = 0.0) -> np.ndarray:
+    """
+    Kern van run_mc op voorbereide stap-arrays (zie routing_arrays). Geeft materiaal + conversie
+    per stuk als array van lengte `iters`. NumPy laat de GIL los in RNG en ufuncs,
+    dus threads benutten meerdere cores zonder pickling van de routing.
+    method: "random" (pseudo-random), "sobol" (gescrambled, vraagt scipy) of "lhs" (Latin hypercube).
+    first_chunk laat een vervolgrun verder gaan in dezelfde stromen/Sobol-reeks.
+    Met `sink` gaat elke chunk (+ offset) in de sketch en wordt er niets bewaard (lege array terug);
+    er staan dan hooguit 2 x workers chunks tegelijk open, dus geheugen los van `iters`.
+    """
+    if method not in METHODS:
+        raise ValueError(f"onbekende methode '{method}', kies uit {METHODS}")
+    root = seed if isinstance(seed, np.random.SeedSequence) else np.random.SeedSequence(seed)
+    iters = int(iters)
+    sizes = [min(chunk, iters - i) for i in range(0, iters, chunk)]
+    args = ((steps, netkg, price, energy, sd_cycle, sd_price, sd_scrap, n,
+             _chunk_seed(root, first_chunk + j), method, (first_chunk + j) * chunk)
+            for j, n in enumerate(sizes))
+    workers = max(1, min(workers or os.cpu_count() or 1, len(sizes)))
+    ex = ThreadPoolExecutor(max_workers=workers) if workers > 1 else None
+    try:
+        parts = _imap_window(ex, lambda a: _chunk_costs(*a), args, 2 * workers)
+        if sink is not None:
+            for part in parts:  # in chunk-volgorde: zelfde seed -> zelfde sketch
+                sink.update(part + offset)
+            return np.zeros(0)
+        parts = list(parts)
+    finally:
+        if ex:
+            ex.shutdown()
+    return np.concatenate(parts) if parts else np.zeros(0)
+
+def run_mc(routing: pd.DataFrame, bom: pd.DataFrame, Q: float, netkg: float, price: float,
+           sd_cycle: float = 0.08, sd_price: float = 0.08, sd_scrap: float = 0.01, iters: int = 1000,
+           energy: float = 0.0, labor: float = LABOR, mrates: Optional[Mapping[str, float]] = None,
+           storage_days: float = 0.0, storage_cost: float = 0.0, km: float = 0.0, eur_km: float = 0.0,
+           rework: float = 0.0, rework_min: float = 0.0, seed: Optional[int] = None,
+           chunk: int = CHUNK, workers: Optional[int] = None, method: str = "random",
+           sketch: bool = False) -> Any:
+    """
+    Kostprijs per stuk (total_pc) over `iters` trekkingen. sd_cycle/sd_price zijn relatief
+    (0.08 = 8%), sd_scrap absoluut op Scrap_pct. Zelfde seed -> zelfde samples.
+    Met sketch=True komt er een QuantileSketch terug (constant geheugen) i.p.v. de samples.
+    """
+    steps = routing_arrays(routing, Q, labor, mrates)
+    fixed = lean_cost_pc(Q, labor, storage_days, storage_cost, km, eur_km, rework, rework_min) + buy_cost_pc(bom)
+    if sketch:
+        sk = QuantileSketch()
+        simulate(steps, netkg, price, energy, sd_cycle, sd_price, sd_scrap, iters, seed, chunk, workers, method,
+                 sink=sk, offset=fixed)
+        return sk
+    samples = simulate(steps, netkg, price, energy, sd_cycle, sd_price, sd_scrap, iters, seed, chunk, workers, method)
+    return samples + fixed
+
+def quantile_ci(samples: np.ndarray, q: float, z: float = 1.96) -> Tuple[float, float, float]:
+    """Schatting + verdelingsvrij betrouwbaarheidsinterval via orde-statistieken (binomiaal)."""
+    x = np.sort(samples) if not _is_sorted(samples) else samples
+    lo, hi = _ci_ranks(len(x), q, z)
+    return float(np.percentile(x, q)), float(x[lo]), float(x[hi])
+
+def sketch_ci(sketch: QuantileSketch, q: float, z: float = 1.96) -> Tuple[float, float, float]:
+    """Als quantile_ci, maar de orde-statistieken komen uit de sketch (geen samples nodig)."""
+    n = sketch.count
+    lo, hi = _ci_ranks(n, q, z)
+    est, x_lo, x_hi = sketch.quantile([q / 100.0, (lo + 0.5) / n, (hi + 0.5) / n])
+    return float(est), float(x_lo), float(x_hi)
+
+def _ci_ranks(n: int, q: float, z: float) -> Tuple[int, int]:
+    p = q / 100.0
+    half = z * np.sqrt(n * p * (1 - p))
+    return int(max(np.floor(n * p - half), 0)), int(min(np.ceil(n * p + half), n - 1))
+
+def _is_sorted(x: np.ndarray) -> bool:
+    return len(x) < 2 or bool(np.all(x[1:] >= x[:-1]))
+
+def run_mc_adaptive(routing: pd.DataFrame, bom: pd.DataFrame, Q: float, netkg: float, price: float,
+                    sd_cycle: float = 0.08, sd_price: float = 0.08, sd_scrap: float = 0.01,
+                    energy: float = 0.0, labor: float = LABOR, mrates: Optional[Mapping[str, float]] = None,
+                    storage_days: float = 0.0, storage_cost: float = 0.0, km: float = 0.0, eur_km: float = 0.0,
+                    rework: float = 0.0, rework_min: float = 0.0, seed: Optional[int] = None,
+                    method: str = "sobol", tol: float = 0.002, block: int = 4096,
+                    min_iters: int = 4096, max_iters: int = 1_000_000, time_budget_s: float = 5.0,
+                    quantiles: Tuple[int, ...] = QUANTILES, keep_samples: bool = False) -> Dict[str, Any]:
+    """
+    Draait run_mc in blokken tot de CI-halfbreedte van elke gevraagde quantile binnen `tol`
+    (relatief, 0.002 = 0,2%) valt, of tot max_iters / time_budget_s bereikt is.
+    Elk blok gaat alleen in de sketch (constant geheugen); CI's komen uit de sketch (sketch_ci).
+    Geeft sketch, iters, converged, reason, seconds en per quantile (schatting, ondergrens, bovengrens);
+    met keep_samples=True ook de ruwe samples (geheugen groeit dan met iters).
+    """
+    t0 = time.perf_counter()
+    steps = routing_arrays(routing, Q, labor, mrates)
+    fixed = lean_cost_pc(Q, labor, storage_days, storage_cost, km, eur_km, rework, rework_min) + buy_cost_pc(bom)
+    root = np.random.SeedSequence(seed)
+    sk = QuantileSketch()
+    parts, n, j = [], 0, 0
+    reason, ci = "max_iters", {}
+    while n < max_iters:
+        size = min(block, max_iters - n)
+        x = simulate(steps, netkg, price, energy, sd_cycle, sd_price, sd_scrap, size,
+                     root, chunk=block, workers=1, method=method, first_chunk=j) + fixed
+        sk.update(x)
+        if keep_samples:
+            parts.append(x)
+        n += size; j += 1
+        if n < min_iters:
+            continue
+        ci = {q: sketch_ci(sk, q) for q in quantiles}
+        if all(hi - lo <= 2 * tol * abs(est) for est, lo, hi in ci.values()):
+            reason = "converged"; break
+        if time.perf_counter() - t0 > time_budget_s:
+            reason = "time_budget"; break
+    if not ci and sk.count:
+        ci = {q: sketch_ci(sk, q) for q in quantiles}
+    out = {"sketch": sk, "iters": int(n), "converged": reason == "converged", "reason": reason,
+           "method": method if (method != "sobol" or _qmc is not None) else "lhs",
+           "seconds": round(time.perf_counter() - t0, 4), "quantiles": ci}
+    if keep_samples:
+        out["samples"] = np.concatenate(parts) if parts else np.zeros(0)
+    return out
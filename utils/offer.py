@@ -0,0 +1,138 @@
+# utils/offer.py
+# Offerte-rekenregels voor bom_current.json-items (gedeeld door de offerte-pages en tools/batch_quote.py).
+# Bewust zonder Streamlit-import zodat dit ook headless draait.
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Sequence
+import numpy as np
+import pandas as pd
+
+from .io import load_materials, paths
+from .mass import DENSITY_KG_PER_MM3, infer_family_from_grade, mass_table
+from .prices import price_index
+from .rates import as_ns, rate_resolver
+
+# Kolommen die de offerte-regels gebruiken (projectie bij het inlezen)
+PRICE_COLUMNS = ["grade", "form", "region", "unit", "price", "as_of_date"]
+RATE_COLUMNS = ["process", "country", "rate_min", "rate_max", "as_of_date"]
+
+# Standaard staffel-aantallen voor offertes
+BREAK_QTYS = (1, 10, 50, 100, 500, 1000)
+# (setup_min, cycle_min) per proces; onbekend -> (5, 0.30)
+PROC_MINUTES = {"laser": (5, 0.43), "bend": (8, 0.50), "tig": (10, 0.60), "cnc_mill": (12, 1.20), "cnc_turn": (10, 1.00)}
+# Tariefkeuze per proces: "smart" = map_rate_for_process (DOCX-offerte, batch_quote);
+# "classic" = vaste keywords van de Markdown-offerte (laser/buigen op het CNC-freestarief).
+RATE_MAPPINGS = ("smart", "classic")
+CLASSIC_RATE_KEYWORDS = {"laser": "CNC milling", "bend": "CNC milling", "tig": "TIG",
+                         "cnc_mill": "CNC milling", "cnc_turn": "CNC"}
+
+def mass_kg(part: Dict[str, Any], materials: Optional[pd.DataFrame] = None) -> float:
+    """Eén item; voor hele BOM's mass_table() gebruiken (één bulk-stap)."""
+    return float(mass_table([part], materials)["mass_kg"].iloc[0])
+
+def _materials(materials: Optional[pd.DataFrame]) -> Optional[pd.DataFrame]:
+    """materials_db voor exacte dichtheden; zonder bestand valt mass_table terug op de familie-schatting."""
+    if materials is None and paths()["materials"].exists():
+        return load_materials()
+    return materials
+
+def latest_material_price(df: pd.DataFrame, grade: str, region: str = "EU", unit: str = "€/kg",
+                          as_of: Any = None, form: Optional[str] = None) -> float:
+    """Laatste prijs (of die op datum as_of) via de gecachte PriceIndex; lege region/unit/form = alles."""
+    if df is None or df.empty: return 0.0
+    return price_index(df).as_of(grade, as_of, form=form, region=region, unit=unit)
+
+def midpoint_rate(df: pd.DataFrame, process_kw: str, country: str = "Netherlands") -> float:
+    """Midden van min/max voor een proces-keyword (landrijen eerst, laatste datum). Resultaat in €/min."""
+    if df is None or df.empty: return 1.0 / 60.0
+    return rate_resolver(df).midpoint(process_kw, country)
+
+def map_rate_for_process(df_rates: pd.DataFrame, proc_name: str, as_of: Any = None) -> float:
+    """Slimmere mapping: direct proces als het bestaat, anders beste alternatief (zie utils.rates)."""
+    return rate_resolver(df_rates).rate(proc_name, as_of=as_of)
+
+def _rate_fn(rates: Any, mapping: str, as_of: Any):
+    """proces -> €/min volgens de gekozen mapping (zie RATE_MAPPINGS)."""
+    if mapping not in RATE_MAPPINGS:
+        raise ValueError(f"Onbekende tariefmapping {mapping!r}; kies uit {RATE_MAPPINGS}")
+    if mapping == "classic":
+        t = as_ns(as_of)
+        return lambda proc: rates.midpoint(CLASSIC_RATE_KEYWORDS.get(proc.lower(), proc), t=t)
+    return lambda proc: rates.rate(proc, as_of=as_of)
+
+def est_minutes(part: Dict[str, Any], proc: str) -> float:
+    q = max(1, int(part.get("qty", 1)))
+    setup, cycle = PROC_MINUTES.get(proc.strip().lower(), (5, 0.30))
+    return (setup / q) + cycle
+
+def cost_items(items: List[Dict[str, Any]], df_prices: pd.DataFrame, df_rates: pd.DataFrame,
+               as_of: Any = None, materials: Optional[pd.DataFrame] = None,
+               rate_mapping: str = "smart") -> List[Dict[str, Any]]:
+    """Kostprijs per bom_current.json-item (prijspeil as_of, standaard de laatste prijs); keys volgen templates/offerte_v1.md.j2."""
+    prices, rate = price_index(df_prices), _rate_fn(rate_resolver(df_rates), rate_mapping, as_of)
+    masses = mass_table(items, _materials(materials))
+    rows = []
+    for p, m_kg, rho_src, geo_ok in zip(items, masses["mass_kg"].tolist(), masses["density_source"].tolist(),
+                                        masses["geometry_ok"].tolist()):
+        grade = p.get("material_grade", "")
+        fam = p.get("material_family") or infer_family_from_grade(grade)
+        eur_per_kg = prices.as_of(grade, as_of)
+        mat_eur_pc = m_kg * eur_per_kg
+
+        proc_detail = []; proc_cost_pc = 0.0
+        for proc in [x.strip() for x in (p.get("processes") or [])]:
+            r = rate(proc)
+            minutes = est_minutes(p, proc)
+            cost_pc = minutes * r
+            proc_cost_pc += cost_pc
+            proc_detail.append({"proc": proc, "rate_eur_min": round(r, 2),
+                                "minutes": round(minutes, 2), "cost_eur": round(cost_pc, 2)})
+
+        total_pc = mat_eur_pc + proc_cost_pc
+        rows.append({
+            "item_code": p.get("item_code", "?"),
+            "qty": int(p.get("qty", 1)),
+            "grade": grade,
+            "family": fam,
+            "mass_kg_per_pc": round(m_kg, 4),
+            "eur_per_kg": round(eur_per_kg, 4),
+            "material_eur_pc": round(mat_eur_pc, 2),
+            "proc_eur_pc": round(proc_cost_pc, 2),
+            "total_eur_pc": round(total_pc, 2),
+            "proc_detail": proc_detail,
+            "density_source": rho_src,
+            "geometry_ok": geo_ok,
+        })
+    return rows
+
+def parse_qtys(text: str, default: Sequence[int] = BREAK_QTYS) -> List[int]:
+    """'1, 10; 50' -> [1, 10, 50] (uniek, oplopend); niets bruikbaars -> default."""
+    vals = {int(x) for x in str(text or "").replace(";", ",").split(",") if x.strip().isdigit()}
+    return sorted(v for v in vals if v > 0) or list(default)
+
+def quantity_curve(items: List[Dict[str, Any]], df_prices: pd.DataFrame, df_rates: pd.DataFrame,
+                   qtys: Sequence[float] = BREAK_QTYS, as_of: Any = None,
+                   materials: Optional[pd.DataFrame] = None, rate_mapping: str = "smart") -> pd.DataFrame:
+    """
+    Staffelprijzen in één broadcast (items x aantallen): per item vaste €/pc (materiaal + cyclus)
+    plus setup-€ gedeeld door de seriegrootte qty x Q (zelfde regel als est_minutes).
+    Q = aantal assemblies; bij Q=1 is price_pc gelijk aan de som van qty x total_eur_pc uit cost_items.
+    """
+    Q = np.maximum(np.asarray(qtys, dtype="float64"), 1.0)
+    prices, rate = price_index(df_prices), _rate_fn(rate_resolver(df_rates), rate_mapping, as_of)
+    mass = mass_table(items, _materials(materials))["mass_kg"].to_numpy()
+    fixed, setup, qty = np.zeros(len(items)), np.zeros(len(items)), np.ones(len(items))
+    for i, p in enumerate(items):
+        qty[i] = int(p.get("qty", 1))
+        fixed[i] = mass[i] * prices.as_of(p.get("material_grade", ""), as_of)
+        for proc in [x.strip() for x in (p.get("processes") or [])]:
+            r = rate(proc)
+            s_min, c_min = PROC_MINUTES.get(proc.lower(), (5, 0.30))
+            fixed[i] += c_min * r
+            setup[i] += s_min * r
+    run = np.maximum(np.floor(qty[:, None] * Q[None, :]), 1.0)  # (items, Q)
+    unit = fixed[:, None] + setup[:, None] / run
+    price_pc = qty @ unit if len(items) else np.zeros(len(Q))
+    out = pd.DataFrame({"qty": Q.astype(np.int64), "price_pc": price_pc.round(2), "total": (price_pc * Q).round(2)})
+    base = price_pc[0] if len(price_pc) else 0.0
+    out["discount_pct"] = ((1.0 - price_pc / base) * 100.0).round(1) if base > 0 else 0.0
+    return out
@@ -0,0 +1,91 @@
+# utils/prices.py
+# Opzoekindex voor material_prices.csv: genormaliseerde (grade, form, region, unit) -> datum-gesorteerde
+# arrays. "Laatste prijs" en "prijs per datum X" zijn daarna een dict-lookup + binair zoeken,
+# i.p.v. kopiëren/filteren/sorteren van het hele frame per BOM-item.
+from __future__ import annotations
+from itertools import product
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .io import content_hash, load_material_prices
+
+KEY_COLS = ("grade", "form", "region", "unit")
+ANY = "*"  # wildcard: dit deel van de key niet filteren
+_NAT = np.iinfo(np.int64).min  # prijzen zonder datum tellen als oudste
+
+def norm(v: Any) -> str:
+    """Zelfde vergelijking als voorheen (hoofdletterongevoelig), plus spaties gladgestreken."""
+    return " ".join(str(v if v is not None and v == v else "").split()).casefold()
+
+class PriceIndex:
+    """
+    Eén keer per bestandsversie gebouwd (zie price_index). Datums (int64 ns) en prijzen staan
+    oplopend op datum; per key-patroon (form/region/unit mogen wildcard zijn) een dict key -> rij-indexen.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        d = pd.DataFrame(df)
+        keys = pd.DataFrame({c: (d[c].map(norm) if c in d.columns else "") for c in KEY_COLS}, index=d.index)
+        dates = pd.to_datetime(d.get("as_of_date", pd.Series(pd.NaT, index=d.index)), errors="coerce")
+        dates = dates.to_numpy(dtype="datetime64[ns]").view(np.int64)  # NaT == _NAT
+        price = pd.to_numeric(d.get("price", pd.Series(np.nan, index=d.index)), errors="coerce").to_numpy(dtype="float64")
+        order = np.argsort(dates, kind="stable")  # gelijke datum: laatste rij in het bestand wint
+        keys, self._dates, self._price = keys.iloc[order].reset_index(drop=True), dates[order], price[order]
+        self._groups: Dict[Tuple[bool, ...], Dict[Tuple[str, ...], np.ndarray]] = {}
+        for wild in product((False, True), repeat=3):
+            k = keys.assign(**{c: ANY for c, w in zip(KEY_COLS[1:], wild) if w})
+            self._groups[wild] = k.groupby(list(KEY_COLS), sort=False).indices
+        self._memo: Dict[Tuple[Any, ...], int] = {}
+        self.rows = len(d)
+
+    def _series(self, grade: str, form: Optional[str], region: Optional[str], unit: Optional[str]) -> Optional[np.ndarray]:
+        parts = (form, region, unit)
+        wild = tuple(not p for p in parts)
+        key = (norm(grade),) + tuple(ANY if w else norm(p) for p, w in zip(parts, wild))
+        return self._groups[wild].get(key)
+
+    def as_of(self, grade: str, date: Any = None, form: Optional[str] = None, region: Optional[str] = "EU",
+              unit: Optional[str] = "€/kg", default: float = 0.0) -> float:
+        """
+        Prijs die op `date` gold (laatste met as_of_date <= date); date=None -> laatste prijs.
+        Ligt date vóór de eerste prijs, dan geldt de oudste (niet 0); `default` alleen als de grade ontbreekt.
+        """
+        key = (grade, date, form, region, unit)
+        pos_row = self._memo.get(key)
+        if pos_row is None:
+            idx = self._series(grade, form, region, unit)
+            if idx is None:
+                pos_row = -1
+            elif date is None:
+                pos_row = int(idx[-1])
+            else:
+                t = pd.Timestamp(date).to_datetime64().astype("datetime64[ns]").view(np.int64)
+                pos = int(np.searchsorted(self._dates[idx], t, side="right")) - 1
+                pos_row = int(idx[max(pos, 0)])  # vóór de eerste datum: oudste prijs (zoals RateResolver)
+            self._memo[key] = pos_row  # rij-index per ruwe vraag (BOM's herhalen dezelfde grades)
+        return float(self._price[pos_row]) if pos_row >= 0 else default
+
+    def latest(self, grade: str, form: Optional[str] = None, region: Optional[str] = "EU",
+               unit: Optional[str] = "€/kg", default: float = 0.0) -> float:
+        return self.as_of(grade, None, form, region, unit, default)
+
+    def history(self, grade: str, form: Optional[str] = None, region: Optional[str] = "EU",
+                unit: Optional[str] = "€/kg") -> pd.DataFrame:
+        idx = self._series(grade, form, region, unit)
+        idx = np.zeros(0, dtype=np.int64) if idx is None else idx
+        return pd.DataFrame({"as_of_date": self._dates[idx].view("datetime64[ns]"), "price": self._price[idx]})
+
+_PRICE_CACHE: Dict[str, PriceIndex] = {}
+_PRICE_CACHE_MAX = 8
+
+def price_index(df: Optional[pd.DataFrame] = None) -> PriceIndex:
+    """Gecachte PriceIndex per inhoud (dus per bestandsversie); zonder df: data/material_prices.csv."""
+    d = load_material_prices() if df is None else df
+    ck = content_hash(d)
+    idx = _PRICE_CACHE.get(ck)
+    if idx is None:
+        if len(_PRICE_CACHE) >= _PRICE_CACHE_MAX:
+            _PRICE_CACHE.pop(next(iter(_PRICE_CACHE)))
+        idx = _PRICE_CACHE[ck] = PriceIndex(d)
+    return idx
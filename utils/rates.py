@@ -0,0 +1,122 @@
+# utils/rates.py
+# Uurtarief-resolver voor labor_rates.csv: één keer genormaliseerd (proces, land, datum, midden €/min),
+# met een keyword -> procesnamen-index en een memo per (proces, land, datum). Een offerte met
+# duizenden regels doet zo één resolutie per uniek proces i.p.v. DataFrame-scans per regel.
+from __future__ import annotations
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import pandas as pd
+
+from .io import content_hash
+from .prices import norm
+
+DEFAULT_RATE = 1.0 / 60.0  # €/min als niets gevonden wordt (zoals voorheen)
+MIN_DIRECT = 0.02          # directe match telt pas boven dit tarief (anders is het de fallback)
+DEFAULT_COUNTRY = "Netherlands"
+
+# Canoniek proces -> aliassen (keywords in labor_rates.process)
+PROCESS_ALIASES: Dict[str, List[str]] = {
+    "laser": ["laser", "lasersnijden"],
+    "bend": ["bend", "buigen", "kantbank", "press brake"],
+    "tig": ["tig", "tig welding", "lassen tig"],
+    "cnc_mill": ["cnc mill", "cnc milling", "frezen"],
+    "cnc_turn": ["cnc turn", "cnc turning", "draaien"],
+}
+# Laatste redmiddel: deel van de procesnaam -> keyword
+FALLBACKS: List[Tuple[str, str]] = [("laser", "cnc milling"), ("bend", "cnc milling"), ("tig", "tig"),
+                                    ("mill", "cnc milling"), ("turn", "cnc turning")]
+
+def as_ns(as_of: Any) -> Optional[int]:
+    """Datum als int64 ns (zoals de datumkolom), None = laatste tarief."""
+    return None if as_of is None else int(pd.Timestamp(as_of).to_datetime64().astype("datetime64[ns]").view(np.int64))
+
+class RateResolver:
+    """
+    labor_rates.csv gecompileerd: per (procesnaam, land) rij-indexen oplopend op datum, het midden
+    (rate_min + rate_max) / 2 al in €/min. rate() volgt dezelfde aliasketen als map_rate_for_process.
+    """
+
+    def __init__(self, df: pd.DataFrame):
+        d = pd.DataFrame(df)
+        get = lambda c, fill: d[c] if c in d.columns else pd.Series(fill, index=d.index)
+        dates = pd.to_datetime(get("as_of_date", pd.NaT), errors="coerce").to_numpy(dtype="datetime64[ns]").view(np.int64)
+        mid = (pd.to_numeric(get("rate_min", np.nan), errors="coerce")
+               + pd.to_numeric(get("rate_max", np.nan), errors="coerce")).to_numpy(dtype="float64") / 2.0 / 60.0
+        order = np.argsort(dates, kind="stable")
+        self._dates, self._mid = dates[order], mid[order]
+        keys = pd.DataFrame({"process": get("process", "").map(norm).to_numpy()[order],
+                             "country": get("country", "").map(norm).to_numpy()[order]})
+        self.names: List[str] = list(pd.unique(keys["process"]))
+        self._by_name = keys.groupby("process", sort=False).indices
+        self._by_name_country = keys.groupby(["process", "country"], sort=False).indices
+        self._kw: Dict[str, Tuple[str, ...]] = {}
+        self._memo: Dict[Tuple[str, str, Optional[int]], float] = {}
+        self._raw: Dict[Tuple[Any, ...], float] = {}
+        self.lookups = 0  # aantal echte resoluties (memo-missers)
+
+    def names_for(self, keyword: str) -> Tuple[str, ...]:
+        """Procesnamen die het keyword bevatten (substring); per keyword één keer gezocht."""
+        kw = norm(keyword)
+        hit = self._kw.get(kw)
+        if hit is None:
+            hit = self._kw[kw] = tuple(n for n in self.names if kw in n)
+        return hit
+
+    def _pick(self, idx: np.ndarray, t: Optional[int]) -> Tuple[int, int]:
+        """(datum, rij) van de geldige rij op t; vóór de eerste datum geldt de oudste rij."""
+        if t is None:
+            pos = len(idx) - 1
+        else:
+            pos = max(int(np.searchsorted(self._dates[idx], t, side="right")) - 1, 0)
+        return int(self._dates[idx[pos]]), int(idx[pos])
+
+    def midpoint(self, keyword: str, country: str = DEFAULT_COUNTRY, t: Optional[int] = None) -> float:
+        """Midden-tarief (€/min) voor een keyword; rijen van `country` gaan voor als die er zijn."""
+        names = self.names_for(keyword)
+        if not names:
+            return DEFAULT_RATE
+        c = norm(country)
+        groups = [self._by_name_country[(n, c)] for n in names if (n, c) in self._by_name_country]
+        groups = groups or [self._by_name[n] for n in names]
+        _, row = max(self._pick(g, t) for g in groups)
+        return float(self._mid[row])
+
+    def rate(self, proc_name: str, country: str = DEFAULT_COUNTRY, as_of: Any = None) -> float:
+        """€/min voor een procesnaam uit de BOM, gememoized per (proces, land, datum)."""
+        raw = (proc_name, country, as_of)
+        hit = self._raw.get(raw)
+        if hit is not None:
+            return hit
+        t = as_ns(as_of)
+        key = (norm(proc_name), norm(country), t)
+        hit = self._memo.get(key)
+        if hit is None:
+            self.lookups += 1
+            hit = self._memo[key] = self._resolve(key[0], country, t)
+        self._raw[raw] = hit  # zelfde schrijfwijze: zonder normaliseren
+        return hit
+
+    def _resolve(self, p: str, country: str, t: Optional[int]) -> float:
+        for canon, kws in PROCESS_ALIASES.items():
+            if p == canon or any(p == k or p in k for k in kws):
+                for kw in [p] + kws:
+                    r = self.midpoint(kw, country, t)
+                    if r > MIN_DIRECT:
+                        return r
+        for part, kw in FALLBACKS:
+            if part in p:
+                return self.midpoint(kw, country, t)
+        return self.midpoint(p, country, t)
+
+_RATE_CACHE: Dict[str, RateResolver] = {}
+_RATE_CACHE_MAX = 8
+
+def rate_resolver(df: pd.DataFrame) -> RateResolver:
+    """Gecachte RateResolver per inhoud van labor_rates (dus per bestandsversie), inclusief memo."""
+    ck = content_hash(df)
+    r = _RATE_CACHE.get(ck)
+    if r is None:
+        if len(_RATE_CACHE) >= _RATE_CACHE_MAX:
+            _RATE_CACHE.pop(next(iter(_RATE_CACHE)))
+        r = _RATE_CACHE[ck] = RateResolver(df)
+    return r
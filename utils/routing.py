@@ -0,0 +1,169 @@
+# utils/routing.py
+# Kostprijs per stuk uit routing_df + bom_df (sessie-invoer van 01_Calculatie).
+# Eén gevectoriseerde kern (unit_cost) die zowel cost_once als de Monte-Carlo-engine gebruikt:
+# stap-parameters mogen een extra leidende as hebben (iteraties x stappen).
+from __future__ import annotations
+from typing import Any, Dict, Mapping, Optional
+import numpy as np
+import pandas as pd
+
+from .validators import ROUTING_SCHEMA, BOM_SCHEMA
+from .sketch import as_sketch
+
+ROUTING_COLS = list(ROUTING_SCHEMA.columns)
+BOM_COLS = list(BOM_SCHEMA.columns)
+
+# Standaardtarieven (€/h) per proces; LABOR = arbeid €/h, PROFIT/CONT = opslag verkoopprijs
+MACHINE_RATES: Dict[str, float] = {"CNC": 85.0, "Laser": 110.0, "Lassen": 55.0, "Buigen": 75.0,
+                                   "Montage": 40.0, "Casting": 65.0}
+LABOR = 45.0
+PROFIT = 0.12
+CONT = 0.05
+MAX_SCRAP = 0.35
+
+def _col(df: pd.DataFrame, col: str, default: float) -> np.ndarray:
+    if col not in df.columns:
+        return np.full(len(df), float(default))
+    v = pd.to_numeric(df[col], errors="coerce").to_numpy(dtype="float64", na_value=np.nan)
+    return np.where(np.isnan(v), float(default), v)
+
+def routing_arrays(routing: pd.DataFrame, Q: float, labor: float = LABOR,
+                   mrates: Optional[Mapping[str, float]] = None) -> Dict[str, np.ndarray]:
+    """
+    Routing als arrays per stap (één keer per scenario). Setup wordt per batch gerekend:
+    ceil(Q * Qty_per_parent / Batch_size) omstellingen, verdeeld over Q stuks.
+    """
+    r = pd.DataFrame(routing)
+    d = ROUTING_SCHEMA.defaults or {}
+    mrates = MACHINE_RATES if mrates is None else mrates
+    Q = max(float(Q or 1), 1.0)
+    qty = _col(r, "Qty_per_parent", d["Qty_per_parent"])
+    batch = np.maximum(_col(r, "Batch_size", d["Batch_size"]), 1.0)
+    procs = r["Proces"].astype(str) if "Proces" in r.columns else pd.Series([""] * len(r))
+    fallback = float(np.mean(list(mrates.values()))) if mrates else 0.0
+    return {
+        "qty": qty,
+        "cycle_min": _col(r, "Cycle_min", d["Cycle_min"]),
+        "setup_min_pc": _col(r, "Setup_min", d["Setup_min"]) * np.ceil(Q * qty / batch) / Q,
+        "attend": np.clip(_col(r, "Attend_pct", d["Attend_pct"]), 0.0, 100.0) / 100.0,
+        "kwh_pc": _col(r, "kWh_pc", d["kWh_pc"]),
+        "qa_min_pc": _col(r, "QA_min_pc", d["QA_min_pc"]),
+        "scrap": np.clip(_col(r, "Scrap_pct", d["Scrap_pct"]), 0.0, MAX_SCRAP),
+        "mrate": np.array([float(mrates.get(p, fallback)) for p in procs], dtype="float64"),
+        "labor": np.full(len(r), float(labor)),
+    }
+
+def buy_cost_pc(bom: pd.DataFrame) -> float:
+    """Inkoopdelen per stuk, inclusief uitval."""
+    b = pd.DataFrame(bom)
+    d = BOM_SCHEMA.defaults or {}
+    scrap = np.clip(_col(b, "Scrap_pct", d["Scrap_pct"]), 0.0, 0.99)
+    return float(np.sum(_col(b, "Qty", d["Qty"]) * _col(b, "UnitPrice", d["UnitPrice"]) / (1.0 - scrap)))
+
+def step_costs(steps: Mapping[str, np.ndarray], energy: float, cycle_min: Any = None,
+               scrap: Any = None) -> Dict[str, np.ndarray]:
+    """Machine, arbeid en energie per stap per stuk, gedeeld door de opbrengst van die stap."""
+    cyc = steps["cycle_min"] if cycle_min is None else cycle_min
+    scr = steps["scrap"] if scrap is None else scrap
+    qty, att = steps["qty"], steps["attend"]
+    run_min = cyc * qty
+    keep = 1.0 - scr
+    return {
+        "machine": (run_min + steps["setup_min_pc"]) / 60.0 * steps["mrate"] / keep,
+        "labor": (run_min * att + steps["setup_min_pc"] + steps["qa_min_pc"] * qty) / 60.0 * steps["labor"] / keep,
+        "energy": steps["kwh_pc"] * qty * energy / keep,
+    }
+
+def unit_cost(steps: Mapping[str, np.ndarray], netkg: Any, price: Any, energy: float,
+              cycle_min: Any = None, scrap: Any = None) -> Dict[str, np.ndarray]:
+    """
+    Materiaal + conversie per stuk. cycle_min/scrap overschrijven de stapwaarden en mogen
+    (n, stappen) zijn; price mag (n,) zijn. Uitval per stap deelt de kosten van die stap,
+    materiaal wordt gedeeld door de opbrengst over de hele route.
+    """
+    scr = steps["scrap"] if scrap is None else scrap
+    sc = step_costs(steps, energy, cycle_min, scr)
+    conv = np.sum(sc["machine"] + sc["labor"] + sc["energy"], axis=-1)
+    yield_ = np.prod(1.0 - scr, axis=-1)
+    mat = np.asarray(netkg, dtype="float64") * np.asarray(price, dtype="float64") / yield_
+    return {"mat_pc": mat, "conv_total": conv}
+
+def lean_cost_pc(Q: float, labor: float, storage_days: float, storage_cost: float,
+                 km: float, eur_km: float, rework: float, rework_min: float) -> float:
+    """Opslag (€/stuk/dag), transport per zending verdeeld over Q en herbewerking (fractie x minuten)."""
+    Q = max(float(Q or 1), 1.0)
+    return float(storage_days * storage_cost + km * eur_km / Q + rework * rework_min / 60.0 * labor)
+
+def cost_once(routing: pd.DataFrame, bom: pd.DataFrame, Q: float, netkg: float, price: float,
+              energy: float = 0.0, labor: float = LABOR, mrates: Optional[Mapping[str, float]] = None,
+              storage_days: float = 0.0, storage_cost: float = 0.0, km: float = 0.0, eur_km: float = 0.0,
+              rework: float = 0.0, rework_min: float = 0.0) -> Dict[str, float]:
+    """Kostprijs per stuk: mat_pc, conv_total, lean_total, buy_total en total_pc."""
+    core = unit_cost(routing_arrays(routing, Q, labor, mrates), netkg, price, energy)
+    lean = lean_cost_pc(Q, labor, storage_days, storage_cost, km, eur_km, rework, rework_min)
+    buy = buy_cost_pc(bom)
+    mat, conv = float(core["mat_pc"]), float(core["conv_total"])
+    return {"mat_pc": mat, "conv_total": conv, "lean_total": lean, "buy_total": buy,
+            "total_pc": mat + conv + lean + buy}
+
+def cost_curve(routing: pd.DataFrame, bom: pd.DataFrame, Qs: Any, netkg: float, price: float,
+               energy: float = 0.0, labor: float = LABOR, mrates: Optional[Mapping[str, float]] = None,
+               storage_days: float = 0.0, storage_cost: float = 0.0, km: float = 0.0, eur_km: float = 0.0,
+               rework: float = 0.0, rework_min: float = 0.0) -> pd.DataFrame:
+    """
+    cost_once voor een hele vector aantallen tegelijk: alleen setup per stuk en transport hangen
+    van Q af, dus die krijgen een (n, stappen)- resp. (n,)-vorm; de rest wordt één keer gerekend.
+    """
+    Q = np.maximum(np.asarray(Qs, dtype="float64").ravel(), 1.0)
+    r = pd.DataFrame(routing)
+    d = ROUTING_SCHEMA.defaults or {}
+    steps = routing_arrays(r, 1.0, labor, mrates)
+    batch = np.maximum(_col(r, "Batch_size", d["Batch_size"]), 1.0)
+    Qc = Q[:, None]
+    steps["setup_min_pc"] = _col(r, "Setup_min", d["Setup_min"]) * np.ceil(Qc * steps["qty"] / batch) / Qc
+    core = unit_cost(steps, netkg, price, energy)
+    lean = storage_days * storage_cost + km * eur_km / Q + rework * rework_min / 60.0 * labor
+    buy = buy_cost_pc(bom)
+    total = core["mat_pc"] + core["conv_total"] + lean + buy
+    return pd.DataFrame({"Q": Q, "Mat_pc": np.broadcast_to(core["mat_pc"], Q.shape), "Conv_pc": core["conv_total"],
+                         "Lean_pc": lean, "Buy_pc": buy, "UnitCost": total, "Total": total * Q})
+
+def build_powerbi_facts(routing_df: pd.DataFrame, bom_df: pd.DataFrame, Q: float, netkg: float,
+                        mat_price_eurkg: float, energy_eur_kwh: float = 0.0, labor_rate: float = LABOR,
+                        machine_rates: Optional[Mapping[str, float]] = None, project: str = "Project",
+                        materiaal: str = "", price_source: str = "", mc_samples: Any = None,
+                        res: Optional[Mapping[str, float]] = None) -> Dict[str, pd.DataFrame]:
+    """
+    Fact-tabellen (FactRun, FactRouting, FactBOM) voor Dashboard/Power BI, per stuk.
+    mc_samples mag een QuantileSketch of een array zijn; P50/P80/P95 komen uit de sketch.
+    """
+    run_date = pd.Timestamp.now().normalize()
+    key = {"Project": project, "RunDate": run_date}
+    r = pd.DataFrame(routing_df)
+    if res is None or not res.get("total_pc"):
+        res = cost_once(r, bom_df, Q, netkg, mat_price_eurkg, energy_eur_kwh, labor_rate, machine_rates)
+    run = {**key, "Q": Q, "Materiaal": materiaal, "PriceSource": price_source, "EurKg": mat_price_eurkg,
+           "Mat_pc": res["mat_pc"], "Conv_total": res["conv_total"], "Lean_total": res["lean_total"],
+           "Buy_total": res["buy_total"], "UnitCost": res["total_pc"]}
+    sk = as_sketch(mc_samples)
+    if sk is not None:
+        p50, p80, p95 = sk.percentile([50, 80, 95])
+        run.update(MC_n=sk.count, MC_P50=p50, MC_P80=p80, MC_P95=p95)
+
+    sc = step_costs(routing_arrays(r, Q, labor_rate, machine_rates), energy_eur_kwh)
+    procs = r["Proces"].astype(str) if "Proces" in r.columns else pd.Series([""] * len(r))
+    fact_routing = pd.DataFrame({
+        **key, "Step": r["Step"].to_numpy() if "Step" in r.columns else np.arange(1, len(r) + 1),
+        "Process": procs.to_numpy(), "Cost_Machine": sc["machine"], "Cost_Labor": sc["labor"],
+        "Cost_Energy": sc["energy"], "Cost_Lean": 0.0,
+    })
+
+    b = pd.DataFrame(bom_df)
+    d = BOM_SCHEMA.defaults or {}
+    qty = _col(b, "Qty", d["Qty"])
+    unit = _col(b, "UnitPrice", d["UnitPrice"]) / (1.0 - np.clip(_col(b, "Scrap_pct", d["Scrap_pct"]), 0.0, 0.99))
+    fact_bom = pd.DataFrame({
+        **key, "Part": b["Part"].astype(str).to_numpy() if "Part" in b.columns else np.arange(len(b)).astype(str),
+        "Qty_Run": qty * Q, "Cost_Run": qty * unit * Q,
+    })
+    return {"FactRun": pd.DataFrame([run]), "FactRouting": fact_routing, "FactBOM": fact_bom}
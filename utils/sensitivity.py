@@ -0,0 +1,127 @@
+# utils/sensitivity.py
+# Gevoeligheidsanalyse op de routing-kostprijs (zelfde kern als cost_once/run_mc).
+# Tornado (één-voor-één laag/hoog) wordt vooraf als factor-matrix (evaluaties x parameters) gemaakt
+# en in één gevectoriseerde batch doorgerekend; Sobol (Saltelli A/B/AB_i) bouwt elk AB_i-blok pas
+# bij het evalueren, zodat het geheugen lineair blijft in het aantal parameters.
+from __future__ import annotations
+import os
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Dict, List, Mapping, Optional
+import numpy as np
+import pandas as pd
+
+from .routing import LABOR, MAX_SCRAP, _col, lean_cost_pc, routing_arrays, unit_cost
+from .validators import BOM_SCHEMA
+
+CHUNK = 32_768  # evaluaties per batch
+
+class CostModel:
+    """
+    Scenario voorbereid als arrays; evaluate(F) rekent de kostprijs per stuk voor een
+    (n, parameters)-matrix met factoren (1.0 = basiswaarde).
+    Parameters: Cycle/Scrap per routingstap, €/kg, energieprijs, opslag en inkoop per BOM-regel.
+    """
+
+    def __init__(self, routing: pd.DataFrame, bom: pd.DataFrame, Q: float, netkg: float, price: float,
+                 energy: float = 0.0, labor: float = LABOR, mrates: Optional[Mapping[str, float]] = None,
+                 storage_days: float = 0.0, storage_cost: float = 0.0, km: float = 0.0, eur_km: float = 0.0,
+                 rework: float = 0.0, rework_min: float = 0.0):
+        r, b = pd.DataFrame(routing), pd.DataFrame(bom)
+        self.steps = routing_arrays(r, Q, labor, mrates)
+        self.netkg, self.price, self.energy = float(netkg), float(price), float(energy)
+        self.storage = float(storage_days) * float(storage_cost)
+        self.lean_other = lean_cost_pc(Q, labor, 0.0, 0.0, km, eur_km, rework, rework_min)
+        d = BOM_SCHEMA.defaults or {}
+        scrap = np.clip(_col(b, "Scrap_pct", d["Scrap_pct"]), 0.0, 0.99)
+        self.buy_lines = _col(b, "Qty", d["Qty"]) * _col(b, "UnitPrice", d["UnitPrice"]) / (1.0 - scrap)
+
+        steps = r["Step"].astype(str).tolist() if "Step" in r.columns else [str(i + 1) for i in range(len(r))]
+        procs = r["Proces"].astype(str).tolist() if "Proces" in r.columns else [""] * len(r)
+        parts = b["Part"].astype(str).tolist() if "Part" in b.columns else [str(i + 1) for i in range(len(b))]
+        k = len(steps)
+        rows: List[Dict[str, Any]] = []
+        rows += [{"parameter": f"Cycle {s} {p}", "group": "routing", "base": c}
+                 for s, p, c in zip(steps, procs, self.steps["cycle_min"])]
+        rows += [{"parameter": f"Scrap {s} {p}", "group": "routing", "base": c}
+                 for s, p, c in zip(steps, procs, self.steps["scrap"])]
+        rows += [{"parameter": "Materiaal €/kg", "group": "materiaal", "base": self.price},
+                 {"parameter": "Energie €/kWh", "group": "energie", "base": self.energy},
+                 {"parameter": "Opslag", "group": "lean", "base": self.storage}]
+        rows += [{"parameter": f"Inkoop {p}", "group": "bom", "base": c} for p, c in zip(parts, self.buy_lines)]
+        self.params = pd.DataFrame(rows)
+        self._ic = np.arange(k)
+        self._isc = np.arange(k, 2 * k)
+        self._ip, self._ie, self._ist = 2 * k, 2 * k + 1, 2 * k + 2
+        self._ib = np.arange(2 * k + 3, 2 * k + 3 + len(parts))
+
+    @property
+    def n_params(self) -> int:
+        return len(self.params)
+
+    def evaluate(self, F: np.ndarray) -> np.ndarray:
+        F = np.atleast_2d(np.asarray(F, dtype="float64"))
+        cyc = self.steps["cycle_min"] * F[:, self._ic]
+        scr = np.clip(self.steps["scrap"] * F[:, self._isc], 0.0, MAX_SCRAP)
+        core = unit_cost(self.steps, self.netkg, self.price * F[:, self._ip],
+                         self.energy * F[:, self._ie, None], cycle_min=cyc, scrap=scr)
+        lean = self.lean_other + self.storage * F[:, self._ist]
+        buy = F[:, self._ib] @ self.buy_lines
+        return core["mat_pc"] + core["conv_total"] + lean + buy
+
+    def evaluate_batch(self, F: np.ndarray, workers: Optional[int] = None, chunk: int = CHUNK) -> np.ndarray:
+        """evaluate() in chunks over threads (NumPy laat de GIL los); volgorde blijft behouden."""
+        blocks = [F[i:i + chunk] for i in range(0, len(F), chunk)]
+        workers = max(1, min(workers or os.cpu_count() or 1, len(blocks)))
+        if workers == 1:
+            parts = [self.evaluate(b) for b in blocks]
+        else:
+            with ThreadPoolExecutor(max_workers=workers) as ex:
+                parts = list(ex.map(self.evaluate, blocks))
+        return np.concatenate(parts) if parts else np.zeros(0)
+
+def tornado(model: CostModel, rel: float = 0.10, workers: Optional[int] = None) -> pd.DataFrame:
+    """Eén-voor-één ±rel per parameter; gesorteerd op swing (hoog - laag, absoluut)."""
+    P = model.n_params
+    F = np.ones((2 * P + 1, P))
+    F[np.arange(P), np.arange(P)] = 1.0 - rel
+    F[P + np.arange(P), np.arange(P)] = 1.0 + rel
+    y = model.evaluate_batch(F, workers)
+    out = model.params.assign(low=y[:P], high=y[P:2 * P], base_cost=y[-1])
+    out["swing"] = (out["high"] - out["low"]).abs()
+    return out.sort_values("swing", ascending=False, ignore_index=True)
+
+def sobol_indices(model: CostModel, rel: float = 0.10, n: int = 4096, seed: Optional[int] = None,
+                  workers: Optional[int] = None) -> pd.DataFrame:
+    """
+    Variantie-gebaseerde indices (Saltelli-ontwerp, n x (P + 2) evaluaties) met factoren
+    uniform in [1-rel, 1+rel]. S1 = eerste orde (Saltelli 2010), ST = totaal (Jansen).
+    """
+    P = model.n_params
+    rng = np.random.default_rng(seed)
+    A = 1.0 + rel * (2.0 * rng.random((n, P)) - 1.0)
+    B = 1.0 + rel * (2.0 * rng.random((n, P)) - 1.0)
+    y = model.evaluate_batch(np.concatenate([A, B]), workers)
+    mu = y.mean()  # centreren: anders domineert het niveau (~€) de schatter-ruis
+    fA, fB = y[:n] - mu, y[n:] - mu
+
+    def f_ab(i: int) -> np.ndarray:
+        # AB_i (= A met kolom i uit B) per parameter opbouwen i.p.v. de hele (P, n, P)-tensor
+        AB = A.copy()
+        AB[:, i] = B[:, i]
+        return model.evaluate(AB) - mu
+
+    workers = max(1, min(workers or os.cpu_count() or 1, P))
+    if workers == 1 or P < 2:
+        fAB = np.array([f_ab(i) for i in range(P)]).reshape(P, n)
+    else:  # map houdt alleen de (n,)-resultaten vast; hooguit `workers` AB_i-matrices tegelijk
+        with ThreadPoolExecutor(max_workers=workers) as ex:
+            fAB = np.array(list(ex.map(f_ab, range(P)))).reshape(P, n)
+    var = np.var(np.concatenate([fA, fB]))
+    if var <= 0:
+        s1 = st = np.zeros(P)
+    else:
+        s1 = np.mean(fB * (fAB - fA), axis=1) / var
+        st = 0.5 * np.mean((fA - fAB) ** 2, axis=1) / var
+    out = model.params.assign(S1=np.clip(s1, 0.0, 1.0), ST=np.clip(st, 0.0, 1.0))
+    out.attrs.update(evaluations=int(n * (P + 2)), variance=float(var))
+    return out.sort_values("ST", ascending=False, ignore_index=True)
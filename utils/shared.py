@@ -32,6 +32,14 @@ except Exception:
     def load_processes(): return None
     def load_bom(): return None
 
+# Routing-kostprijs + Monte-Carlo (gebruikt door ScenarioPlanner, Dashboard, Rapport)
+from .routing import (
+    ROUTING_COLS, BOM_COLS, MACHINE_RATES, LABOR, PROFIT, CONT, cost_once, cost_curve, build_powerbi_facts,
+)
+from .sketch import QuantileSketch, as_sketch
+from .montecarlo import run_mc, run_mc_adaptive
+from .capacity import capacity_table, expand_orders, load_matrix, utilization, utilization_heatmap
+
 # Backward-compat aliases die elders gebruikt worden
 MATERIALS = SCHEMA_MATERIALS
 PROCESSES = SCHEMA_PROCESSES
@@ -42,4 +50,8 @@ __all__ = [
     "MATERIALS", "PROCESSES", "BOM",
     "read_csv_safe", "paths",
     "load_materials", "load_processes", "load_bom",
+    "ROUTING_COLS", "BOM_COLS", "MACHINE_RATES", "LABOR", "PROFIT", "CONT",
+    "cost_once", "cost_curve", "run_mc", "run_mc_adaptive", "build_powerbi_facts",
+    "QuantileSketch", "as_sketch",
+    "capacity_table", "expand_orders", "load_matrix", "utilization", "utilization_heatmap",
 ]
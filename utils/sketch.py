@@ -0,0 +1,135 @@
+# utils/sketch.py
+# Samenvoegbare streaming-quantile-sketch (t-digest-achtig) voor Monte-Carlo-uitkomsten.
+# Geheugen blijft O(compression), hoeveel samples er ook doorheen gaan; sketches van
+# verschillende chunks/threads kun je mergen. Quantiles, CDF en histogram komen uit de centroids.
+from __future__ import annotations
+from typing import Any, Dict, Iterable, Optional, Sequence, Tuple
+import numpy as np
+
+class QuantileSketch:
+    """
+    Centroids (gemiddelde, gewicht) gecomprimeerd met de arcsin-schaal van t-digest:
+    smalle clusters in de staarten (P95/P99 nauwkeurig), brede in het midden.
+    update() en merge() werken gebufferd en volledig gevectoriseerd.
+    """
+
+    def __init__(self, compression: float = 400.0, buffer: int = 50_000):
+        self.compression = float(compression)
+        self._buffer_max = int(buffer)
+        self._means = np.zeros(0)
+        self._weights = np.zeros(0)
+        self._buf: list = []
+        self._buf_n = 0
+        self.count = 0
+        self.total = 0.0
+        self.min = np.inf
+        self.max = -np.inf
+
+    def __len__(self) -> int:
+        return int(self.count)
+
+    def __repr__(self) -> str:
+        return f"QuantileSketch(n={self.count}, centroids={len(self._means)})"
+
+    # --- opbouw ---
+    def update(self, values: Iterable[float]) -> "QuantileSketch":
+        x = np.asarray(values, dtype="float64").ravel()
+        x = x[np.isfinite(x)]
+        if x.size:
+            self.count += int(x.size)
+            self.total += float(x.sum())
+            self.min = min(self.min, float(x.min()))
+            self.max = max(self.max, float(x.max()))
+            self._buf.append(x); self._buf_n += x.size
+            if self._buf_n >= self._buffer_max:
+                self._flush()
+        return self
+
+    def merge(self, other: "QuantileSketch") -> "QuantileSketch":
+        other._flush()
+        if other.count:
+            self._flush()
+            self.count += other.count
+            self.total += other.total
+            self.min = min(self.min, other.min)
+            self.max = max(self.max, other.max)
+            self._compress(np.concatenate([self._means, other._means]),
+                           np.concatenate([self._weights, other._weights]))
+        return self
+
+    def _flush(self) -> None:
+        if not self._buf:
+            return
+        x = np.concatenate(self._buf)
+        self._buf, self._buf_n = [], 0
+        self._compress(np.concatenate([self._means, x]), np.concatenate([self._weights, np.ones(x.size)]))
+
+    def _compress(self, means: np.ndarray, weights: np.ndarray) -> None:
+        order = np.argsort(means, kind="stable")
+        means, weights = means[order], weights[order]
+        W = weights.sum()
+        q = (np.cumsum(weights) - weights / 2.0) / W
+        k = self.compression / (2 * np.pi) * np.arcsin(2 * q - 1)  # t-digest k1-schaal
+        cluster = np.floor(k - k[0]).astype(np.int64)
+        n = int(cluster[-1]) + 1
+        w = np.bincount(cluster, weights=weights, minlength=n)
+        m = np.bincount(cluster, weights=means * weights, minlength=n)
+        keep = w > 0
+        self._weights, self._means = w[keep], m[keep] / w[keep]
+
+    # --- queries ---
+    def _points(self) -> Tuple[np.ndarray, np.ndarray]:
+        self._flush()
+        cw = np.cumsum(self._weights) - self._weights / 2.0
+        return (np.concatenate([[0.0], cw, [float(self.count)]]),
+                np.concatenate([[self.min], self._means, [self.max]]))
+
+    def quantile(self, q: Any) -> Any:
+        """q in [0, 1] (scalar of array)."""
+        if not self.count:
+            return np.full(np.shape(q), np.nan) if np.ndim(q) else float("nan")
+        pos, val = self._points()
+        out = np.interp(np.asarray(q, dtype="float64") * self.count, pos, val)
+        return float(out) if np.ndim(out) == 0 else out
+
+    def percentile(self, p: Any) -> Any:
+        """Zelfde als np.percentile(samples, p), maar uit de sketch."""
+        return self.quantile(np.asarray(p, dtype="float64") / 100.0)
+
+    def cdf(self, x: Any) -> Any:
+        if not self.count:
+            return np.zeros(np.shape(x)) if np.ndim(x) else 0.0
+        pos, val = self._points()
+        val = np.maximum.accumulate(val)
+        out = np.interp(np.asarray(x, dtype="float64"), val, pos) / self.count
+        return float(out) if np.ndim(out) == 0 else out
+
+    def histogram(self, bins: int = 40, range_: Optional[Sequence[float]] = None) -> Tuple[np.ndarray, np.ndarray]:
+        """(counts, edges) zoals np.histogram, geschat uit de CDF."""
+        lo, hi = range_ if range_ is not None else (self.min, self.max)
+        if not self.count or not np.isfinite(lo) or hi <= lo:
+            return np.zeros(bins), np.linspace(0.0, 1.0, bins + 1)
+        edges = np.linspace(lo, hi, bins + 1)
+        counts = np.diff(np.asarray(self.cdf(edges)) * self.count)
+        return np.maximum(counts, 0.0), edges
+
+    @property
+    def mean(self) -> float:
+        return self.total / self.count if self.count else float("nan")
+
+    def summary(self, percentiles: Sequence[float] = (50, 80, 95)) -> Dict[str, float]:
+        out = {f"P{int(p)}": float(v) for p, v in zip(percentiles, np.atleast_1d(self.percentile(percentiles)))}
+        out.update(n=float(self.count), mean=self.mean, min=self.min, max=self.max)
+        return out
+
+    @property
+    def nbytes(self) -> int:
+        self._flush()
+        return int(self._means.nbytes + self._weights.nbytes)
+
+def as_sketch(obj: Any) -> Optional[QuantileSketch]:
+    """Sketch uit een sketch of (legacy) array met samples; None als er niets is."""
+    if obj is None or isinstance(obj, QuantileSketch):
+        return obj if obj is None or obj.count else None
+    x = np.asarray(obj, dtype="float64")
+    return QuantileSketch().update(x) if x.size else None
@@ -0,0 +1,94 @@
+# utils/store.py
+# Kolomopslag voor data/: elke CSV krijgt een Arrow IPC-kopie (data/.arrow/<naam>.<schema>.arrow)
+# die memory-mapped gelezen wordt, met alleen de gevraagde kolommen.
+# CSV blijft het import/export-formaat; wijzigt de CSV (mtime/grootte), dan wordt de kopie opnieuw gemaakt.
+# Zonder pyarrow (optioneel) valt alles terug op gewoon CSV lezen.
+from __future__ import annotations
+import hashlib, os, threading
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional
+import pandas as pd
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+    import pyarrow.ipc as ipc
+except Exception:
+    pa = feather = ipc = None
+
+ARROW_DIR = ".arrow"
+
+def available() -> bool:
+    return feather is not None
+
+def schema_key(schema: Optional[dict]) -> str:
+    """Korte hash van een schema, zodat een gewijzigd schema een nieuwe kopie oplevert."""
+    raw = repr(sorted((k, str(v)) for k, v in (schema or {}).items()))
+    return hashlib.sha1(raw.encode("utf-8")).hexdigest()[:8]
+
+def arrow_path(csv_path: Path, key: str = "") -> Path:
+    csv_path = Path(csv_path)
+    return csv_path.parent / ARROW_DIR / f"{csv_path.stem}.{key or 'raw'}.arrow"
+
+def _stamp(csv_path: Path) -> bytes:
+    st = Path(csv_path).stat()
+    return f"{st.st_mtime_ns}:{st.st_size}".encode("ascii")
+
+def is_fresh(csv_path: Path, arrow: Path) -> bool:
+    """De kopie is actueel als mtime+grootte van de CSV gelijk zijn aan wat erin is vastgelegd."""
+    try:
+        with pa.memory_map(str(arrow)) as src:
+            meta = ipc.open_file(src).schema.metadata or {}
+        return meta.get(b"csv_stamp") == _stamp(csv_path)
+    except Exception:
+        return False
+
+def ensure_arrow(csv_path: Path, parse: Callable[[], pd.DataFrame], key: str = "") -> Optional[Path]:
+    """
+    Geeft het pad van een actuele Arrow-kopie, of None als pyarrow ontbreekt of schrijven niet lukt.
+    `parse` levert het (getypeerde) DataFrame uit de CSV en wordt alleen aangeroepen bij een verouderde kopie.
+    """
+    if feather is None:
+        return None
+    arrow = arrow_path(csv_path, key)
+    if is_fresh(csv_path, arrow):
+        return arrow
+    try:
+        stamp = _stamp(csv_path)
+        table = pa.Table.from_pandas(parse(), preserve_index=False)
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), b"csv_stamp": stamp})
+        arrow.parent.mkdir(parents=True, exist_ok=True)
+        tmp = arrow.with_suffix(f".tmp{os.getpid()}_{threading.get_ident()}")
+        # ongecomprimeerd, zodat lezen via memory-map zonder decompressie kan
+        feather.write_feather(table, tmp, compression="uncompressed")
+        os.replace(tmp, arrow)
+        return arrow
+    except Exception:
+        return None
+
+def read_columns(csv_path: Path, parse: Callable[[], pd.DataFrame], key: str = "",
+                 columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """Leest (een projectie van) de tabel uit de Arrow-kopie; valt terug op parse() bij problemen."""
+    arrow = ensure_arrow(csv_path, parse, key)
+    if arrow is not None:
+        try:
+            table = feather.read_table(arrow, columns=_present(arrow, columns), memory_map=True)
+            return table.to_pandas()
+        except Exception:
+            pass
+    df = parse()
+    return df[[c for c in columns if c in df.columns]] if columns is not None else df
+
+def _present(arrow: Path, columns: Optional[List[str]]) -> Optional[List[str]]:
+    # onbekende kolommen negeren (zelfde gedrag als de CSV-fallback)
+    if columns is None:
+        return None
+    with pa.memory_map(str(arrow)) as src:
+        names = set(ipc.open_file(src).schema.names)
+    return [c for c in columns if c in names]
+
+def describe(csv_path: Path, key: str = "") -> Dict[str, Any]:
+    """Status van de kopie voor diagnosepagina's."""
+    arrow = arrow_path(csv_path, key)
+    return {"csv": str(csv_path), "arrow": str(arrow), "exists": arrow.exists(),
+            "fresh": available() and is_fresh(csv_path, arrow), "pyarrow": available()}
@@ -0,0 +1,91 @@
+# utils/sweep.py
+# Scenario-grid voor de Scenario Planner: Q x €/kg x cycle-factor x scrap-factor (tot ~100k combinaties)
+# in één broadcast-berekening per chunk over dezelfde kern als cost_once.
+# Het grid zelf wordt nooit als DataFrame opgebouwd: chunks komen uit np.unravel_index.
+from __future__ import annotations
+from typing import Iterator, Mapping, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+
+from .routing import LABOR, MAX_SCRAP, _col, buy_cost_pc, routing_arrays, unit_cost
+from .validators import ROUTING_SCHEMA
+
+AXES = ("Q", "price", "cycle_factor", "scrap_factor")
+CHUNK = 16_384
+
+class SweepGrid:
+    """
+    Cartesisch grid van scenario-assen; iter_chunks() levert (vlakke index, kostprijs/stuk)
+    per chunk, run() vult één array met alle uitkomsten (n x 8 bytes).
+    """
+
+    def __init__(self, routing: pd.DataFrame, bom: pd.DataFrame, netkg: float,
+                 Qs: Sequence[float], prices: Sequence[float],
+                 cycle_factors: Sequence[float] = (1.0,), scrap_factors: Sequence[float] = (1.0,),
+                 energy: float = 0.0, labor: float = LABOR, mrates: Optional[Mapping[str, float]] = None,
+                 storage_days: float = 0.0, storage_cost: float = 0.0, km: float = 0.0, eur_km: float = 0.0,
+                 rework: float = 0.0, rework_min: float = 0.0):
+        self.axes = {
+            "Q": np.maximum(np.asarray(Qs, dtype="float64"), 1.0),
+            "price": np.asarray(prices, dtype="float64"),
+            "cycle_factor": np.asarray(cycle_factors, dtype="float64"),
+            "scrap_factor": np.asarray(scrap_factors, dtype="float64"),
+        }
+        self.shape: Tuple[int, ...] = tuple(len(v) for v in self.axes.values())
+        self.size = int(np.prod(self.shape))
+        self.steps = routing_arrays(routing, 1.0, labor, mrates)
+        r, d = pd.DataFrame(routing), ROUTING_SCHEMA.defaults or {}
+        self._setup_min = _col(r, "Setup_min", d["Setup_min"])
+        self._batch = np.maximum(_col(r, "Batch_size", d["Batch_size"]), 1.0)
+        self.netkg, self.energy = float(netkg), float(energy)
+        self._buy = buy_cost_pc(bom)
+        self._lean_fixed = float(storage_days * storage_cost + rework * rework_min / 60.0 * labor)
+        self._transport = float(km * eur_km)
+
+    def _costs(self, idx: np.ndarray) -> np.ndarray:
+        iq, ip, ic, isf = np.unravel_index(idx, self.shape)
+        Q = self.axes["Q"][iq][:, None]
+        st = self.steps
+        steps = {**st, "setup_min_pc": self._setup_min * np.ceil(Q * st["qty"] / self._batch) / Q}
+        cyc = st["cycle_min"] * self.axes["cycle_factor"][ic][:, None]
+        scr = np.clip(st["scrap"] * self.axes["scrap_factor"][isf][:, None], 0.0, MAX_SCRAP)
+        core = unit_cost(steps, self.netkg, self.axes["price"][ip], self.energy, cycle_min=cyc, scrap=scr)
+        lean = self._lean_fixed + self._transport / Q[:, 0]
+        return core["mat_pc"] + core["conv_total"] + lean + self._buy
+
+    def iter_chunks(self, chunk: int = CHUNK) -> Iterator[Tuple[np.ndarray, np.ndarray]]:
+        for start in range(0, self.size, chunk):
+            idx = np.arange(start, min(start + chunk, self.size))
+            yield idx, self._costs(idx)
+
+    def run(self, chunk: int = CHUNK) -> np.ndarray:
+        """Alle kostprijzen in grid-vorm (len(Q), len(price), len(cycle), len(scrap))."""
+        out = np.empty(self.size)
+        for idx, cost in self.iter_chunks(chunk):
+            out[idx] = cost
+        return out.reshape(self.shape)
+
+    def frame(self, idx: np.ndarray, cost: np.ndarray) -> pd.DataFrame:
+        """Tabel voor (een deel van) de grid-indexen."""
+        coords = np.unravel_index(idx, self.shape)
+        out = {a: self.axes[a][c] for a, c in zip(AXES, coords)}
+        out["UnitCost"] = cost
+        out["Total"] = cost * out["Q"]
+        return pd.DataFrame(out)
+
+def top_n(best: Optional[Tuple[np.ndarray, np.ndarray]], idx: np.ndarray, cost: np.ndarray,
+          n: int = 20) -> Tuple[np.ndarray, np.ndarray]:
+    """Lopende top-n (laagste kostprijs) over chunks, zonder alles te bewaren."""
+    if best is not None:
+        idx, cost = np.concatenate([best[0], idx]), np.concatenate([best[1], cost])
+    if len(cost) > n:
+        keep = np.argpartition(cost, n)[:n]
+        idx, cost = idx[keep], cost[keep]
+    order = np.argsort(cost, kind="stable")
+    return idx[order], cost[order]
+
+def surface(costs: np.ndarray, grid: SweepGrid, reduce: str = "min") -> pd.DataFrame:
+    """Kostoppervlak Q x €/kg; de cycle/scrap-assen worden samengevat (min of mean)."""
+    agg = costs.min(axis=(2, 3)) if reduce == "min" else costs.mean(axis=(2, 3))
+    return pd.DataFrame(agg, index=pd.Index(grid.axes["Q"], name="Q"),
+                        columns=pd.Index(grid.axes["price"], name="€/kg"))